@@ -0,0 +1,139 @@
+import datetime as dt
+from sql_manager import SqlManager
+
+# sql expression giving the bucket number of a timestamp key {ts} (minutes since 1970/01/01), by period.
+# 1970/01/01 is a Thursday, the 3 days offset makes weeks start on Monday.
+# months are numbered year * 12 + month - 1.
+BUCKET_SQL = {
+    "day": SqlManager.DAY_SQL,
+    "week": SqlManager.FLOOR_DIV_SQL.format(n=SqlManager.DAY_SQL + " + 3", d=7),
+    "month": SqlManager.MONTH_SQL,
+}
+PERIODS = tuple(BUCKET_SQL)
+
+
+class Bucket:
+    """
+    Drive and rest totals of the entries of one day, week or month.
+
+    Attributes:
+        start(datetime.date): first day of the bucket (a Monday for weeks, the 1st for months)
+        entries(int): number of entries in the bucket
+        drivetime(float), resttime(float): total driving and resting time
+        avg_drivetime(float), avg_resttime(float): average driving and resting time per entry
+        ratio(float): drivetime / resttime, None when there is no rest time
+    """
+    def __init__(self, start, entries, drivetime, resttime, avg_drivetime, avg_resttime, ratio):
+        self.start = start
+        self.entries = entries
+        self.drivetime = drivetime
+        self.resttime = resttime
+        self.avg_drivetime = avg_drivetime
+        self.avg_resttime = avg_resttime
+        self.ratio = ratio
+
+    def __repr__(self):
+        return (f"Bucket({self.start}, entries={self.entries}, drivetime={self.drivetime}"
+                f", resttime={self.resttime})")
+
+
+def aggregate(sql_manager : SqlManager, period = "day", start = None, end = None):
+    """
+    Compute the totals, averages and drive/rest ratio of the entries between start and end
+    for every day, week or month, with a GROUP BY run by sqlite.
+    When the range is made of whole days (or whole months for monthly buckets) the totals are read
+    from the rollup tables maintained by SqlManager, so the cost depends on the number of buckets
+    rather than the number of entries. Otherwise they are computed from the logs table.
+    Args:
+        sql_manager: manager of the database to read, a reader works as well
+        period: (default to "day") one of PERIODS
+        start, end: (default to None, no bound) same bounds as SqlManager.iter_range()
+    Returns:
+        A list of Bucket objects ordered by their start, buckets without entries are left out
+    Raises:
+        ValueError: if period is not one of PERIODS
+    """
+    if period not in BUCKET_SQL:
+        raise ValueError(f"Unknown period {period!r}, expected one of {PERIODS}")
+    lower, upper = sql_manager.key_range(start, end)
+    days = _whole_days(lower, upper)
+    if days is None:
+        query = f"""
+        SELECT {BUCKET_SQL[period].format(ts="timestamp")} AS bucket, COUNT(*), TOTAL(drivetime), TOTAL(resttime)
+        FROM logs
+        WHERE timestamp BETWEEN ? AND ?
+        GROUP BY bucket
+        ORDER BY bucket
+        """
+        params = (lower, upper)
+    elif period == "month" and _whole_months(lower, upper) is not None:
+        query = """
+        SELECT bucket, entries, drivetime, resttime
+        FROM monthly_totals
+        WHERE bucket BETWEEN ? AND ?
+        ORDER BY bucket
+        """
+        params = _whole_months(lower, upper)
+    else:
+        query = f"""
+        SELECT {BUCKET_SQL[period].format(ts="bucket * 1440")} AS b, SUM(entries), TOTAL(drivetime), TOTAL(resttime)
+        FROM daily_totals
+        WHERE bucket BETWEEN ? AND ?
+        GROUP BY b
+        ORDER BY b
+        """
+        params = days
+    rows = sql_manager.cur.execute(query, params).fetchall()
+    return [_to_bucket(period, *r) for r in rows]
+
+
+def _to_bucket(period, bucket, entries, drivetime, resttime):
+    """helper function that creates a Bucket from the totals of a bucket."""
+    return Bucket(bucket_start(period, bucket), entries, drivetime, resttime
+                  , drivetime / entries, resttime / entries
+                  , drivetime / resttime if resttime != 0 else None)
+
+
+def _whole_days(lower, upper):
+    """
+    helper function that checks whether the key range [lower, upper] is made of whole days.
+    Returns: a tuple (first day, last day) numbered like daily_totals, or None if it is not
+    """
+    if lower != SqlManager.MIN_KEY and lower % 1440 != 0:
+        return None
+    if upper != SqlManager.MAX_KEY and (upper + 1) % 1440 != 0:
+        return None
+    return lower // 1440, (upper + 1) // 1440 - 1
+
+
+def _whole_months(lower, upper):
+    """
+    helper function that checks whether the key range [lower, upper], already made of whole days,
+    is made of whole months.
+    Returns: a tuple (first month, last month) numbered like monthly_totals, or None if it is not
+    """
+    first = SqlManager.MIN_KEY
+    last = SqlManager.MAX_KEY
+    if lower != SqlManager.MIN_KEY:
+        day = bucket_start("day", lower // 1440)
+        if day.day != 1:
+            return None
+        first = day.year * 12 + day.month - 1
+    if upper != SqlManager.MAX_KEY:
+        # first day after the range
+        day = bucket_start("day", (upper + 1) // 1440)
+        if day.day != 1:
+            return None
+        last = day.year * 12 + day.month - 2
+    return first, last
+
+
+def bucket_start(period, bucket):
+    """
+    Returns: the first day (datetime.date) of the bucket number bucket, as numbered by BUCKET_SQL[period]
+    """
+    if period == "day":
+        return SqlManager.EPOCH.date() + dt.timedelta(days=bucket)
+    if period == "week":
+        return SqlManager.EPOCH.date() + dt.timedelta(days=bucket * 7 - 3)
+    return dt.date(bucket // 12, bucket % 12 + 1, 1)
@@ -0,0 +1,43 @@
+"""
+Tests of the day and week buckets of aggregation.py around EPOCH, where sqlite's truncating division
+used to put keys before 1970 in the wrong bucket.
+Run with: python -m pytest aggregation_test.py
+"""
+import datetime as dt
+
+import pytest
+
+import aggregation
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+TIMESTAMPS = [
+    dt.datetime(1969, 12, 28, 12, 0),   # Sunday
+    dt.datetime(1969, 12, 29, 0, 0),    # Monday
+    dt.datetime(1969, 12, 31, 23, 59),
+    dt.datetime(1970, 1, 1, 0, 0),
+    dt.datetime(1970, 1, 5, 8, 0),      # Monday
+]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    manager.add_entries([LogEntry(t, 1, 2) for t in TIMESTAMPS])
+    yield manager
+    manager.close()
+
+
+@pytest.mark.parametrize("start, end", [(None, None), ("1969-12-01", "1970-01-31"), (dt.datetime(1969, 12, 1, 0, 1), None)])
+def test_days_before_epoch(manager, start, end):
+    buckets = aggregation.aggregate(manager, "day", start, end)
+    assert [(b.start, b.entries) for b in buckets] == [
+        (dt.date(1969, 12, 28), 1), (dt.date(1969, 12, 29), 1), (dt.date(1969, 12, 31), 1)
+        , (dt.date(1970, 1, 1), 1), (dt.date(1970, 1, 5), 1)]
+
+
+@pytest.mark.parametrize("start, end", [(None, None), (dt.datetime(1969, 12, 1, 0, 1), None)])
+def test_weeks_before_epoch(manager, start, end):
+    buckets = aggregation.aggregate(manager, "week", start, end)
+    assert [(b.start, b.entries) for b in buckets] == [
+        (dt.date(1969, 12, 22), 1), (dt.date(1969, 12, 29), 3), (dt.date(1970, 1, 5), 1)]
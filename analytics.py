@@ -1,12 +1,238 @@
+import io
 import customtkinter as ctk
+from sql_manager import SqlManager
+from background import run_in_background
+from custom_window import FormattedTextFrame
+from chart_cache import ChartCache
+import aggregation
+import charts
+try:
+    import log_stats
+    import decimate
+except ImportError: # the statistics line and the charts need numpy
+    log_stats = None
+    decimate = None
+try:
+    from PIL import Image
+except ImportError: # showing charts needs Pillow, as CTkImage does
+    Image = None
 
 class AnalyticsPage(ctk.CTkFrame):
-    def __init__(self, master, db_file):
+    # label of the period selector -> aggregation period
+    PERIOD_LABELS = {"Daily": "day", "Weekly": "week", "Monthly": "month"}
+    DATE_FORMAT = {"day": "%m/%d/%Y", "week": "week of %m/%d/%Y", "month": "%B %Y"}
+    # number of latest buckets shown in the table
+    MAX_ROWS = 12
+    # label of the chart selector -> chart type of charts.CHARTS
+    CHART_LABELS = {"Daily Hours": "driving_vs_resting_time", "Totals": "total_driving_vs_resting_time"}
+    CHART_HEIGHT = 300          # pixels
+    DEFAULT_CHART_WIDTH = 820   # pixels, used until the page has been laid out
+    # the preview is rendered at this resolution and stretched while the full one renders
+    PREVIEW_DPI = 30
+
+    def __init__(self, master, sql_manager : SqlManager):
         super().__init__(master)
+        self.sqlManager = sql_manager
+        self.load_task = None
+        self.chart_task = None
+        self.chart_image = None
+        self.chart_cache = ChartCache()
+        # data_version of the file when the shown data was read, None until the first load
+        self.loaded_version = None
+        self.refresh_pending = False
+        # set when the file changed while a load was running, the page is refreshed once it is done
+        self.dirty = False
+        # reload when entries are saved from another tab or process, once the page is shown again
+        self.sqlManager.add_listener(self.on_entries_changed)
+        self.bind("<Map>", lambda event: self.refresh())
 
         label = ctk.CTkLabel(
             self,
-            text="Analytics Page (Graphs Not Loaded Yet)",
+            text="Driving vs. Resting Time",
             font=ctk.CTkFont(size=16, weight="bold")
         )
-        label.pack(padx=20, pady=20)
+        label.pack(padx=20, pady=(20, 10))
+
+        self.period_selector = ctk.CTkSegmentedButton(
+            self,
+            values=list(self.PERIOD_LABELS),
+            command=lambda value: self.load_data()
+        )
+        self.period_selector.set("Daily")
+        self.period_selector.pack(padx=20, pady=(0, 10))
+
+        # placeholder until the data has been read in the background
+        self.summary_label = ctk.CTkLabel(self, text="Loading...")
+        self.summary_label.pack(padx=20, pady=(0, 10))
+        self.stats_label = ctk.CTkLabel(self, text="")
+        self.stats_label.pack(padx=20, pady=(0, 10))
+
+        self.chart_selector = ctk.CTkSegmentedButton(
+            self,
+            values=list(self.CHART_LABELS),
+            command=lambda value: self.load_chart()
+        )
+        self.chart_selector.set("Daily Hours")
+        self.chart_selector.pack(padx=20, pady=(0, 10))
+        self.chart_label = ctk.CTkLabel(self, text="", height=self.CHART_HEIGHT)
+        self.chart_label.pack(fill="x", padx=20, pady=(0, 10))
+
+        self.table = FormattedTextFrame(self, fg_color="transparent")
+        self.table.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        self.load_data()
+        self.load_chart()
+
+    def load_data(self):
+        # read on a worker thread with a reader of its own, the Tk thread keeps running
+        if self.load_task is not None:
+            self.load_task.cancel()
+        period = self.PERIOD_LABELS[self.period_selector.get()]
+        manager = self.sqlManager
+
+        def work():
+            reader = manager.open_reader()
+            try:
+                version = reader.data_version()
+                stats = None if log_stats is None else log_stats.summarize_range(reader)
+                return version, reader.get_totals(), aggregation.aggregate(reader, period), stats
+            finally:
+                reader.close()
+
+        self.summary_label.configure(text="Loading...")
+        self.load_task = run_in_background(self, work, lambda data: self.show_data(period, *data)
+                                           , on_error=self.on_load_error)
+
+    def refresh(self):
+        # reload the data and the chart if the file changed since they were read,
+        # the chart cache is keyed by data_version so an unchanged chart costs nothing
+        self.refresh_pending = False
+        if self.loaded_version is None or self.load_task is not None:
+            # the running load may have read the file before the change
+            self.dirty = True
+            return
+        if self.sqlManager.data_version() != self.loaded_version:
+            self.load_data()
+            self.load_chart()
+
+    def on_entries_changed(self, timestamps):
+        # a hidden page is refreshed when it is shown again, several saves in a row reload once
+        if self.winfo_ismapped() and not self.refresh_pending:
+            self.refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def show_data(self, period, version, totals, buckets, stats):
+        self.load_task = None
+        self.loaded_version = version
+        self.refresh_if_dirty()
+        if totals["entries"] == 0:
+            self.summary_label.configure(text="No entries yet")
+            self.stats_label.configure(text="")
+            self.table.remove_content()
+            return
+        self.summary_label.configure(text=(
+            f"{totals['entries']} entries from {totals['first']:%m/%d/%Y} to {totals['last']:%m/%d/%Y}\n"
+            f"Driving: {totals['drivetime']:.1f} h    Resting: {totals['resttime']:.1f} h"
+        ))
+        self.stats_label.configure(text=self.format_stats(stats))
+        rows = [["Period", "Entries", "Driving", "Resting", "Avg. Driving", "Avg. Resting", "Drive/Rest"]]
+        for b in reversed(buckets[-self.MAX_ROWS:]):
+            rows.append([
+                b.start.strftime(self.DATE_FORMAT[period]),
+                str(b.entries),
+                f"{b.drivetime:.1f} h",
+                f"{b.resttime:.1f} h",
+                f"{b.avg_drivetime:.1f} h",
+                f"{b.avg_resttime:.1f} h",
+                "-" if b.ratio is None else f"{b.ratio:.2f}",
+            ])
+        self.table.set(rows, [2, 1, 1, 1, 1, 1, 1])
+
+    def format_stats(self, stats):
+        if stats is None:
+            return ""
+        daily = stats["daily_drive_percentiles"]
+        text = f"Daily driving: median {daily[50]:.1f} h, 90th percentile {daily[90]:.1f} h"
+        if stats["latest_rolling_drive"] is not None:
+            text += f", last 7 days average {stats['latest_rolling_drive']:.1f} h"
+        if stats["ratio_percentiles"][50] is not None:
+            text += f"\nMedian drive/rest ratio: {stats['ratio_percentiles'][50]:.2f}"
+        return text
+
+    def load_chart(self):
+        # render on a worker thread: a low resolution preview first, then the full image.
+        # the Tk thread keeps running, so the user can switch tabs meanwhile
+        if self.chart_task is not None:
+            self.chart_task.cancel()
+            self.chart_task = None
+        if not charts.available() or Image is None or decimate is None:
+            self.chart_label.configure(text="Charts need matplotlib and Pillow")
+            return
+        chart = self.CHART_LABELS[self.chart_selector.get()]
+        width = self.chart_label.winfo_width()
+        if width <= 1:
+            width = self.DEFAULT_CHART_WIDTH
+        pixels = (width, self.CHART_HEIGHT)
+        self.chart_label.configure(text="Rendering chart...")
+        self.chart_task = run_in_background(
+            self, self.chart_work(chart, pixels, self.PREVIEW_DPI)
+            , lambda image: self.show_preview(chart, pixels, image), on_error=self.on_chart_error)
+
+    def chart_work(self, chart, pixels, dpi):
+        # function rendering the chart with a reader of its own and decoding it, run on a worker thread
+        manager = self.sqlManager
+        cache = self.chart_cache
+        size = (pixels[0] / charts.DEFAULT_DPI, pixels[1] / charts.DEFAULT_DPI)
+        # no more points than pixel columns in the image actually rendered, the preview draws fewer
+        max_points = decimate.target_points(size[0] * dpi)
+
+        def work():
+            reader = manager.open_reader()
+            try:
+                data = charts.render_cached(reader, cache, chart, size=size, dpi=dpi, max_points=max_points)
+            finally:
+                reader.close()
+            image = Image.open(io.BytesIO(data))
+            image.load()
+            return image
+
+        return work
+
+    def show_preview(self, chart, pixels, image):
+        self.show_chart(pixels, image)
+        self.chart_task = run_in_background(
+            self, self.chart_work(chart, pixels, charts.DEFAULT_DPI)
+            , lambda full: self.show_full_chart(pixels, full), on_error=self.on_chart_error)
+
+    def show_full_chart(self, pixels, image):
+        self.chart_task = None
+        self.show_chart(pixels, image)
+
+    def show_chart(self, pixels, image):
+        # CTkImage scales the image to pixels, keep a reference or Tk drops it
+        self.chart_image = ctk.CTkImage(light_image=image, dark_image=image, size=pixels)
+        self.chart_label.configure(image=self.chart_image, text="")
+
+    def on_chart_error(self, error):
+        self.chart_task = None
+        self.chart_label.configure(text="Could not render the chart")
+        print(f"Rendering chart failed: {error}")
+
+    def destroy(self):
+        if self.load_task is not None:
+            self.load_task.cancel()
+        if self.chart_task is not None:
+            self.chart_task.cancel()
+        self.sqlManager.remove_listener(self.on_entries_changed)
+        super().destroy()
+
+    def on_load_error(self, error):
+        self.load_task = None
+        self.summary_label.configure(text="Could not load the data")
+        print(f"Loading analytics failed: {error}")
+        self.refresh_if_dirty()
+
+    def refresh_if_dirty(self):
+        # a change that came during the load is picked up now, refresh() compares the versions
+        if self.dirty:
+            self.dirty = False
+            self.after_idle(self.refresh)
@@ -0,0 +1,67 @@
+import queue
+import threading
+
+class BackgroundTask:
+    """
+    Runs a function on a worker thread and hands its result back to the Tk main thread.
+    Tk widgets must only be touched from the main thread, so the worker puts its result in a queue
+    that the main thread polls with after(); on_done (or on_error) is then called on the main thread.
+    Work running on the worker must not use widgets or the main thread's SqlManager,
+    it should open its own reader with SqlManager.open_reader().
+
+    Attributes:
+        widget: the widget whose after() is used to poll, polling stops if it is destroyed
+        work: function called with no argument on the worker thread
+        on_done: function called with the result of work on the main thread
+        on_error: function called with the exception raised by work on the main thread, or None to print it
+        cancelled(bool): when True the result is dropped and no callback is called
+    """
+    POLL_MS = 30
+
+    def __init__(self, widget, work, on_done, on_error = None):
+        self.widget = widget
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+        self.results = queue.Queue(maxsize=1)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start the worker thread and begin polling for its result, returns the task."""
+        self.thread.start()
+        self.widget.after(self.POLL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        """Drop the result of the task, the worker thread itself runs to the end."""
+        self.cancelled = True
+
+    def _run(self):
+        try:
+            self.results.put((True, self.work()))
+        except Exception as e:
+            self.results.put((False, e))
+
+    def _poll(self):
+        if self.cancelled or not self.widget.winfo_exists():
+            return
+        try:
+            ok, value = self.results.get_nowait()
+        except queue.Empty:
+            self.widget.after(self.POLL_MS, self._poll)
+            return
+        if ok:
+            self.on_done(value)
+        elif self.on_error is not None:
+            self.on_error(value)
+        else:
+            print(f"Background task failed: {value}")
+
+
+def run_in_background(widget, work, on_done, on_error = None):
+    """
+    Run work on a worker thread and call on_done with its result on the Tk main thread.
+    Returns: the started BackgroundTask
+    """
+    return BackgroundTask(widget, work, on_done, on_error).start()
@@ -0,0 +1,67 @@
+"""
+Tests of SqlManager.batch(): one transaction for the outermost scope, listeners called only once it commits.
+Run with: python -m pytest batch_test.py
+"""
+import datetime as dt
+
+import pytest
+
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+T1 = dt.datetime(2025, 3, 1, 8, 0)
+T2 = dt.datetime(2025, 3, 2, 8, 0)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def calls(manager):
+    calls = []
+    manager.add_listener(calls.append)
+    return calls
+
+
+def test_write_outside_batch_notifies_right_away(manager, calls):
+    manager.add_entry(LogEntry(T1, 1, 2))
+    assert calls == [[T1]]
+
+
+def test_listeners_wait_for_outermost_scope(manager, calls):
+    with manager.batch():
+        manager.add_entry(LogEntry(T1, 1, 2))
+        with manager.batch():
+            manager.add_entry(LogEntry(T2, 1, 2))
+            manager.update_entry(T2, LogEntry(T2, 3, 4))
+        assert calls == []
+    assert calls == [[T1, T2]]
+    assert manager.count_entries() == 2
+
+
+def test_rolled_back_batch_notifies_nobody(manager, calls):
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.add_entry(LogEntry(T1, 1, 2))
+            raise RuntimeError("abort")
+    assert calls == []
+    assert manager.count_entries() == 0
+    # keys of the rolled back scope are not passed with the next write either
+    manager.add_entry(LogEntry(T2, 1, 2))
+    assert calls == [[T2]]
+
+
+def test_inner_exception_caught_commits_with_outer_scope(manager, calls):
+    with manager.batch():
+        try:
+            with manager.batch():
+                manager.add_entry(LogEntry(T1, 1, 2))
+                raise RuntimeError("inner")
+        except RuntimeError:
+            pass
+    assert calls == [[T1]]
+    assert manager.count_entries() == 1
@@ -0,0 +1,160 @@
+import collections
+import hashlib
+import os
+import pathlib
+import threading
+from sql_manager import SqlManager
+
+class ChartCache:
+    """
+    A cache of rendered charts (PNG bytes), kept in memory and on disk.
+    Charts are keyed by the database file, the chart type and its options, the date range and the
+    data version of the file, so any write to the file makes its older charts unreachable
+    and an unchanged chart is loaded without rendering it again, even after a restart.
+    Both levels are bounded: the memory level by a number of charts, the disk level by a total size,
+    and both evict the least recently used charts first.
+    The cache can be shared by worker threads, the memory level is guarded by a lock.
+
+    Attributes:
+        directory(pathlib.Path): folder holding the cached PNG files
+        capacity(int): maximum number of charts kept in memory
+        max_disk_bytes(int): maximum total size of the PNG files kept in directory
+        charts(OrderedDict): key -> PNG bytes, least recently used first
+        hits(int): number of get() calls answered from memory or disk
+        misses(int): number of get() calls that found nothing
+    """
+    DEFAULT_DIRECTORY = "chart_cache"
+    DEFAULT_CAPACITY = 32
+    DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024
+    SUFFIX = ".png"
+
+    def __init__(self, directory = DEFAULT_DIRECTORY, capacity = DEFAULT_CAPACITY
+                 , max_disk_bytes = DEFAULT_MAX_DISK_BYTES):
+        self.directory = pathlib.Path(directory)
+        self.capacity = capacity
+        self.max_disk_bytes = max_disk_bytes
+        self.charts = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(sql_manager : SqlManager, chart, start = None, end = None, options = ()):
+        """
+        Build the key of a chart of the file of sql_manager at its current data version.
+        Args:
+            chart: name of the chart type
+            start, end: bounds of the date range, None for no bound
+            options: anything else the image depends on (size, resolution, ...), must have a stable repr
+        Returns: the key (str), usable as a file name
+        """
+        parts = (os.path.abspath(sql_manager.filename), chart, sql_manager.key_range(start, end)
+                 , sql_manager.data_version(), options)
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Get a chart, from memory first and then from disk.
+        Returns: the PNG bytes, or None if the chart is not cached
+        """
+        with self.lock:
+            data = self.charts.get(key)
+            if data is not None:
+                self.charts.move_to_end(key)
+                self.hits += 1
+                return data
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # the modification time orders the files for eviction
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """
+        Store the PNG bytes of a chart in memory and on disk, evicting the least recently used charts
+        if either level is full. Failing to write the file only loses the disk copy.
+        """
+        self._remember(key, data)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # write then rename, so a reader never sees half a file
+            tmp = self._path(key).with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            print(f"Could not write the chart cache: {e}")
+            return
+        self._evict_files()
+
+    def get_or_render(self, key, render):
+        """
+        Get a chart, calling render() to produce its PNG bytes and storing them if it is not cached.
+        """
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        """Drop every chart from memory and disk, the hit and miss counters are kept."""
+        with self.lock:
+            self.charts.clear()
+        for path in self.directory.glob("*" + self.SUFFIX):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        """
+        Returns:
+            A dictionary with the hits, misses, number of charts in memory and on disk and the bytes on disk
+        """
+        files = self._files()
+        return {"hits": self.hits, "misses": self.misses, "memory": len(self.charts)
+                , "files": len(files), "disk_bytes": sum(size for _, size, _ in files)}
+
+    def _path(self, key):
+        """helper method giving the file of a key"""
+        return self.directory / (key + self.SUFFIX)
+
+    def _remember(self, key, data):
+        """helper method storing a chart in memory, evicting the least recently used one if it is full"""
+        with self.lock:
+            self.charts[key] = data
+            self.charts.move_to_end(key)
+            if len(self.charts) > self.capacity:
+                self.charts.popitem(last=False)
+
+    def _files(self):
+        """helper method listing the cached files as (modification time, size, path)"""
+        files = []
+        for path in self.directory.glob("*" + self.SUFFIX):
+            try:
+                info = path.stat()
+            except OSError:  # removed by another process meanwhile
+                continue
+            files.append((info.st_mtime, info.st_size, path))
+        return files
+
+    def _evict_files(self):
+        """helper method removing the least recently used files until they fit in max_disk_bytes"""
+        files = sorted(self._files(), key=lambda f: f[0])
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,126 @@
+"""
+Renders the Analytics charts to PNG bytes with matplotlib's Agg backend.
+Figures are created directly rather than through pyplot, so rendering keeps no global state
+and does not need a display, which lets worker threads render while Tk keeps running.
+"""
+import io
+import threading
+from sql_manager import SqlManager
+from chart_cache import ChartCache
+import aggregation
+try:
+    from matplotlib.figure import Figure
+    # matplotlib needs numpy, so it is there as well
+    import numpy as np
+    import decimate
+except ImportError: # charts need matplotlib, the rest of the application does not
+    Figure = None
+
+# chart type -> title, named like the files in exports/
+CHARTS = {
+    "driving_vs_resting_time": "Driving vs Resting Time",
+    "total_driving_vs_resting_time": "Total Driving vs Resting Time",
+}
+DEFAULT_SIZE = (8.2, 3.0)   # inches
+DEFAULT_DPI = 100
+DRIVE_COLOR = "#1f6aa5"
+REST_COLOR = "#2fa572"
+# matplotlib does not promise thread safety, renders from several workers run one at a time
+_render_lock = threading.Lock()
+
+
+def available():
+    """Returns: whether matplotlib is installed, charts can not be rendered otherwise"""
+    return Figure is not None
+
+
+def render(sql_manager : SqlManager, chart, start = None, end = None, size = DEFAULT_SIZE, dpi = DEFAULT_DPI
+           , max_points = None, method = "lttb"):
+    """
+    Render a chart of the entries between start and end.
+    Series longer than max_points are decimated before they are drawn, so the drawing time
+    is bounded by the size of the image rather than the length of the range.
+    Args:
+        sql_manager: manager of the database to read, a reader works as well
+        chart: one of CHARTS
+        start, end: (default to None, no bound) same bounds as SqlManager.iter_range()
+        size: (default to DEFAULT_SIZE) width and height of the image, in inches
+        dpi: (default to DEFAULT_DPI) pixels per inch
+        max_points: (default to None, the width of the image in pixels) most points drawn per series
+        method: (default to "lttb") one of decimate.METHODS
+    Returns:
+        The PNG image as bytes
+    Raises:
+        ValueError: if chart is not one of CHARTS
+        RuntimeError: if matplotlib is not installed
+    """
+    if chart not in CHARTS:
+        raise ValueError(f"Unknown chart {chart!r}, expected one of {list(CHARTS)}")
+    if Figure is None:
+        raise RuntimeError("matplotlib is needed to render charts")
+    if chart == "driving_vs_resting_time":
+        data = aggregation.aggregate(sql_manager, "day", start, end)
+    else:
+        data = sql_manager.get_totals(start, end)
+    buffer = io.BytesIO()
+    with _render_lock:
+        fig = Figure(figsize=size, dpi=dpi, layout="tight")
+        ax = fig.add_subplot()
+        ax.set_title(CHARTS[chart])
+        if chart == "driving_vs_resting_time":
+            if max_points is None:
+                max_points = decimate.target_points(size[0] * dpi)
+            _draw_daily(ax, data, max_points, method)
+        else:
+            _draw_totals(ax, data)
+        fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def render_cached(sql_manager : SqlManager, cache : ChartCache, chart, start = None, end = None
+                  , size = DEFAULT_SIZE, dpi = DEFAULT_DPI, max_points = None, method = "lttb"):
+    """
+    Same as render(), but answered from cache when the chart was already rendered
+    for the same file, range and options at the current data version of the file.
+    """
+    key = cache.make_key(sql_manager, chart, start, end, (tuple(size), dpi, max_points, method))
+    return cache.get_or_render(key, lambda: render(sql_manager, chart, start, end, size, dpi, max_points, method))
+
+
+def export(sql_manager : SqlManager, chart, filename, start = None, end = None
+           , size = DEFAULT_SIZE, dpi = DEFAULT_DPI, cache : ChartCache = None):
+    """
+    Render a chart, through cache if one is given, and write it to the PNG file filename.
+    """
+    if cache is None:
+        data = render(sql_manager, chart, start, end, size, dpi)
+    else:
+        data = render_cached(sql_manager, cache, chart, start, end, size, dpi)
+    with open(filename, "wb") as file:
+        file.write(data)
+
+
+def _draw_daily(ax, buckets, max_points, method):
+    """helper function plotting the drive and rest totals of every day, each decimated to max_points"""
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Hours")
+    if not buckets:
+        ax.text(0.5, 0.5, "No entries in this range", ha="center", va="center", transform=ax.transAxes)
+        return
+    days = np.array([b.start for b in buckets], dtype="datetime64[D]")
+    x = days.astype(np.int64)
+    for label, color, values in (("Driving", DRIVE_COLOR, [b.drivetime for b in buckets])
+                                 , ("Resting", REST_COLOR, [b.resttime for b in buckets])):
+        values = np.asarray(values)
+        kept = decimate.decimate(x, values, max_points, method)
+        ax.plot(days[kept], values[kept], color=color, label=label)
+    ax.legend(loc="upper left")
+    ax.figure.autofmt_xdate()
+
+
+def _draw_totals(ax, totals):
+    """helper function drawing the total drive and rest times as two bars"""
+    ax.set_ylabel("Total Hours")
+    bars = ax.bar(["Driving", "Resting"], [totals["drivetime"], totals["resttime"]]
+                  , color=[DRIVE_COLOR, REST_COLOR])
+    ax.bar_label(bars, fmt="%.1f h")
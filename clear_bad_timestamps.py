@@ -1,37 +1,39 @@
 # clear_bad_timestamps.py
-# Deletes any logs in the database with improperly formatted timestamps
-# Helps prevent app crashes due to date parsing
-
-import sqlite3
-import datetime
-
-# Define the correct format used throughout the app
-EXPECTED_FORMAT = "%m/%d/%Y %H:%M"
-
-# Connect to the temp database (update if your filename is different)
-conn = sqlite3.connect("temp.db")
-cur = conn.cursor()
-
-# Grab all timestamps from the logs table
-cur.execute("SELECT timestamp FROM logs")
-rows = cur.fetchall()
-
-bad_rows = []
-
-# Check each timestamp format
-for r in rows:
-    ts = r[0]
-    try:
-        datetime.datetime.strptime(ts, EXPECTED_FORMAT)
-    except ValueError:
-        bad_rows.append((ts,))
-
-# Delete rows with bad timestamps
-if bad_rows:
-    cur.executemany("DELETE FROM logs WHERE timestamp = ?", bad_rows)
-    conn.commit()
-    print(f"Deleted {len(bad_rows)} bad log(s) with incorrect timestamp format.")
-else:
-    print("No formatting issues found. Database is clean.")
-
-conn.close()
+# Kept for existing habits, integrity_scan.py does the work:
+#     python clear_bad_timestamps.py temp.db
+# is the same as
+#     python integrity_scan.py temp.db --mode quarantine
+# Moves the logs with malformed timestamps, impossible hours or duplicates of the database
+# (temp.db when no file is given) to its logs_quarantine table, where they can be checked and put back.
+# Helps prevent app crashes due to bad rows. --mode dry-run only reports them, --mode repair deletes
+# the logs whose timestamp can not be read instead of moving them.
+# Files of an older schema are migrated first, which moves unreadable or duplicate timestamps to logs_quarantine.
+
+import argparse
+
+import integrity_scan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Set aside the bad logs of user databases, see integrity_scan.py.")
+    parser.add_argument("files", nargs="*", default=["temp.db"], help="sqlite database files, temp.db by default")
+    parser.add_argument("--mode", choices=integrity_scan.MODES, default="quarantine"
+                        , help="dry-run only reports, quarantine (the default) moves bad logs to logs_quarantine, "
+                               "repair deletes the logs whose timestamp can not be read and moves the others")
+    args = parser.parse_args()
+
+    for report in integrity_scan.scan_files(args.files, args.mode):
+        if report.error is not None:
+            print(f"{report.filename}: {report}")
+            continue
+        if report.migrated_from is not None:
+            print(f"{report.filename}: migrated from schema {report.migrated_from}, "
+                  f"{report.migration_quarantined} unreadable or duplicate log(s) moved to logs_quarantine.")
+        bad = sum(count for issue, count in report.issues.items() if integrity_scan.ISSUES[issue] is not None)
+        if args.mode == "dry-run" and bad:
+            print(f"{report.filename}: found {bad} bad log(s), nothing changed.")
+        if report.removed > report.deleted:
+            print(f"{report.filename}: moved {report.removed - report.deleted} bad log(s) to logs_quarantine.")
+        if report.deleted:
+            print(f"{report.filename}: deleted {report.deleted} log(s) whose timestamp could not be read.")
+        if not bad and report.migrated_from is None:
+            print(f"{report.filename}: no issues found. Database is clean.")
@@ -0,0 +1,260 @@
+import bisect
+import collections
+import datetime as dt
+import timestamp_codec
+from sql_manager import SqlManager
+
+class Rules:
+    """
+    Hours-of-service limits checked by the ComplianceTracker.
+    Each entry counts its driving time at its timestamp, and its resting time as the rest
+    taken before the next entry. When the next entry comes later than the entry's driving time
+    and logged rest account for, the whole gap off duty counts as rest.
+
+    Attributes:
+        max_drive(float): most driving hours allowed in any window of drive_window_hours
+        drive_window_hours(float): length of the rolling driving window, in hours
+        max_cycle_drive(float): most driving hours allowed in any window of cycle_days
+        cycle_days(int): length of the rolling cycle, in days
+        min_rest(float): fewest resting hours required between two entries
+    """
+    def __init__(self, max_drive = 11, drive_window_hours = 24, max_cycle_drive = 70, cycle_days = 8
+                 , min_rest = 10):
+        self.max_drive = max_drive
+        self.drive_window_hours = drive_window_hours
+        self.max_cycle_drive = max_cycle_drive
+        self.cycle_days = cycle_days
+        self.min_rest = min_rest
+
+# the two US property-carrying cycles
+US_60_7 = Rules(max_cycle_drive=60, cycle_days=7)
+US_70_8 = Rules(max_cycle_drive=70, cycle_days=8)
+
+
+class Violation:
+    """
+    One broken rule.
+
+    Attributes:
+        rule(str): "drive" (rolling driving window), "cycle" (rolling cycle) or "rest" (rest before the entry)
+        timestamp(datetime.datetime): timestamp of the entry at which the rule is broken
+        hours(float): driving hours in the window, or resting hours before the entry
+        limit(float): the limit of the rule
+    """
+    DESCRIPTIONS = {
+        "drive": "{hours:.1f} h driving in the window ending {timestamp} (limit {limit:g} h)",
+        "cycle": "{hours:.1f} h driving in the cycle ending {timestamp} (limit {limit:g} h)",
+        "rest": "only {hours:.1f} h rest before {timestamp} (at least {limit:g} h)",
+    }
+
+    def __init__(self, rule, timestamp, hours, limit):
+        self.rule = rule
+        self.timestamp = timestamp
+        self.hours = hours
+        self.limit = limit
+
+    def __str__(self):
+        return self.DESCRIPTIONS[self.rule].format(hours=self.hours, limit=self.limit
+                                                   , timestamp=timestamp_codec.format_datetime(self.timestamp))
+
+    def __repr__(self):
+        return f"Violation({self.rule!r}, {self.timestamp!r}, {self.hours!r}, {self.limit!r})"
+
+
+class ComplianceTracker:
+    """
+    Evaluates the Rules over entries kept in timestamp order.
+    For every entry the tracker keeps the driving total of the rolling window and of the rolling cycle
+    ending at it. Loading computes them with sliding windows in one pass, and adding or removing an entry
+    only updates the windows that contain it, so a new entry costs the size of a window, not of the history.
+    attach() keeps the tracker in sync with the writes made through a SqlManager.
+
+    Attributes:
+        rules(Rules): the limits checked
+        keys(list): timestamps of the entries as minutes since SqlManager.EPOCH, sorted
+        drives, rests(list): driving and resting hours of the entries, in the same order
+        window_sums, cycle_sums(list): driving hours of the rolling window and cycle ending at each entry
+        violations(dict): (rule, key) -> Violation for every broken rule
+    """
+    # sums are updated by adding and subtracting, so allow for rounding
+    EPSILON = 1e-9
+
+    def __init__(self, rules : Rules = US_70_8):
+        self.rules = rules
+        self.window = int(rules.drive_window_hours * 60)
+        self.cycle = int(rules.cycle_days * 1440)
+        self.keys = []
+        self.drives = []
+        self.rests = []
+        self.window_sums = []
+        self.cycle_sums = []
+        self.violations = {}
+        self.sqlManager = None
+
+    @classmethod
+    def from_manager(cls, sql_manager : SqlManager, rules : Rules = US_70_8):
+        """Create a tracker loaded with every entry of sql_manager, read in timestamp order."""
+        tracker = cls(rules)
+        tracker.load(sql_manager.iter_range(raw=True))
+        return tracker
+
+    def load(self, rows):
+        """
+        Replace the entries of the tracker with rows (key, drivetime, resttime) sorted by key,
+        for example SqlManager.iter_range(raw=True), evaluating every window in a single pass.
+        """
+        for column in (self.keys, self.drives, self.rests, self.window_sums, self.cycle_sums):
+            column.clear()
+        self.violations.clear()
+        window = collections.deque()
+        cycle = collections.deque()
+        window_sum = 0.0
+        cycle_sum = 0.0
+        for key, drive, rest in rows:
+            drive = drive or 0.0
+            window.append((key, drive))
+            cycle.append((key, drive))
+            window_sum += drive
+            cycle_sum += drive
+            # drop the entries that left the windows ending at key
+            while window[0][0] <= key - self.window:
+                window_sum -= window.popleft()[1]
+            while cycle[0][0] <= key - self.cycle:
+                cycle_sum -= cycle.popleft()[1]
+            self.keys.append(key)
+            self.drives.append(drive)
+            self.rests.append(rest or 0.0)
+            self.window_sums.append(window_sum)
+            self.cycle_sums.append(cycle_sum)
+            index = len(self.keys) - 1
+            self._check_drive(index)
+            self._check_rest(index)
+
+    def attach(self, sql_manager : SqlManager):
+        """Follow the writes made through sql_manager, re-evaluating only the windows they touch."""
+        self.detach()
+        self.sqlManager = sql_manager
+        sql_manager.add_listener(self.on_change)
+
+    def detach(self):
+        """Stop following the manager given to attach()."""
+        if self.sqlManager is not None:
+            self.sqlManager.remove_listener(self.on_change)
+            self.sqlManager = None
+
+    def on_change(self, timestamps):
+        """Listener of the attached manager: reload the entries stored at the changed timestamps."""
+        for timestamp in timestamps:
+            key = self.sqlManager.to_key(timestamp)
+            self.remove(key)
+            entry = self.sqlManager.get_entry(timestamp)
+            if entry is not None:
+                self.add(key, entry.drivetime, entry.resttime)
+
+    def add(self, key, drive, rest):
+        """Add an entry (replacing the one at the same key) and re-evaluate the windows containing it."""
+        self.remove(key)
+        drive = drive or 0.0
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.drives.insert(index, drive)
+        self.rests.insert(index, rest or 0.0)
+        self.window_sums.insert(index, self._sum_before(index, self.window))
+        self.cycle_sums.insert(index, self._sum_before(index, self.cycle))
+        self._shift_sums(index, drive)
+        self._check_drive(index)
+        self._check_rest(index)
+        self._check_rest(index + 1)
+
+    def remove(self, key):
+        """Remove the entry at key, if any, and re-evaluate the windows that contained it."""
+        index = bisect.bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return
+        self._shift_sums(index, -self.drives[index])
+        for rule in ("drive", "cycle", "rest"):
+            self.violations.pop((rule, key), None)
+        for column in (self.keys, self.drives, self.rests, self.window_sums, self.cycle_sums):
+            del column[index]
+        self._check_rest(index)
+
+    def get_violations(self, start = None, end = None):
+        """
+        Returns: the list of Violation at entries between the datetimes start and end
+        (None for no bound), ordered by timestamp
+        """
+        result = []
+        for (rule, key), violation in self.violations.items():
+            if (start is None or violation.timestamp >= start) and (end is None or violation.timestamp <= end):
+                result.append(violation)
+        return sorted(result, key=lambda v: (v.timestamp, v.rule))
+
+    def violations_at(self, timestamp : dt.datetime):
+        """Returns: the list of Violation at the entry stored at timestamp"""
+        key = SqlManager.to_key(timestamp)
+        return [self.violations[(rule, key)] for rule in ("drive", "cycle", "rest") if (rule, key) in self.violations]
+
+    def remaining(self, at : dt.datetime):
+        """
+        Compute how many driving hours are left at a time, given the entries up to it.
+        Returns:
+            A dictionary with the hours left in the rolling "window", in the rolling "cycle",
+            and "available": the smaller of both, never below 0
+        """
+        key = SqlManager.to_key(at)
+        end = bisect.bisect_right(self.keys, key)
+        window = self.rules.max_drive - self._sum_range(key - self.window, end)
+        cycle = self.rules.max_cycle_drive - self._sum_range(key - self.cycle, end)
+        return {"window": window, "cycle": cycle, "available": max(0.0, min(window, cycle))}
+
+    def _sum_range(self, after_key, end):
+        """helper method summing the driving hours of the entries after after_key and before index end"""
+        return sum(self.drives[bisect.bisect_right(self.keys, after_key):end])
+
+    def _sum_before(self, index, length):
+        """helper method summing the driving hours of the window of length minutes ending at index"""
+        return self._sum_range(self.keys[index] - length, index + 1)
+
+    def _shift_sums(self, index, delta):
+        """
+        helper method adding delta driving hours to the windows of the entries after index
+        that contain the entry at index, then re-checking them.
+        """
+        key = self.keys[index]
+        window_end = bisect.bisect_left(self.keys, key + self.window, index + 1)
+        cycle_end = bisect.bisect_left(self.keys, key + self.cycle, index + 1)
+        for j in range(index + 1, window_end):
+            self.window_sums[j] += delta
+        for j in range(index + 1, cycle_end):
+            self.cycle_sums[j] += delta
+        for j in range(index + 1, max(window_end, cycle_end)):
+            self._check_drive(j)
+
+    def _check_drive(self, index):
+        """helper method recording or clearing the driving violations of the entry at index"""
+        key = self.keys[index]
+        timestamp = SqlManager.to_timestamp(key)
+        for rule, total, limit in (("drive", self.window_sums[index], self.rules.max_drive)
+                                   , ("cycle", self.cycle_sums[index], self.rules.max_cycle_drive)):
+            if total > limit + self.EPSILON:
+                self.violations[(rule, key)] = Violation(rule, timestamp, total, limit)
+            else:
+                self.violations.pop((rule, key), None)
+
+    def _check_rest(self, index):
+        """helper method recording or clearing the rest violation of the entry at index"""
+        if index >= len(self.keys):
+            return
+        if index == 0:
+            # the first entry has no rest before it, it may have had one before the entry ahead was removed
+            self.violations.pop(("rest", self.keys[0]), None)
+            return
+        key = self.keys[index]
+        # time between the entries not spent driving, an entry logged days later had that much rest
+        gap = (key - self.keys[index - 1]) / 60 - self.drives[index - 1]
+        rest = max(self.rests[index - 1], gap)
+        if rest < self.rules.min_rest - self.EPSILON:
+            self.violations[("rest", key)] = Violation("rest", SqlManager.to_timestamp(key)
+                                                       , rest, self.rules.min_rest)
+        else:
+            self.violations.pop(("rest", key), None)
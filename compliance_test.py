@@ -0,0 +1,65 @@
+"""
+Tests that the incremental updates of ComplianceTracker agree with a full evaluation of the same entries.
+Run with: python -m pytest compliance_test.py
+"""
+import random
+
+import pytest
+
+from compliance import ComplianceTracker, US_60_7, US_70_8
+
+
+def full_evaluation(tracker):
+    """Returns: the violations of a tracker loaded from scratch with the entries of tracker"""
+    fresh = ComplianceTracker(tracker.rules)
+    fresh.load(zip(list(tracker.keys), list(tracker.drives), list(tracker.rests)))
+    return fresh
+
+
+def assert_same(tracker):
+    fresh = full_evaluation(tracker)
+    assert set(tracker.violations) == set(fresh.violations)
+    for name in ("window_sums", "cycle_sums"):
+        assert getattr(tracker, name) == pytest.approx(getattr(fresh, name))
+
+
+def test_removing_first_entry_clears_rest_violation():
+    tracker = ComplianceTracker()
+    tracker.add(0, 1, 2)
+    tracker.add(600, 1, 2)
+    assert ("rest", 600) in tracker.violations
+    tracker.remove(0)
+    assert ("rest", 600) not in tracker.violations
+    assert_same(tracker)
+
+
+def test_gap_between_entries_counts_as_rest():
+    tracker = ComplianceTracker()
+    # 2 h logged rest, but the next entry is three days later
+    tracker.add(0, 8, 2)
+    tracker.add(3 * 1440, 8, 2)
+    assert ("rest", 3 * 1440) not in tracker.violations
+    # 8 h driving and 2 h rest 12 h apart leave only 4 h off duty
+    tracker.add(3 * 1440 + 12 * 60, 8, 10)
+    violation = tracker.violations[("rest", 3 * 1440 + 12 * 60)]
+    assert violation.hours == pytest.approx(4)
+    assert_same(tracker)
+
+
+@pytest.mark.parametrize("rules", [US_70_8, US_60_7])
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_matches_full_evaluation(rules, seed):
+    rng = random.Random(seed)
+    tracker = ComplianceTracker(rules)
+    keys = []
+    for _ in range(300):
+        if keys and rng.random() < 0.35:
+            key = keys.pop(rng.randrange(len(keys)))
+            tracker.remove(key)
+        else:
+            # a few weeks of entries, close enough for the windows and rests to matter
+            key = rng.randrange(0, 30 * 1440, 15)
+            if key not in keys:
+                keys.append(key)
+            tracker.add(key, rng.choice([0, 2, 5.5, 8, 11]), rng.choice([0, 4, 8, 10, 12]))
+        assert_same(tracker)
@@ -1,6 +1,7 @@
 import datetime
-import re
-FORMAT_STR = "%m/%d/%Y %H:%M"
+import timestamp_codec
+import validation
+FORMAT_STR = timestamp_codec.FORMAT_STR
 
 def str_to_datetime(s: str):
     """ 
@@ -11,7 +12,7 @@ def str_to_datetime(s: str):
     Returns:
         datetime: result datetime object
     """
-    return datetime.datetime.strptime(s, FORMAT_STR)
+    return timestamp_codec.parse_datetime(s, FORMAT_STR)
 
 
 def datetime_to_str(d: datetime.datetime):
@@ -23,22 +24,16 @@ def datetime_to_str(d: datetime.datetime):
     Returns:
         string: fomatted string
     """
-    return d.strftime(FORMAT_STR)
+    return timestamp_codec.format_datetime(d)
 
 def checkDate(date):
-    form = re.compile("^[0-1][0-9]/[0-3][0-9]/[0-9]{4}$") #is establishing the xxxx/xx/xx format
-    if form.match(date): #checks if the date matches the given format
-        return True
-    else:
-        return False
+    #checks that the date is a real date in the MM/DD/YYYY format
+    return validation.check_date(date) == validation.OK
 
 
 def checkTime(time):
-    form = re.compile("^[0-2][0-9]:[0-6][0-9]$")# is establishing the time format xx:xx
-    if form.match(time):
-        return True
-    else:
-        return False
+    #checks that the time is a real time in the HH:MM format
+    return validation.check_time(time) == validation.OK
     
 def checkTimeInputs(input):
     if isinstance(input,(int,float)): #checks whether the resting time or driving time is a float or a integer 
@@ -1,25 +1,24 @@
 import customtkinter as ctk
-import sqlite3
 from time import strftime
 
-import custom_methods
+import validation
 from log_entry   import LogEntry
 from sql_manager import SqlManager
+from background  import run_in_background
+from compliance  import ComplianceTracker
 from tkinter import messagebox
 
 
 class DailyLog(ctk.CTkFrame):
-    def __init__(self, master, filename):
+    def __init__(self, master, sql_manager : SqlManager):
         super().__init__(master)
-        self.filename = filename
-
-        # try to hook up to sqlite db file
-        try:
-            self.con = sqlite3.connect(filename)
-            self.cur = self.con.cursor()
-        except Exception:
-            print(f"ugh, couldn’t open DB: {filename}")
-            return
+        # shared manager owned by the FileManager, do not close it here
+        self.sqlManager = sql_manager
+        # hours-of-service checks, loaded in the background, None until then
+        self.compliance = None
+        self.pending_changes = []
+        self.sqlManager.add_listener(self.pending_changes.extend)
+        self._load_compliance()
 
         # main grid: 2 equal columns
         self.grid_columnconfigure((0, 1), weight=1, uniform="col")
@@ -112,29 +111,78 @@ class DailyLog(ctk.CTkFrame):
         dt = self.dt_entry.get()
         rt = self.rt_entry.get()
 
-        # check time format
-        if not custom_methods.checkTime(t):
-            messagebox.showerror("Invalid Time", "Please enter time as HH:MM")
+        # check time format and range
+        error = validation.check_time(t)
+        if error:
+            messagebox.showerror("Invalid Time", f"Please enter time as HH:MM ({validation.message(error)})")
             return False
 
-        # check date format
-        if not custom_methods.checkDate(d):
-            messagebox.showerror("Invalid Date", "Please enter date as MM/DD/YYYY")
+        # check date format and range
+        error = validation.check_date(d)
+        if error:
+            messagebox.showerror("Invalid Date", f"Please enter date as MM/DD/YYYY ({validation.message(error)})")
             return False
 
         # check numeric inputs
-        try:
-            float(dt)
-            float(rt)
-        except ValueError:
-            # change the title/text to your custom time‑format message
-            messagebox.showerror("Invalid Time", "Please enter time as HH:MM")
+        if not (validation.check_hours(dt) and validation.check_hours(rt, validation.MAX_REST_HOURS)):
+            messagebox.showerror("Invalid Hours", f"Please enter driving time as hours between 0 and "
+                                 f"{validation.MAX_HOURS:g} and resting time as hours between 0 and "
+                                 f"{validation.MAX_REST_HOURS:g}")
             return False
 
         return True
 
 
 
+    def _load_compliance(self):
+        # evaluate the whole history on a worker thread with a reader of its own,
+        # the writes made meanwhile are kept in pending_changes and replayed once it is loaded
+        manager = self.sqlManager
+
+        def work():
+            reader = manager.open_reader()
+            try:
+                return ComplianceTracker.from_manager(reader)
+            finally:
+                reader.close()
+
+        run_in_background(self, work, self._on_compliance_loaded, on_error=self._on_compliance_error)
+
+
+    def _on_compliance_loaded(self, tracker):
+        self.sqlManager.remove_listener(self.pending_changes.extend)
+        tracker.attach(self.sqlManager)
+        tracker.on_change(self.pending_changes)
+        self.pending_changes.clear()
+        self.compliance = tracker
+
+
+    def _on_compliance_error(self, error):
+        self.sqlManager.remove_listener(self.pending_changes.extend)
+        print(f"Loading the hours-of-service checks failed: {error}")
+
+
+    def _compliance_message(self, entry):
+        # warning text for the rules broken at entry, None if there are none (or no tracker yet)
+        if self.compliance is None:
+            return None
+        violations = self.compliance.violations_at(entry.timestamp)
+        if not violations:
+            return None
+        lines = [str(v) for v in violations]
+        available = self.compliance.remaining(entry.timestamp)["available"]
+        lines.append(f"Driving time left: {available:.1f} h")
+        return "\n".join(lines)
+
+
+    def destroy(self):
+        if self.compliance is not None:
+            self.compliance.detach()
+        else:
+            self.sqlManager.remove_listener(self.pending_changes.extend)
+        super().destroy()
+
+
     def _on_save(self):
         # do nothing if validation fails
         if not self._validate_inputs():
@@ -147,12 +195,17 @@ class DailyLog(ctk.CTkFrame):
             drivetime=float(self.dt_entry.get()),
             resttime=float(self.rt_entry.get())
         )
-        SqlManager(self.filename).add_entry(entry)
-
-        messagebox.showinfo(
-            "Your data was saved","Saved",
-            parent=self.master  
-     )
+        # the attached tracker re-evaluates the windows around the new entry
+        self.sqlManager.add_entry(entry)
+
+        warning = self._compliance_message(entry)
+        if warning is None:
+            messagebox.showinfo(
+                "Your data was saved","Saved",
+                parent=self.master  
+         )
+        else:
+            messagebox.showwarning("Saved, hours-of-service limits exceeded", warning, parent=self.master)
             
 
         # clear fields for next entry
@@ -0,0 +1,97 @@
+"""
+Downsampling of long time series before they are drawn.
+A chart can not show more points than it has pixel columns, so series longer than that are reduced
+to a target number of points chosen to keep their visual shape. Drawing then costs the width of the
+chart, whatever the length of the selected history.
+Every function returns the indices of the kept points, in order, so several columns sharing the same
+x values can be reduced together.
+"""
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def target_points(pixel_width, points_per_pixel = 1, minimum = 3):
+    """
+    Returns: the number of points worth drawing on a chart pixel_width pixels wide
+    """
+    return max(minimum, int(pixel_width * points_per_pixel))
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    The first and last points are kept, the others are split in threshold - 2 buckets of consecutive
+    points and from each bucket the point forming the largest triangle with the point kept from the
+    previous bucket and the average of the next bucket is kept.
+    Args:
+        x, y: arrays of the same length, x sorted
+        threshold: number of points to keep
+    Returns:
+        An array of the indices of the kept points, every index if there are no more than threshold points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # the next bucket of the last one is the last point
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        # twice the area of the triangles (a, candidate, next average), computed for the whole bucket
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def min_max(x, y, buckets):
+    """
+    Keep the lowest and highest point of each of buckets equal slices of the x range, plus the first
+    and last points, so that every peak of the series stays visible.
+    Args:
+        x, y: arrays of the same length, x sorted
+        buckets: number of slices, usually the pixel width of the chart
+    Returns:
+        An array of the indices of the kept points (at most 2 * buckets + 2), sorted
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 2 * buckets + 2 or buckets < 1:
+        return np.arange(n)
+    span = x[-1] - x[0]
+    if span <= 0:
+        bucket = np.zeros(n, dtype=np.int64)
+    else:
+        bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1)
+    # order by bucket then by y: the first point of each bucket is its minimum, the last its maximum
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    ends = np.r_[starts[1:] - 1, n - 1]
+    return np.unique(np.concatenate(([0, n - 1], order[starts], order[ends])))
+
+
+def decimate(x, y, target, method = "lttb"):
+    """
+    Reduce a series to about target points with one of METHODS.
+    For "minmax", target is the number of points, so target // 2 buckets are used.
+    Returns:
+        An array of the indices of the kept points
+    Raises:
+        ValueError: if method is not one of METHODS
+    """
+    if method == "lttb":
+        return lttb(x, y, target)
+    if method == "minmax":
+        return min_max(x, y, max(1, target // 2 - 1))
+    raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
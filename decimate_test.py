@@ -0,0 +1,70 @@
+"""
+Tests of the downsampling functions of decimate.py: the kept points, their order and the extremes.
+Run with: python -m pytest decimate_test.py
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+import decimate
+
+
+def series(n, seed = 0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = rng.normal(8, 2, n)
+    # one spike and one dip the chart must keep
+    y[n // 3] = 40
+    y[2 * n // 3] = -20
+    return x, y
+
+
+@pytest.mark.parametrize("n, threshold", [(1000, 50), (1000, 3), (101, 100), (5000, 820)])
+def test_lttb_keeps_endpoints_and_order(n, threshold):
+    x, y = series(n)
+    kept = decimate.lttb(x, y, threshold)
+    assert len(kept) == threshold
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+
+
+def test_lttb_keeps_spikes():
+    x, y = series(2000)
+    kept = decimate.lttb(x, y, 100)
+    assert y.argmax() in kept and y.argmin() in kept
+
+
+def test_lttb_short_series_is_unchanged():
+    x, y = series(10)
+    assert list(decimate.lttb(x, y, 10)) == list(range(10))
+    assert list(decimate.lttb(x, y, 2)) == list(range(10))
+
+
+@pytest.mark.parametrize("n, buckets", [(1000, 20), (5000, 410), (50, 1)])
+def test_min_max_keeps_extremes_of_every_bucket(n, buckets):
+    x, y = series(n)
+    kept = decimate.min_max(x, y, buckets)
+    assert len(kept) <= 2 * buckets + 2
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+    bucket = np.minimum(((x - x[0]) / (x[-1] - x[0]) * buckets).astype(int), buckets - 1)
+    for b in range(buckets):
+        members = np.flatnonzero(bucket == b)
+        if len(members):
+            assert members[y[members].argmin()] in kept
+            assert members[y[members].argmax()] in kept
+
+
+def test_min_max_same_x():
+    y = np.array([3.0, 1.0, 7.0, 2.0, 5.0, 4.0, 6.0])
+    kept = decimate.min_max(np.zeros(7), y, 1)
+    assert sorted(kept) == [0, 1, 2, 6]
+
+
+def test_decimate_dispatch():
+    x, y = series(1000)
+    assert len(decimate.decimate(x, y, 40)) == 40
+    assert len(decimate.decimate(x, y, 40, "minmax")) <= 40
+    with pytest.raises(ValueError):
+        decimate.decimate(x, y, 40, "average")
+    assert decimate.target_points(820) == 820
+    assert decimate.target_points(1) == 3
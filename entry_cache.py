@@ -0,0 +1,78 @@
+import collections
+import datetime as dt
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+class EntryCache:
+    """
+    A bounded cache of LogEntry objects in front of a SqlManager, keyed by timestamp.
+    When the cache is full the least recently used entry is evicted.
+    The cache listens to the manager's writes and drops the entries they change,
+    so it never returns an entry that was updated or deleted through the manager.
+
+    Attributes:
+        sqlManager(SqlManager): manager the entries are read from on a miss
+        capacity(int): maximum number of entries kept
+        entries(OrderedDict): datetime -> LogEntry, least recently used first
+        hits(int): number of get() calls answered from the cache
+        misses(int): number of get() calls that had to query the database
+    """
+    DEFAULT_CAPACITY = 4096
+
+    def __init__(self, sql_manager : SqlManager, capacity = DEFAULT_CAPACITY):
+        self.sqlManager = sql_manager
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        sql_manager.add_listener(self.invalidate)
+
+    def get(self, timestamp : dt.datetime):
+        """
+        Get the entry stored at timestamp, from the cache if possible.
+        Returns: the LogEntry, or None if there is no such entry
+        """
+        entry = self.entries.get(timestamp)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(timestamp)
+            return entry
+        self.misses += 1
+        entry = self.sqlManager.get_entry(timestamp)
+        if entry is not None:
+            self.put(entry)
+        return entry
+
+    def put(self, entry : LogEntry):
+        """Store the entry in the cache, evicting the least recently used entry if it is full."""
+        self.entries[entry.timestamp] = entry
+        self.entries.move_to_end(entry.timestamp)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def put_many(self, entries):
+        """Store every LogEntry of the iterable entries in the cache."""
+        for entry in entries:
+            self.put(entry)
+
+    def invalidate(self, timestamps):
+        """Drop the entries stored at the datetime objects of the iterable timestamps."""
+        for timestamp in timestamps:
+            self.entries.pop(timestamp, None)
+
+    def clear(self):
+        """Drop every entry, the hit and miss counters are kept."""
+        self.entries.clear()
+
+    def stats(self):
+        """
+        Returns:
+            A dictionary with the hits, misses, current size and capacity of the cache
+        """
+        return {"hits": self.hits, "misses": self.misses
+                , "size": len(self.entries), "capacity": self.capacity}
+
+    def close(self):
+        """Stop listening to the manager's writes and drop every entry."""
+        self.sqlManager.remove_listener(self.invalidate)
+        self.clear()
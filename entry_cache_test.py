@@ -0,0 +1,69 @@
+"""
+Tests of EntryCache, the bounded LRU cache of the View tab in front of SqlManager.
+Run with: python -m pytest entry_cache_test.py
+"""
+import datetime as dt
+
+import pytest
+
+from entry_cache import EntryCache
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+TIMESTAMPS = [dt.datetime(2025, 2, 1, 8, 0) + dt.timedelta(days=i) for i in range(5)]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    manager.add_entries([LogEntry(t, 8, 10) for t in TIMESTAMPS])
+    yield manager
+    manager.close()
+
+
+def test_hits_and_misses(manager):
+    cache = EntryCache(manager)
+    assert cache.get(TIMESTAMPS[0]) == LogEntry(TIMESTAMPS[0], 8, 10)
+    assert cache.get(TIMESTAMPS[0]).drivetime == 8
+    assert cache.get(dt.datetime(2030, 1, 1)) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1, "capacity": EntryCache.DEFAULT_CAPACITY}
+
+
+def test_least_recently_used_entry_is_evicted(manager):
+    cache = EntryCache(manager, capacity=3)
+    cache.put_many(LogEntry(t, 8, 10) for t in TIMESTAMPS[:3])
+    # touching the oldest entry makes the second one the least recently used
+    cache.get(TIMESTAMPS[0])
+    cache.put(LogEntry(TIMESTAMPS[3], 8, 10))
+    assert list(cache.entries) == [TIMESTAMPS[2], TIMESTAMPS[0], TIMESTAMPS[3]]
+
+
+def test_writes_through_manager_invalidate(manager):
+    cache = EntryCache(manager)
+    cache.put_many(manager.get_entries_page(limit=10)[0])
+    manager.update_entry(TIMESTAMPS[1], LogEntry(TIMESTAMPS[1], 1, 2))
+    manager.delete_entry(TIMESTAMPS[2])
+    assert TIMESTAMPS[1] not in cache.entries and TIMESTAMPS[2] not in cache.entries
+    assert cache.get(TIMESTAMPS[1]).drivetime == 1
+    assert cache.get(TIMESTAMPS[2]) is None
+    assert len(cache.entries) == 4
+
+
+def test_rolled_back_batch_keeps_entries(manager):
+    cache = EntryCache(manager)
+    cache.put(manager.get_entry(TIMESTAMPS[0]))
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.delete_entry(TIMESTAMPS[0])
+            raise RuntimeError("abort")
+    assert TIMESTAMPS[0] in cache.entries
+
+
+def test_close_stops_listening(manager):
+    cache = EntryCache(manager)
+    cache.get(TIMESTAMPS[0])
+    cache.close()
+    assert len(cache.entries) == 0
+    cache.put(LogEntry(TIMESTAMPS[1], 8, 10))
+    manager.delete_entry(TIMESTAMPS[1])
+    assert TIMESTAMPS[1] in cache.entries
@@ -0,0 +1,109 @@
+import collections
+from sql_manager import SqlManager
+from entry_cache import EntryCache
+
+class EntryWindow:
+    """
+    A read-only, list-like view of the timestamps stored by a SqlManager, latest first,
+    optionally limited to a range of dates.
+    Timestamps are read from the database in blocks of BLOCK_SIZE only when they are needed,
+    and only the MAX_BLOCKS most recently used blocks are kept in memory, so the cost of a window
+    does not depend on how many entries the database holds.
+    Blocks are read with their drive and rest times, which are handed to the cache if one is given,
+    so selecting a visible entry afterwards needs no query.
+
+    Attributes:
+        sqlManager(SqlManager): manager the timestamps are read from
+        start, end: bounds of the range (None for no bound), same as SqlManager.iter_range()
+        cache(EntryCache): cache filled with the entries of every block read, or None
+        blocks(OrderedDict): block number -> (list of datetime, continuation token), most recently used last
+    """
+    BLOCK_SIZE = 200
+    MAX_BLOCKS = 16
+
+    def __init__(self, sql_manager : SqlManager, start = None, end = None, cache : EntryCache = None
+                 , first_block = None):
+        """
+        Args:
+            first_block: (default to None) the result of read_first_block() for the same range,
+                usually read by a reader on a worker thread, so the window needs no query to start
+        """
+        self.sqlManager = sql_manager
+        self.start = start
+        self.end = end
+        self.cache = cache
+        self.blocks = collections.OrderedDict()
+        if first_block is None:
+            self.length = sql_manager.count_entries(start, end)
+        else:
+            self.length, entries, token = first_block
+            self._store_block(0, entries, token)
+
+    @staticmethod
+    def read_first_block(sql_manager : SqlManager, start = None, end = None):
+        """
+        Read what a window over the range needs to start: its length and its first block.
+        It only reads through sql_manager, so it can run on a worker thread with a reader.
+        Returns:
+            A tuple (length, entries, token) to pass as first_block
+        """
+        entries, token = sql_manager.get_entries_page(limit=EntryWindow.BLOCK_SIZE, start=start, end=end)
+        return sql_manager.count_entries(start, end), entries, token
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        """Get the datetime at index, 0 being the latest entry of the range."""
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("EntryWindow index out of range")
+        block, position = divmod(index, self.BLOCK_SIZE)
+        return self._get_block(block)[0][position]
+
+    def covers(self, timestamps):
+        """Returns: True if one of the datetime objects of the iterable timestamps is in the range of the window"""
+        lower, upper = self.sqlManager.key_range(self.start, self.end)
+        return any(lower <= SqlManager.to_key(t) <= upper for t in timestamps)
+
+    def refresh(self, length = None):
+        """
+        Forget the loaded blocks, used after the database changed.
+        Args:
+            length: (default to None, count them again) number of entries in the range now,
+                usually counted by a reader on a worker thread
+        """
+        self.blocks.clear()
+        self.length = self.sqlManager.count_entries(self.start, self.end) if length is None else length
+
+    def _get_block(self, block):
+        """
+        helper method that returns the block (timestamps, token) number block, loading it if needed.
+        A block following a loaded block is read with a keyset seek after that block's token,
+        any other block is read with an offset.
+        """
+        if block in self.blocks:
+            self.blocks.move_to_end(block)
+            return self.blocks[block]
+        previous = self.blocks.get(block - 1)
+        if previous is not None and previous[1] is not None:
+            entries, token = self.sqlManager.get_entries_page(after=previous[1], limit=self.BLOCK_SIZE
+                                                              , start=self.start, end=self.end)
+        else:
+            entries, token = self.sqlManager.get_entries_page(limit=self.BLOCK_SIZE, start=self.start
+                                                              , end=self.end, offset=block * self.BLOCK_SIZE)
+        return self._store_block(block, entries, token)
+
+    def _store_block(self, block, entries, token):
+        """
+        helper method that keeps the block read from the database, evicting the least recently used one.
+        Returns: the stored block (timestamps, token)
+        """
+        if self.cache is not None:
+            self.cache.put_many(entries)
+        page = ([entry.timestamp for entry in entries], token)
+        self.blocks[block] = page
+        if len(self.blocks) > self.MAX_BLOCKS:
+            self.blocks.popitem(last=False)
+        return page
@@ -0,0 +1,82 @@
+"""
+Tests of EntryWindow, the list-like view of the View tab reading timestamps in blocks.
+Run with: python -m pytest entry_window_test.py
+"""
+import datetime as dt
+
+import pytest
+
+from entry_window import EntryWindow
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+TIMESTAMPS = [dt.datetime(2025, 1, 1, 6, 0) + dt.timedelta(hours=5 * i) for i in range(53)]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    manager.add_entries([LogEntry(t, 8, 10) for t in TIMESTAMPS])
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(EntryWindow, "BLOCK_SIZE", 5)
+    monkeypatch.setattr(EntryWindow, "MAX_BLOCKS", 3)
+
+
+def test_window_lists_latest_first(manager, small_blocks):
+    window = EntryWindow(manager)
+    assert len(window) == len(TIMESTAMPS)
+    assert list(window) == TIMESTAMPS[::-1]
+    assert window[-1] == TIMESTAMPS[0]
+    with pytest.raises(IndexError):
+        window[len(TIMESTAMPS)]
+
+
+def test_window_keeps_most_recently_used_blocks(manager, small_blocks):
+    window = EntryWindow(manager)
+    for index in range(0, len(TIMESTAMPS), EntryWindow.BLOCK_SIZE):
+        window[index]
+    assert list(window.blocks) == [8, 9, 10]
+    # jumping back reads the block again with an offset
+    assert window[0] == TIMESTAMPS[-1]
+    assert list(window.blocks) == [9, 10, 0]
+
+
+def test_window_over_range(manager, small_blocks):
+    window = EntryWindow(manager, TIMESTAMPS[10], TIMESTAMPS[29])
+    assert list(window) == TIMESTAMPS[29:9:-1]
+
+
+def test_first_block_read_ahead(manager, small_blocks):
+    first_block = EntryWindow.read_first_block(manager, None, TIMESTAMPS[20])
+    window = EntryWindow(manager, end=TIMESTAMPS[20], first_block=first_block)
+    assert len(window) == 21
+    assert list(window.blocks) == [0]
+    assert list(window) == TIMESTAMPS[20::-1]
+
+
+def test_refresh_after_write(manager, small_blocks):
+    window = EntryWindow(manager)
+    window[0]
+    manager.delete_entry(TIMESTAMPS[-1])
+    window.refresh()
+    assert len(window) == len(TIMESTAMPS) - 1
+    assert window[0] == TIMESTAMPS[-2]
+
+
+def test_covers_and_refresh_with_counted_length(manager, small_blocks):
+    window = EntryWindow(manager, TIMESTAMPS[10].date(), TIMESTAMPS[20])
+    assert window.covers([TIMESTAMPS[5], TIMESTAMPS[10].replace(hour=0)])
+    assert not window.covers([TIMESTAMPS[5], TIMESTAMPS[21]])
+    manager.delete_entry(TIMESTAMPS[15])
+    reader = manager.open_reader()
+    try:
+        window.refresh(reader.count_entries(window.start, window.end))
+    finally:
+        reader.close()
+    # the start date covers the whole day, so TIMESTAMPS[9] of the same morning is in the range
+    assert list(window) == [t for t in TIMESTAMPS[20:8:-1] if t != TIMESTAMPS[15]]
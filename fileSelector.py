@@ -3,13 +3,18 @@ import daily_log
 import viewpage
 import analytics
 import sqlite3
+from background    import run_in_background
+from user_registry import UserRegistry
 
 class Users(customtkinter.CTkFrame):
     def __init__(self, master, callback=None):
         super().__init__(master)
         self.callback = callback  # Function to call when user is selected
         self.sqlManager = None
-        self.file_Names = ["TestingFile.db"]
+        # users come from the registry, listed at once from their recorded summaries
+        self.registry = UserRegistry()
+        self.users = self.registry.users()
+        self.file_Names = [u.filename for u in self.users]
         self.position = 0
 
         # Center frame layout
@@ -30,6 +35,32 @@ class Users(customtkinter.CTkFrame):
         self.button.grid(row=2, column=1, padx=10, pady=(10, 20), sticky="ew")
 
         self.reorderButtons()
+        self.refresh_registry()
+
+    def refresh_registry(self):
+        # re-read the files that changed since the last visit on a worker thread,
+        # with a registry connection of its own, then update the list if anything changed
+        filename = self.registry.filename
+
+        def work():
+            registry = UserRegistry(filename)
+            try:
+                return registry.refresh()
+            finally:
+                registry.close()
+
+        run_in_background(self, work, self.on_registry_refreshed)
+
+    def on_registry_refreshed(self, changed):
+        if not changed:
+            return
+        self.users = self.registry.users()
+        self.file_Names = [u.filename for u in self.users]
+        self.reorderButtons()
+
+    def destroy(self):
+        self.registry.close()
+        super().destroy()
 
     def inputFunction(self):
         self.after_idle(self.show_dialog)
@@ -44,8 +75,9 @@ class Users(customtkinter.CTkFrame):
         print("User input:", self.user_input)
         self.addUser()
 
-    def create_entry_button(self, fileName):
-        btn = customtkinter.CTkButton(self.list_frame, text=fileName, height=40)
+    def create_entry_button(self, fileName, summary = ""):
+        text = fileName if not summary else f"{fileName}\n{summary}"
+        btn = customtkinter.CTkButton(self.list_frame, text=text, height=40)
         btn.configure(command=lambda b=btn: self.entry_button_clicked(fileName))
         return btn
 
@@ -59,14 +91,16 @@ class Users(customtkinter.CTkFrame):
 
     def addUser(self):
         usersFile = self.user_input + ".db"
-        self.file_Names.append(usersFile)
+        self.registry.register(usersFile)
+        self.users = self.registry.users()
+        self.file_Names = [u.filename for u in self.users]
         print(self.file_Names)
         self.reorderButtons()
 
     def reorderButtons(self):
         for widget in self.list_frame.winfo_children():
             widget.destroy()
-        for idx, entry in enumerate(self.file_Names):
-            btn = self.create_entry_button(entry.replace(".db", ""))
+        for idx, user in enumerate(self.users):
+            btn = self.create_entry_button(user.filename.replace(".db", ""), user.summary())
             btn.grid(row=idx, column=0, padx=0, pady=5, sticky="ew")
         self.list_frame.grid_columnconfigure(0, weight=1)
\ No newline at end of file
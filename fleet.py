@@ -0,0 +1,170 @@
+# fleet.py
+# Fleet report over the database files of many drivers, one file per driver as chosen in fileSelector.
+# Every file is read by its own worker process with a read-only connection, so files with an older schema
+# (such as the ones written by the first versions of the application) must be migrated first:
+#     python migrate_logs.py TestingFile.db Maya.db
+#     python fleet.py TestingFile.db Maya.db --start 2025-01-01 --end 2025-03-31
+#     python fleet.py drivers/*.db --cycle 60-7 --workers 8
+
+import argparse
+import concurrent.futures
+import os
+import pathlib
+import sqlite3
+
+from sql_manager import SqlManager
+from compliance import ComplianceTracker, US_60_7, US_70_8
+
+# cycle name -> Rules
+CYCLES = {"70-8": US_70_8, "60-7": US_60_7}
+# rules reported, in order
+RULES = ("drive", "cycle", "rest")
+
+
+class DriverSummary:
+    """
+    Totals and compliance of one driver over the report range.
+
+    Attributes:
+        driver(str): name of the driver, the file name without .db
+        filename(str): database file of the driver
+        entries(int): number of entries in the range
+        first(datetime.datetime), last(datetime.datetime): first and last entry in the range, None without entries
+        drivetime(float), resttime(float): total driving and resting time in the range
+        violations(dict): rule -> number of entries in the range that break it
+        error(str): why the file could not be read, None if it was
+    """
+    def __init__(self, driver, filename, entries = 0, first = None, last = None, drivetime = 0.0, resttime = 0.0
+                 , violations = None, error = None):
+        self.driver = driver
+        self.filename = filename
+        self.entries = entries
+        self.first = first
+        self.last = last
+        self.drivetime = drivetime
+        self.resttime = resttime
+        self.violations = violations if violations is not None else {rule: 0 for rule in RULES}
+        self.error = error
+
+    def __repr__(self):
+        return (f"DriverSummary({self.driver!r}, entries={self.entries}, drivetime={self.drivetime}"
+                f", resttime={self.resttime}, violations={self.violations})")
+
+
+def summarize_driver(filename, cycle = "70-8", start = None, end = None):
+    """
+    Compute the DriverSummary of one database file, meant to run in a worker process.
+    The whole history is evaluated so that windows overlapping start are complete,
+    only the violations at entries between start and end are counted.
+    Args:
+        filename: database file of the driver, opened read-only
+        cycle: (default to "70-8") key of CYCLES
+        start, end: (default to None, no bound) same bounds as SqlManager.iter_range()
+    Returns:
+        The DriverSummary, with error set if the file can not be read
+        (missing, not a database, not migrated to the current schema, corrupt, or holding keys
+        that are not datetimes)
+    """
+    driver = pathlib.Path(filename).stem
+    try:
+        manager = SqlManager(filename, read_only=True)
+    except sqlite3.Error as e:
+        return DriverSummary(driver, filename, error=str(e))
+    try:
+        totals = manager.get_totals(start, end)
+        tracker = ComplianceTracker.from_manager(manager, CYCLES[cycle])
+        lower, upper = manager.key_range(start, end)
+    except (sqlite3.Error, ValueError, OverflowError) as e:
+        return DriverSummary(driver, filename, error=str(e))
+    finally:
+        manager.close()
+    violations = {rule: 0 for rule in RULES}
+    for (rule, key) in tracker.violations:
+        if lower <= key <= upper:
+            violations[rule] += 1
+    return DriverSummary(driver, filename, totals["entries"], totals["first"], totals["last"]
+                         , totals["drivetime"], totals["resttime"], violations)
+
+
+def fleet_report(filenames, cycle = "70-8", start = None, end = None, workers = None):
+    """
+    Summarize every driver of filenames in parallel, one task per file on a process pool.
+    Args:
+        filenames: database files of the drivers
+        cycle: (default to "70-8") key of CYCLES
+        start, end: (default to None, no bound) same bounds as SqlManager.iter_range()
+        workers: (default to None, one per CPU) number of worker processes
+    Returns:
+        A tuple (list of DriverSummary in the order of filenames, fleet totals from fleet_totals())
+    Raises:
+        ValueError: if cycle is not a key of CYCLES
+    """
+    if cycle not in CYCLES:
+        raise ValueError(f"Unknown cycle {cycle!r}, expected one of {list(CYCLES)}")
+    filenames = list(filenames)
+    if not filenames:
+        return [], fleet_totals([])
+    workers = min(workers or os.cpu_count() or 1, len(filenames))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(summarize_driver, f, cycle, start, end) for f in filenames]
+        summaries = [_result(future, f) for future, f in zip(futures, filenames)]
+    return summaries, fleet_totals(summaries)
+
+
+def _result(future, filename):
+    """
+    helper function returning the DriverSummary of a finished task, or one with error set if the task failed,
+    for example because its worker process died, so one bad file does not stop the report.
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        return DriverSummary(pathlib.Path(filename).stem, filename, error=f"{type(e).__name__}: {e}")
+
+
+def fleet_totals(summaries):
+    """
+    Add up the summaries of the drivers that could be read.
+    Returns:
+        A dictionary with the number of "drivers" read and "failed", the "entries", "drivetime" and
+        "resttime" totals, the "first" and "last" entry of the fleet, the "violations" count of each rule
+        and the number of "drivers_in_violation"
+    """
+    read = [s for s in summaries if s.error is None]
+    firsts = [s.first for s in read if s.first is not None]
+    lasts = [s.last for s in read if s.last is not None]
+    return {
+        "drivers": len(read),
+        "failed": len(summaries) - len(read),
+        "entries": sum(s.entries for s in read),
+        "drivetime": sum(s.drivetime for s in read),
+        "resttime": sum(s.resttime for s in read),
+        "first": min(firsts) if firsts else None,
+        "last": max(lasts) if lasts else None,
+        "violations": {rule: sum(s.violations[rule] for s in read) for rule in RULES},
+        "drivers_in_violation": sum(1 for s in read if any(s.violations.values())),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report driving totals and compliance of every driver of a fleet.")
+    parser.add_argument("files", nargs="+", help="sqlite database files, one per driver")
+    parser.add_argument("--cycle", choices=list(CYCLES), default="70-8", help="hours-of-service cycle")
+    parser.add_argument("--start", help="first day of the report, YYYY-MM-DD")
+    parser.add_argument("--end", help="last day of the report, YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, help="number of worker processes, one per CPU by default")
+    args = parser.parse_args()
+
+    summaries, totals = fleet_report(args.files, args.cycle, args.start, args.end, args.workers)
+    print(f"{'Driver':<24}{'Entries':>9}{'Driving':>11}{'Resting':>11}{'Drive':>7}{'Cycle':>7}{'Rest':>7}")
+    for s in summaries:
+        if s.error is not None:
+            print(f"{s.driver:<24}  could not be read: {s.error}")
+            continue
+        print(f"{s.driver:<24}{s.entries:>9}{s.drivetime:>10.1f}h{s.resttime:>10.1f}h"
+              f"{s.violations['drive']:>7}{s.violations['cycle']:>7}{s.violations['rest']:>7}")
+    v = totals["violations"]
+    print(f"{'Fleet':<24}{totals['entries']:>9}{totals['drivetime']:>10.1f}h{totals['resttime']:>10.1f}h"
+          f"{v['drive']:>7}{v['cycle']:>7}{v['rest']:>7}")
+    print(f"{totals['drivers']} driver(s) read, {totals['failed']} failed, "
+          f"{totals['drivers_in_violation']} with violations")
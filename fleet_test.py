@@ -0,0 +1,61 @@
+"""
+Tests of the fleet report: totals over several driver files, and files that can not be read.
+Run with: python -m pytest fleet_test.py
+"""
+import concurrent.futures
+import datetime as dt
+
+import pytest
+
+import fleet
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+
+def make_driver(path, entries):
+    manager = SqlManager(str(path))
+    manager.add_entries(entries)
+    manager.close()
+    return str(path)
+
+
+@pytest.fixture
+def drivers(tmp_path):
+    day = dt.datetime(2025, 3, 3, 6, 0)
+    ann = make_driver(tmp_path / "ann.db", [LogEntry(day + dt.timedelta(days=i), 8, 10) for i in range(5)])
+    # 4 h between two entries of 12 h driving: a drive and a rest violation
+    bob = make_driver(tmp_path / "bob.db", [LogEntry(day, 12, 2), LogEntry(day + dt.timedelta(hours=16), 1, 10)])
+    return ann, bob
+
+
+def test_report_totals(drivers):
+    summaries, totals = fleet.fleet_report(drivers, workers=2)
+    assert [s.driver for s in summaries] == ["ann", "bob"]
+    assert summaries[0].entries == 5 and summaries[0].violations == {"drive": 0, "cycle": 0, "rest": 0}
+    assert summaries[1].violations == {"drive": 2, "cycle": 0, "rest": 1}
+    assert totals["drivers"] == 2 and totals["failed"] == 0
+    assert totals["entries"] == 7
+    assert totals["drivetime"] == pytest.approx(53)
+    assert totals["drivers_in_violation"] == 1
+
+
+def test_bad_files_become_error_rows(drivers, tmp_path):
+    broken = make_driver(tmp_path / "broken.db", [LogEntry(dt.datetime(2025, 3, 3), 1, 1)])
+    manager = SqlManager(broken)
+    # a key that is not a datetime, written around the checks of the manager
+    manager.cur.execute("INSERT INTO logs VALUES(?, 1, 1)", (2**62,))
+    manager.con.commit()
+    manager.close()
+    missing = str(tmp_path / "missing.db")
+    summaries, totals = fleet.fleet_report([drivers[0], broken, missing], workers=2)
+    assert summaries[0].error is None
+    assert summaries[1].error is not None and summaries[2].error is not None
+    assert totals["drivers"] == 1 and totals["failed"] == 2
+
+
+def test_failed_task_becomes_error_row():
+    future = concurrent.futures.Future()
+    future.set_exception(concurrent.futures.process.BrokenProcessPool("worker died"))
+    summary = fleet._result(future, "drivers/carl.db")
+    assert summary.driver == "carl"
+    assert summary.error == "BrokenProcessPool: worker died"
@@ -0,0 +1,316 @@
+# integrity_scan.py
+# Checks the logs of user databases for bad rows and optionally removes them:
+#     python integrity_scan.py TestingFile.db Maya.db                  (dry run, only reports)
+#     python integrity_scan.py drivers/*.db --mode quarantine          (moves bad rows to logs_quarantine)
+#     python integrity_scan.py temp.db --mode repair                   (deletes unreadable rows, moves the others)
+# Rows are read in timestamp order a chunk at a time, so memory stays bounded whatever the size of the file,
+# and every file is changed in a single transaction: an interrupted scan leaves it untouched.
+
+import argparse
+import collections
+import concurrent.futures
+import os
+import pathlib
+import sqlite3
+import time
+
+import timestamp_codec
+import validation
+from sql_manager import SqlManager
+
+MODES = ("dry-run", "quarantine", "repair")
+DEFAULT_CHUNK_SIZE = 10000
+# entries this many minutes apart or less with the same hours are one entry recorded twice
+DUPLICATE_MINUTES = 5
+# issue -> what quarantine and repair modes do with the rows that have it.
+# "delete": quarantine mode moves them to logs_quarantine, repair mode deletes them.
+# "quarantine": both modes move them to logs_quarantine. Hours out of range and duplicates are guesses,
+#     a long shift or two identical entries minutes apart can be real, so they are never deleted.
+# None: only reported, which of two overlapping entries is wrong can not be told.
+# Only rows whose timestamp can not be decoded are deleted.
+ISSUES = {
+    "malformed timestamp": "delete",
+    "bad drivetime": "quarantine",
+    "bad resttime": "quarantine",
+    "duplicate": "quarantine",
+    "overlap": None,
+}
+# validation error code -> issue
+_CODE_ISSUES = {
+    validation.BAD_KEY: "malformed timestamp",
+    validation.BAD_DRIVETIME: "bad drivetime",
+    validation.BAD_RESTTIME: "bad resttime",
+}
+
+
+class ScanReport:
+    """
+    Outcome of the scan of one file.
+
+    Attributes:
+        filename(str): database file scanned
+        mode(str): one of MODES
+        rows(int): number of rows scanned
+        issues(collections.Counter): issue (see ISSUES) -> number of rows with it
+        removed(int): number of rows taken out of logs, moved to logs_quarantine or deleted
+        deleted(int): number of the removed rows deleted without a copy, only in repair mode
+        examples(list): (timestamp, issue) of the first MAX_EXAMPLES rows with an issue
+        migrated_from(int): schema version the file was migrated from before the scan, None if it was current.
+            The migration moves unreadable and duplicate TEXT timestamps to logs_quarantine itself.
+        migration_quarantined(int): number of rows the migration moved to logs_quarantine
+        seconds(float): time spent
+        error(str): why the file could not be scanned, None if it was
+    """
+    MAX_EXAMPLES = 20
+
+    def __init__(self, filename, mode):
+        self.filename = filename
+        self.mode = mode
+        self.rows = 0
+        self.issues = collections.Counter()
+        self.removed = 0
+        self.deleted = 0
+        self.examples = []
+        self.migrated_from = None
+        self.migration_quarantined = 0
+        self.seconds = 0.0
+        self.error = None
+
+    def add(self, key, issue, raw = None):
+        """Count a row with an issue, raw is the stored timestamp shown when key can not be read."""
+        self.issues[issue] += 1
+        if len(self.examples) < self.MAX_EXAMPLES:
+            readable = validation.check_key(key) == validation.OK
+            self.examples.append((timestamp_codec.format_key(key) if readable else repr(raw), issue))
+
+    def __str__(self):
+        if self.error is not None:
+            return f"could not be scanned: {self.error}"
+        issues = ", ".join(f"{count} {issue}" for issue, count in sorted(self.issues.items())) or "no issues"
+        removed = ""
+        if self.mode != "dry-run":
+            removed = f", {self.removed - self.deleted} quarantined"
+        if self.mode == "repair":
+            removed += f", {self.deleted} deleted"
+        return f"{self.rows} rows, {issues}{removed} in {self.seconds:.2f} s"
+
+
+def scan_file(filename, mode = "dry-run", chunk_size = DEFAULT_CHUNK_SIZE, duplicate_minutes = DUPLICATE_MINUTES
+              , max_hours = validation.MAX_HOURS, max_rest_hours = validation.MAX_REST_HOURS):
+    """
+    Scan the logs of one database file, meant to run in a worker process.
+    A row has an issue when its timestamp key is not a datetime, its hours fail validation.check_hours(),
+    it has the minute of the previous entry or follows it by at most duplicate_minutes with the same hours
+    (duplicate), or it starts before the driving and resting time of the previous entry are over (overlap).
+    Rows removed are not used as the previous entry, so a dry run reports what the other modes would do.
+    Args:
+        filename: database file, it must exist
+        mode: (default to "dry-run") one of MODES. A dry run opens the file read-only and reads any schema,
+            TEXT timestamps of legacy files are decoded with SqlManager.legacy_to_key() the way the
+            migration does. The other modes migrate the file to the current schema first if needed.
+        chunk_size: (default to DEFAULT_CHUNK_SIZE) number of rows read at a time
+        duplicate_minutes: (default to DUPLICATE_MINUTES) largest gap between duplicates
+        max_hours: (default to validation.MAX_HOURS) most driving hours of an entry
+        max_rest_hours: (default to validation.MAX_REST_HOURS) most resting hours of an entry
+    Returns:
+        The ScanReport, with error set if the file can not be scanned
+    Raises:
+        ValueError: if mode is not one of MODES
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    report = ScanReport(filename, mode)
+    started = time.perf_counter()
+    if not os.path.isfile(filename):
+        report.error = "no such file"
+        return report
+    if mode == "dry-run":
+        _dry_run(report, chunk_size, duplicate_minutes, max_hours, max_rest_hours)
+        report.seconds = time.perf_counter() - started
+        return report
+    try:
+        version, quarantined = _file_state(filename)
+        manager = SqlManager(filename)
+        if version != SqlManager.SCHEMA_VERSION:
+            report.migrated_from = version
+            report.migration_quarantined = _quarantined(manager.cur) - quarantined
+    except sqlite3.Error as e:
+        report.error = str(e)
+        return report
+    try:
+        with manager.batch():
+            remove = lambda rows: _remove(manager.cur, rows, mode)
+            _scan(report, _key_chunks(manager.cur, chunk_size), remove, duplicate_minutes, max_hours, max_rest_hours)
+            if report.removed and report.issues["malformed timestamp"]:
+                # the triggers can not put a key outside the dates of sqlite in a rollup bucket
+                manager.rebuild_rollups()
+    except sqlite3.Error as e:
+        # the transaction was rolled back, nothing was removed
+        report.error = str(e)
+        report.removed = 0
+        report.deleted = 0
+    finally:
+        manager.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def scan_files(filenames, mode = "dry-run", workers = None, **options):
+    """
+    Scan every file of filenames in parallel, one task per file on a process pool.
+    Args:
+        filenames: database files
+        mode: (default to "dry-run") one of MODES
+        workers: (default to None, one per CPU) number of worker processes
+        options: chunk_size, duplicate_minutes, max_hours and max_rest_hours, passed to scan_file()
+    Returns:
+        The list of ScanReport in the order of filenames
+    Raises:
+        ValueError: if mode is not one of MODES
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    filenames = list(filenames)
+    if not filenames:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(filenames))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(scan_file, f, mode, **options) for f in filenames]
+        return [f.result() for f in futures]
+
+
+def _dry_run(report, chunk_size, duplicate_minutes, max_hours, max_rest_hours):
+    """
+    helper function scanning a file read-only, whatever its schema version.
+    Nothing is removed, so a single query is read chunk_size rows at a time. Legacy TEXT timestamps
+    are decoded by a sql function, sqlite sorts the rows by their key with its own temporary storage.
+    """
+    try:
+        con = sqlite3.connect(f"{pathlib.Path(report.filename).resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        report.error = str(e)
+        return
+    try:
+        if con.execute("PRAGMA user_version").fetchone()[0] < 2:
+            con.create_function("legacy_key", 1, SqlManager.legacy_to_key, deterministic=True)
+            cur = con.execute("""SELECT legacy_key(timestamp) AS k, drivetime, resttime, timestamp
+                              FROM logs ORDER BY k""")
+        else:
+            cur = con.execute("SELECT timestamp, drivetime, resttime, timestamp FROM logs ORDER BY timestamp")
+        _scan(report, iter(lambda: cur.fetchmany(chunk_size), []), None, duplicate_minutes, max_hours
+              , max_rest_hours)
+    except sqlite3.Error as e:
+        report.error = str(e)
+    finally:
+        con.close()
+
+
+def _key_chunks(cur, chunk_size):
+    """
+    helper function yielding the rows (key, drivetime, resttime, key) of the logs table in key order,
+    chunk_size at a time. Every chunk is a new query starting after the last key seen,
+    so rows can be removed between chunks without disturbing an open cursor.
+    """
+    rows = cur.execute("SELECT timestamp, drivetime, resttime, timestamp FROM logs ORDER BY timestamp LIMIT ?"
+                       , (chunk_size,)).fetchall()
+    while rows:
+        yield rows
+        rows = cur.execute("""SELECT timestamp, drivetime, resttime, timestamp FROM logs WHERE timestamp > ?
+                           ORDER BY timestamp LIMIT ?""", (rows[-1][0], chunk_size)).fetchall()
+
+
+def _scan(report, chunks, remove, duplicate_minutes, max_hours, max_rest_hours):
+    """
+    helper function checking chunks of rows (key, drivetime, resttime, stored timestamp) in key order,
+    keys that can not be read are None and come first.
+    remove is called with the (key, drivetime, resttime, issue) of the removable rows of every chunk
+    and returns how many it deleted without a copy, None to only report them.
+    """
+    # key, hours and end of the last entry kept, in minutes
+    previous = None
+    previous_end = None
+    for rows in chunks:
+        report.rows += len(rows)
+        keys, drives, rests, _ = zip(*rows)
+        codes = validation.validate_rows(keys, drives, rests, max_hours=max_hours, max_rest_hours=max_rest_hours)
+        removed = []
+        for row, code in zip(rows, codes):
+            key, drive, rest, raw = row
+            if code:
+                issue = _CODE_ISSUES[code]
+            elif previous is not None and (key == previous[0] or key - previous[0] <= duplicate_minutes
+                                           and (drive, rest) == previous[1:]):
+                issue = "duplicate"
+            elif previous is not None and key < previous_end:
+                issue = "overlap"
+            else:
+                issue = None
+            if issue is not None:
+                report.add(key, issue, raw)
+                if ISSUES[issue] is not None:
+                    removed.append((raw, drive, rest, issue))
+                    continue
+            previous = (key, drive, rest)
+            previous_end = key + round((float(drive) + float(rest)) * 60)
+        if remove is not None and removed:
+            report.deleted += remove(removed)
+            report.removed += len(removed)
+
+
+def _remove(cur, rows, mode):
+    """
+    helper function removing rows (key, drivetime, resttime, issue) from logs, copying them to logs_quarantine
+    first unless mode is "repair" and ISSUES says their issue is deleted.
+    Returns: the number of rows deleted without a copy
+    """
+    kept = [r for r in rows if mode == "quarantine" or ISSUES[r[3]] == "quarantine"]
+    if kept:
+        cur.execute(SqlManager.QUARANTINE_TABLE_SQL)
+        cur.executemany("INSERT INTO logs_quarantine VALUES(?, ?, ?, ?)", kept)
+    cur.executemany("DELETE FROM logs WHERE timestamp = ?", ((r[0],) for r in rows))
+    return len(rows) - len(kept)
+
+
+def _file_state(filename):
+    """helper function reading (schema version, rows in logs_quarantine) of a file without changing it"""
+    con = sqlite3.connect(f"{pathlib.Path(filename).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return con.execute("PRAGMA user_version").fetchone()[0], _quarantined(con.cursor())
+    finally:
+        con.close()
+
+
+def _quarantined(cur):
+    """helper function counting the rows of logs_quarantine, 0 without the table"""
+    if cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs_quarantine'").fetchone() is None:
+        return 0
+    return cur.execute("SELECT COUNT(*) FROM logs_quarantine").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the logs of user databases and remove the bad rows.")
+    parser.add_argument("files", nargs="+", help="sqlite database files")
+    parser.add_argument("--mode", choices=MODES, default="dry-run"
+                        , help="dry-run only reports, quarantine moves bad rows to logs_quarantine, "
+                               "repair deletes the rows whose timestamp can not be read and moves the others")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows read at a time")
+    parser.add_argument("--duplicate-minutes", type=int, default=DUPLICATE_MINUTES
+                        , help="largest gap in minutes between two entries with the same hours taken as duplicates")
+    parser.add_argument("--max-hours", type=float, default=validation.MAX_HOURS
+                        , help="most driving hours of an entry")
+    parser.add_argument("--max-rest-hours", type=float, default=validation.MAX_REST_HOURS
+                        , help="most resting hours of an entry")
+    parser.add_argument("--workers", type=int, help="number of worker processes, one per CPU by default")
+    args = parser.parse_args()
+
+    reports = scan_files(args.files, args.mode, args.workers, chunk_size=args.chunk_size
+                         , duplicate_minutes=args.duplicate_minutes, max_hours=args.max_hours
+                         , max_rest_hours=args.max_rest_hours)
+    for report in reports:
+        migrated = ""
+        if report.migrated_from is not None:
+            migrated = (f" (migrated from schema {report.migrated_from}, "
+                        f"{report.migration_quarantined} row(s) moved to logs_quarantine)")
+        print(f"{report.filename}{migrated}: {report}")
+        for timestamp, issue in report.examples[:10]:
+            print(f"    {timestamp}: {issue}")
@@ -0,0 +1,120 @@
+"""
+Tests of integrity_scan.py on fixture files: legacy files scanned read-only and current files repaired.
+Run with: python -m pytest integrity_scan_test.py
+"""
+import hashlib
+import sqlite3
+
+import pytest
+
+import integrity_scan
+from migration_test import make_legacy_file
+from sql_manager import SqlManager
+
+# legacy rows, one key per line: 02/01 10:00 is written twice, one timestamp can not be read,
+# the 02/02 entry has negative rest
+LEGACY_ROWS = [
+    ("2025/02/01 10:00", 8.0, 10.0),
+    ("02/01/2025 10:00", 8.0, 10.0),
+    ("garbage", 1.0, 1.0),
+    ("2025/02/02 10:00", 5.0, -1.0),
+    ("02/03/2025 10:00", 4.0, 10.0),
+]
+
+
+def digest(filename):
+    with open(filename, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    return make_legacy_file(tmp_path / "legacy.db", LEGACY_ROWS)
+
+
+@pytest.fixture
+def current_file(tmp_path):
+    filename = str(tmp_path / "current.db")
+    manager = SqlManager(filename)
+    manager.add_rows([(600, 8.0, 10.0), (603, 8.0, 10.0), (1680, 5.0, -1.0), (1740, 30.0, 2.0)
+                      , (2000, 4.0, 4.0), (2100, 1.0, 1.0)])
+    manager.close()
+    return filename
+
+
+def test_dry_run_reads_legacy_file_without_changing_it(legacy_file):
+    before = digest(legacy_file)
+    report = integrity_scan.scan_file(legacy_file, "dry-run", chunk_size=2)
+    assert report.error is None
+    assert report.rows == 5
+    assert report.issues == {"malformed timestamp": 1, "duplicate": 1, "bad resttime": 1}
+    assert ("'garbage'", "malformed timestamp") in report.examples
+    assert ("02/01/2025 10:00", "duplicate") in report.examples
+    assert report.removed == 0
+    assert digest(legacy_file) == before
+
+
+@pytest.mark.parametrize("mode", ["dry-run", "quarantine", "repair"])
+def test_modes_find_the_same_issues(current_file, mode):
+    report = integrity_scan.scan_file(current_file, mode, chunk_size=2)
+    assert report.error is None
+    assert report.issues == {"duplicate": 1, "bad resttime": 1, "bad drivetime": 1, "overlap": 1}
+    assert report.removed == (0 if mode == "dry-run" else 3)
+    assert report.deleted == 0
+    con = sqlite3.connect(current_file)
+    try:
+        assert con.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == (6 if mode == "dry-run" else 3)
+        quarantined = con.execute("SELECT 1 FROM sqlite_master WHERE name = 'logs_quarantine'").fetchone()
+        # hours out of range and duplicates are set aside, never deleted, even in repair mode
+        assert (quarantined is not None) == (mode != "dry-run")
+    finally:
+        con.close()
+    manager = SqlManager(current_file)
+    try:
+        assert manager.verify_rollups() == {"daily_totals": [], "monthly_totals": []}
+    finally:
+        manager.close()
+
+
+def test_quarantine_migrates_legacy_file_first(legacy_file):
+    report = integrity_scan.scan_file(legacy_file, "quarantine")
+    assert report.migrated_from == 0
+    assert report.migration_quarantined == 2
+    assert report.issues == {"bad resttime": 1}
+    con = sqlite3.connect(legacy_file)
+    try:
+        reasons = sorted(r[0] for r in con.execute("SELECT reason FROM logs_quarantine"))
+    finally:
+        con.close()
+    assert reasons == ["bad resttime", "duplicate timestamp", "unreadable timestamp"]
+
+
+def test_long_rest_is_not_an_issue(tmp_path):
+    filename = str(tmp_path / "restart.db")
+    manager = SqlManager(filename)
+    # a 34 hour restart after a shift
+    manager.add_rows([(600, 8.0, 34.0), (600 + 42 * 60, 8.0, 10.0)])
+    manager.close()
+    report = integrity_scan.scan_file(filename, "repair")
+    assert report.issues == {}
+    assert report.removed == 0
+
+
+def test_repair_deletes_only_unreadable_timestamps(current_file):
+    con = sqlite3.connect(current_file)
+    try:
+        with con:
+            # a key no datetime has
+            con.execute("INSERT INTO logs VALUES(?, 1.0, 1.0)", (2 ** 62,))
+    finally:
+        con.close()
+    report = integrity_scan.scan_file(current_file, "repair")
+    assert report.issues["malformed timestamp"] == 1
+    assert report.removed == 4
+    assert report.deleted == 1
+    con = sqlite3.connect(current_file)
+    try:
+        reasons = sorted(r[0] for r in con.execute("SELECT reason FROM logs_quarantine"))
+    finally:
+        con.close()
+    assert reasons == ["bad drivetime", "bad resttime", "duplicate"]
@@ -0,0 +1,184 @@
+import array
+import bisect
+from log_entry import LogEntry
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by to_numpy()
+    np = None
+
+class LogBatch:
+    """
+    Many log entries stored as three columns instead of one LogEntry per row:
+    keys as int64 minutes since SqlManager.EPOCH, drive and rest times as float64,
+    so a row takes 24 bytes instead of the hundreds of a LogEntry with its datetime.
+    The columns are memoryviews over array.array buffers: slicing a batch, or taking the rows
+    between two keys of a sorted batch, gives a view sharing the same memory, without copying.
+    sorted(), take(), filter() and concat() build new batches.
+
+    Attributes:
+        keys(memoryview): int64 timestamp keys, minutes since SqlManager.EPOCH
+        drivetimes(memoryview): float64 driving times
+        resttimes(memoryview): float64 resting times
+    """
+    KEY_TYPE = "q"
+    TIME_TYPE = "d"
+
+    def __init__(self, keys = (), drivetimes = (), resttimes = ()):
+        """
+        Constructor of the batch.
+        Args:
+            keys, drivetimes, resttimes: columns of the same length, array.array or memoryview objects
+                of the right type are used without copying, other iterables are copied
+        Raises:
+            ValueError: if the columns do not have the same length
+        """
+        self.keys = self._column(self.KEY_TYPE, keys)
+        self.drivetimes = self._column(self.TIME_TYPE, drivetimes)
+        self.resttimes = self._column(self.TIME_TYPE, resttimes)
+        if not len(self.keys) == len(self.drivetimes) == len(self.resttimes):
+            raise ValueError("the columns of a LogBatch must have the same length")
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Create a batch from an iterable of (key, drivetime, resttime) rows, None times become 0."""
+        keys = array.array(cls.KEY_TYPE)
+        drivetimes = array.array(cls.TIME_TYPE)
+        resttimes = array.array(cls.TIME_TYPE)
+        for key, drive, rest in rows:
+            keys.append(key)
+            drivetimes.append(drive or 0.0)
+            resttimes.append(rest or 0.0)
+        return cls(keys, drivetimes, resttimes)
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Create a batch from an iterable of LogEntry objects, keyed by LogEntry.key."""
+        return cls.from_rows((e.key, e.drivetime, e.resttime) for e in entries)
+
+    @classmethod
+    def concat(cls, batches):
+        """Returns: a new batch holding the rows of every batch of the iterable, in order"""
+        keys = array.array(cls.KEY_TYPE)
+        drivetimes = array.array(cls.TIME_TYPE)
+        resttimes = array.array(cls.TIME_TYPE)
+        for batch in batches:
+            # the buffers are copied as bytes, without going through Python numbers
+            keys.frombytes(cls._buffer(batch.keys))
+            drivetimes.frombytes(cls._buffer(batch.drivetimes))
+            resttimes.frombytes(cls._buffer(batch.resttimes))
+        return cls(keys, drivetimes, resttimes)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, index):
+        """
+        batch[i] is the row (key, drivetime, resttime) at i,
+        batch[a:b] (or any slice) is a batch viewing the same memory.
+        """
+        if isinstance(index, slice):
+            return LogBatch(self.keys[index], self.drivetimes[index], self.resttimes[index])
+        return self.keys[index], self.drivetimes[index], self.resttimes[index]
+
+    def __iter__(self):
+        return self.rows()
+
+    def __repr__(self):
+        return f"LogBatch({len(self)} rows)"
+
+    def rows(self):
+        """Returns: an iterator of the rows (key, drivetime, resttime)"""
+        return zip(self.keys, self.drivetimes, self.resttimes)
+
+    def entries(self, to_timestamp):
+        """
+        Generator of a LogEntry per row.
+        Args:
+            to_timestamp: function converting a key to a datetime, such as SqlManager.to_timestamp
+        """
+        for key, drive, rest in self.rows():
+            yield LogEntry(to_timestamp(key), drive, rest)
+
+    def is_sorted(self):
+        """Returns: whether the keys are in increasing order"""
+        keys = self.keys
+        return all(keys[i] <= keys[i + 1] for i in range(len(keys) - 1))
+
+    def sorted(self):
+        """Returns: a new batch with the rows ordered by key, rows with equal keys keep their order"""
+        if np is not None:
+            return self.take(np.argsort(self.to_numpy()[0], kind="stable"))
+        return self.take(sorted(range(len(self)), key=self.keys.__getitem__))
+
+    def take(self, indices):
+        """Returns: a new batch with the rows at the indices of the iterable, in that order"""
+        if np is not None:
+            indices = np.fromiter(indices, dtype=np.intp) if not isinstance(indices, np.ndarray) else indices
+            keys, drivetimes, resttimes = self.to_numpy()
+            return LogBatch(self._from_numpy(self.KEY_TYPE, keys[indices])
+                            , self._from_numpy(self.TIME_TYPE, drivetimes[indices])
+                            , self._from_numpy(self.TIME_TYPE, resttimes[indices]))
+        indices = list(indices)
+        keys, drivetimes, resttimes = self.keys, self.drivetimes, self.resttimes
+        return LogBatch(array.array(self.KEY_TYPE, [keys[i] for i in indices])
+                        , array.array(self.TIME_TYPE, [drivetimes[i] for i in indices])
+                        , array.array(self.TIME_TYPE, [resttimes[i] for i in indices]))
+
+    def filter(self, predicate):
+        """
+        Args:
+            predicate: a function called with (key, drivetime, resttime),
+                or a sequence of booleans (a NumPy mask works) with one value per row
+        Returns: a new batch with the rows for which predicate is true
+        """
+        if callable(predicate):
+            return self.take(i for i, row in enumerate(self.rows()) if predicate(*row))
+        if np is not None:
+            return self.take(np.flatnonzero(np.asarray(predicate, dtype=bool)))
+        return self.take(i for i, keep in enumerate(predicate) if keep)
+
+    def between(self, lower, upper):
+        """
+        Get the rows whose key is between lower and upper (both inclusive) of a sorted batch.
+        Returns: a batch viewing the same memory, found by binary search
+        """
+        start = bisect.bisect_left(self.keys, lower)
+        end = bisect.bisect_right(self.keys, upper, start)
+        return self[start:end]
+
+    def nbytes(self):
+        """Returns: the number of bytes of the three columns"""
+        return self.keys.nbytes + self.drivetimes.nbytes + self.resttimes.nbytes
+
+    def to_numpy(self):
+        """
+        Get the columns as NumPy arrays sharing the memory of the batch, as SqlManager.get_columns() returns.
+        Returns: a tuple (int64 keys, float64 drive times, float64 rest times)
+        Raises:
+            ImportError: if numpy is not installed
+        """
+        if np is None:
+            raise ImportError("to_numpy() requires numpy")
+        # asarray follows the strides of a sliced view, so no copy is made either way
+        return np.asarray(self.keys), np.asarray(self.drivetimes), np.asarray(self.resttimes)
+
+    @staticmethod
+    def _buffer(view):
+        """helper method giving a contiguous buffer of a column, copying only strided views"""
+        return view.cast("B") if view.c_contiguous else view.tobytes()
+
+    @staticmethod
+    def _from_numpy(typecode, values):
+        """helper method that copies a NumPy array into an array.array"""
+        column = array.array(typecode)
+        column.frombytes(np.ascontiguousarray(values).tobytes())
+        return column
+
+    @staticmethod
+    def _column(typecode, values):
+        """helper method that makes a memoryview column, copying values only when they are not one already"""
+        if isinstance(values, memoryview) and values.format == typecode:
+            return values
+        if isinstance(values, array.array) and values.typecode == typecode:
+            return memoryview(values)
+        return memoryview(array.array(typecode, values))
@@ -0,0 +1,87 @@
+"""
+Tests of LogBatch: zero-copy slices and between() views, concat(), take(), filter() and sorted(),
+with and without numpy, and the batch I/O of SqlManager.
+Run with: python -m pytest log_batch_test.py
+"""
+import datetime as dt
+
+import pytest
+
+import log_batch
+from log_batch import LogBatch
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+ROWS = [(k, k / 10, 10 - k / 10) for k in (-60, 0, 15, 30, 90, 600, 1440)]
+
+
+@pytest.fixture(params=["numpy", "no numpy"])
+def numpy_or_not(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(log_batch, "np", None)
+    return request.param
+
+
+def test_rows_and_columns():
+    batch = LogBatch.from_rows(ROWS + [(2000, None, None)])
+    assert len(batch) == 8
+    assert list(batch)[:-1] == ROWS
+    assert batch[-1] == (2000, 0.0, 0.0)
+    assert batch.nbytes() == 8 * 24
+    with pytest.raises(ValueError):
+        LogBatch([1, 2], [1.0], [1.0])
+
+
+def test_slice_is_a_view():
+    batch = LogBatch.from_rows(ROWS)
+    view = batch[2:5]
+    assert list(view) == ROWS[2:5]
+    assert view.keys.obj is batch.keys.obj
+    batch.drivetimes[3] = 99.0
+    assert view[1][1] == 99.0
+    every_other = batch[::2]
+    assert list(every_other) == ROWS[::2]
+
+
+def test_between_is_a_view():
+    batch = LogBatch.from_rows(ROWS)
+    view = batch.between(0, 90)
+    assert [row[0] for row in view] == [0, 15, 30, 90]
+    assert view.keys.obj is batch.keys.obj
+    assert len(batch.between(91, 599)) == 0
+    assert [row[0] for row in batch.between(-10**9, 10**9)] == [row[0] for row in ROWS]
+
+
+def test_concat_copies_strided_views():
+    batch = LogBatch.from_rows(ROWS)
+    joined = LogBatch.concat([batch[::3], batch[1:3], LogBatch()])
+    assert list(joined) == ROWS[::3] + ROWS[1:3]
+    assert joined.keys.obj is not batch.keys.obj
+
+
+def test_take_filter_sorted(numpy_or_not):
+    batch = LogBatch.from_rows(ROWS)
+    assert list(batch.take([4, 0, 4])) == [ROWS[4], ROWS[0], ROWS[4]]
+    assert list(batch.filter(lambda key, drive, rest: drive > 3)) == [r for r in ROWS if r[1] > 3]
+    assert list(batch.filter([i % 2 == 0 for i in range(len(ROWS))])) == ROWS[::2]
+    shuffled = batch.take([3, 6, 0, 1, 5, 2, 4])
+    assert not shuffled.is_sorted()
+    assert list(shuffled.sorted()) == ROWS
+    assert shuffled.sorted().is_sorted()
+
+
+def test_entries_and_manager_round_trip(tmp_path):
+    entries = [LogEntry(dt.datetime(1969, 12, 31, 23, 0)), LogEntry(dt.datetime(2025, 3, 1, 6, 30), 8, 10)]
+    batch = LogBatch.from_entries(entries)
+    assert list(batch.keys) == [e.key for e in entries]
+    assert list(batch.entries(SqlManager.to_timestamp)) == entries
+    manager = SqlManager(str(tmp_path / "user.db"))
+    try:
+        manager.write_batch(batch)
+        read = manager.read_batch()
+        assert list(read) == list(batch)
+        assert list(manager.read_batch(start="2025-01-01")) == [batch[1]]
+    finally:
+        manager.close()
@@ -1,9 +1,15 @@
 import datetime as dt
+import operator
+import timestamp_codec
 
 class LogEntry:
     """
     A class to represent a single log entry. 
-    Comparison between instances is limited to their year, month, day, hour, and minute.
+    Comparison between instances is limited to their year, month, day, hour, and minute:
+    they compare their key, an int counting the minutes of the timestamp, computed once when the
+    timestamp is set, so sorting or putting entries in sets and dicts never formats a string.
+    Entries are compared with entries only, other types get NotImplemented.
+    The attributes live in __slots__, entries have no __dict__.
     Default format for timestamp's string representation and input are stored in static variables: 
     DATE_FORMAT = "%m/%d/%Y",
     TIME_FORMAT = "%H:%M",
@@ -17,24 +23,43 @@ class LogEntry:
         timestamp(datetime.datetime): represent the date and time
         drivetime(float): represent the driving time
         resttime(float): represent the resting time
+        key(int): minutes from timestamp_codec.EPOCH to the timestamp, seconds dropped (read-only),
+            the key SqlManager stores the entry under
     """
+    __slots__ = ("_timestamp", "_key", "drivetime", "resttime")
+    # key function giving the int key of an entry, sorted(entries, key=LogEntry.SORT_KEY) compares ints
+    # directly instead of calling __lt__ for each comparison
+    SORT_KEY = operator.attrgetter("_key")
 
     DATE_FORMAT = "%m/%d/%Y"
     TIME_FORMAT = "%H:%M"
     FORMAT_STR = "%m/%d/%Y %H:%M"
 
-    def __init__(self, timestamp = dt.datetime.now(), drivetime = float(0), resttime = float(0)):
+    def __init__(self, timestamp = None, drivetime = float(0), resttime = float(0)):
         """
         Constructor of the entry, set to the attribute directly.
         Args: 
-            timestamp is an datetime object.
+            timestamp is an datetime object (Default: the current time).
             drivetime is a float (Default: 0.0)
             resttime is a float (Default: 0.0)
         """
-        self.timestamp = timestamp
+        self.timestamp = timestamp if timestamp is not None else dt.datetime.now()
         self.drivetime = float(drivetime)
         self.resttime = float(resttime)
 
+    @property
+    def timestamp(self):
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, timestamp : dt.datetime):
+        self._timestamp = timestamp
+        self._key = timestamp_codec.datetime_to_key(timestamp)
+
+    @property
+    def key(self):
+        return self._key
+
     "Instance Methods"
     def get_timestamp(self):
         """get the datetime.datetime object attribute"""
@@ -50,19 +75,19 @@ class LogEntry:
         """
         Return a string of the time of the entry in the format TIME_FORMAT
         """
-        return self.timestamp.strftime(self.TIME_FORMAT)
+        return timestamp_codec.format_time(self.timestamp)
     
     def get_date_str(self):
         """
         Return a string of the time of the entry in the format DATE_FORMAT
         """
-        return self.timestamp.strftime(self.DATE_FORMAT)
+        return timestamp_codec.format_date(self.timestamp)
     
     def get_timestamp_str(self):
         """
         return a string representation of the entry's attribute timestamp according to the FORMAT_STR.
         """
-        return self.timestamp.strftime(LogEntry.FORMAT_STR)
+        return timestamp_codec.format_datetime(self.timestamp)
 
     def set_timestamp(self, timestamp_str : str):
         """
@@ -76,17 +101,31 @@ class LogEntry:
     
     "Overload operators"
     def __lt__(self, b):
-        return self.get_timestamp_str() < b.get_timestamp_str()
+        if not isinstance(b, LogEntry):
+            return NotImplemented
+        return self._key < b._key
     def __le__(self, b):
-        return self.get_timestamp_str() <= b.get_timestamp_str()
+        if not isinstance(b, LogEntry):
+            return NotImplemented
+        return self._key <= b._key
     def __eq__(self, b):
-        return self.get_timestamp_str() == b.get_timestamp_str()
+        if not isinstance(b, LogEntry):
+            return NotImplemented
+        return self._key == b._key
     def __ne__(self, b):
-        return self.get_timestamp_str() != b.get_timestamp_str()
+        if not isinstance(b, LogEntry):
+            return NotImplemented
+        return self._key != b._key
     def __ge__(self, b):
-        return self.get_timestamp_str() >= b.get_timestamp_str()
+        if not isinstance(b, LogEntry):
+            return NotImplemented
+        return self._key >= b._key
     def __gt__(self, b):
-        return self.get_timestamp_str() > b.get_timestamp_str()
+        if not isinstance(b, LogEntry):
+            return NotImplemented
+        return self._key > b._key
+    def __hash__(self):
+        return hash(self._key)
     def __str__(self):
         return self.get_timestamp_str()
     
@@ -95,14 +134,14 @@ class LogEntry:
         """
         Return a string representation of the timestamp in the format defined by LogEntry
         """
-        return timestamp.strftime(LogEntry.FORMAT_STR)
+        return timestamp_codec.format_datetime(timestamp)
     
     def create_timestamp(timestamp_str : str):
         """
         Use the string to create a datetime object according to LogEntry's format.
         default FORMAT_STR = "%m/%d/%Y %H:%M".
         """
-        return dt.datetime.strptime(timestamp_str.strip(), LogEntry.FORMAT_STR)
+        return timestamp_codec.parse_datetime(timestamp_str, LogEntry.FORMAT_STR)
     
     def from_date_and_time(date : dt.date, time_str="00:00"):
         """Return a log entry object by combining date (datetime.date or datetime.datetime instance) 
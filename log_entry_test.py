@@ -0,0 +1,58 @@
+"""
+Tests of LogEntry comparisons, hashing and its SORT_KEY, all made on the minute key of the timestamp.
+Run with: python -m pytest log_entry_test.py
+"""
+import datetime as dt
+
+import pytest
+
+import timestamp_codec
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+
+def test_key_counts_minutes_from_epoch():
+    assert LogEntry(timestamp_codec.EPOCH).key == 0
+    assert LogEntry(dt.datetime(1969, 12, 31, 23, 59, 59)).key == -1
+    assert LogEntry(dt.datetime(2025, 3, 1, 6, 30)).key == SqlManager.to_key(dt.datetime(2025, 3, 1, 6, 30))
+
+
+def test_setting_timestamp_updates_key():
+    entry = LogEntry(dt.datetime(2025, 3, 1, 6, 30))
+    entry.timestamp = dt.datetime(2025, 3, 1, 6, 31)
+    assert entry.key == SqlManager.to_key(dt.datetime(2025, 3, 1, 6, 31))
+    entry.set_timestamp("12/31/1969 23:59")
+    assert entry.key == -1
+
+
+def test_equality_and_hash_ignore_seconds_and_hours():
+    a = LogEntry(dt.datetime(2025, 3, 1, 6, 30, 5), 8, 10)
+    b = LogEntry(dt.datetime(2025, 3, 1, 6, 30, 59, 999), 1, 2)
+    c = LogEntry(dt.datetime(2025, 3, 1, 6, 31), 8, 10)
+    assert a == b and hash(a) == hash(b)
+    assert a != c and a < c and c > a and a <= b and b >= a
+    assert len({a, b, c}) == 2
+    assert {a: "first"}[b] == "first"
+
+
+def test_other_types_are_not_compared():
+    entry = LogEntry(dt.datetime(2025, 3, 1, 6, 30))
+    assert entry != entry.timestamp
+    assert not entry == entry.key
+    with pytest.raises(TypeError):
+        entry < entry.timestamp
+
+
+def test_sort_key_matches_sorting_by_timestamp():
+    timestamps = [dt.datetime(2025, 3, 1) + dt.timedelta(minutes=m) for m in (97, -3000, 5, 0, 1441, -1)]
+    entries = [LogEntry(t) for t in timestamps]
+    assert [e.timestamp for e in sorted(entries, key=LogEntry.SORT_KEY)] == sorted(timestamps)
+    assert sorted(entries, key=LogEntry.SORT_KEY) == sorted(entries)
+
+
+def test_slots_and_strings():
+    entry = LogEntry(dt.datetime(2025, 3, 1, 6, 5), "8.5", 10)
+    assert not hasattr(entry, "__dict__")
+    assert (entry.drivetime, entry.resttime) == (8.5, 10.0)
+    assert str(entry) == "03/01/2025 06:05"
+    assert (entry.get_date_str(), entry.get_time_str()) == ("03/01/2025", "06:05")
@@ -0,0 +1,262 @@
+# log_export.py
+# Exports the logs of a user database to CSV, JSON-lines, Parquet or a compact binary file,
+# optionally gzipped. Rows are streamed from SqlManager.iter_range() a chunk at a time:
+#     python log_export.py TestingFile.db payroll.csv --start 2025-01-01 --end 2025-03-31
+#     python log_export.py Maya.db audit.jsonl.gz
+#     python log_export.py Maya.db archive.parquet
+# CSV and JSON-lines files use "MM/DD/YYYY HH:MM" timestamps and can be read back by log_import.py.
+
+import argparse
+import array
+import csv
+import gzip
+import io
+import itertools
+import json
+import math
+import pathlib
+import struct
+import sys
+import time
+
+import timestamp_codec
+from sql_manager import SqlManager
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # only Parquet needs pyarrow, export() refuses to write it without
+    pa = None
+    pq = None
+
+FORMATS = ("csv", "jsonl", "parquet", "binary")
+DEFAULT_CHUNK_SIZE = 10000
+GZIP_LEVEL = 6
+# binary format: a header, then blocks of a little-endian uint32 row count followed by the
+# int64 keys, float64 drive times and float64 rest times of the block, ending with an empty block
+BINARY_MAGIC = b"TTLB"
+BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<4sH")
+_BINARY_COUNT = struct.Struct("<I")
+
+
+class ExportReport:
+    """
+    Outcome of an export.
+
+    Attributes:
+        rows(int): number of rows written
+        seconds(float): time spent
+        format(str): format written, one of FORMATS
+    """
+    def __init__(self, fmt):
+        self.format = fmt
+        self.rows = 0
+        self.seconds = 0.0
+
+    def rows_per_second(self):
+        """Returns: the number of rows written per second"""
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.rows} rows as {self.format} in {self.seconds:.2f} s ({self.rows_per_second():.0f} rows/s)"
+
+
+def detect_format(filename):
+    """
+    Returns: one of FORMATS from the extension of filename, a .gz suffix is ignored
+    Raises:
+        ValueError: if the extension is not known
+    """
+    suffixes = [s.lower() for s in pathlib.Path(filename).suffixes if s.lower() != ".gz"]
+    suffix = suffixes[-1] if suffixes else ""
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if suffix == ".parquet":
+        return "parquet"
+    if suffix in (".bin", ".ttlb"):
+        return "binary"
+    raise ValueError(f"Can not tell the format of {filename}, expected one of {FORMATS}")
+
+
+def iter_chunks(sql_manager : SqlManager, start = None, end = None, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Generator over the rows (key, drivetime, resttime) between start and end, chunk_size rows at a time.
+    Yields: lists of at most chunk_size rows, ordered by timestamp
+    """
+    rows = sql_manager.iter_range(start, end, chunk_size=chunk_size, raw=True)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export(sql_manager : SqlManager, filename, fmt = None, start = None, end = None
+           , compress = None, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Write the entries between start and end to filename, holding one chunk of rows in memory at a time.
+    Args:
+        sql_manager: manager of the database to export, a reader works as well
+        filename: file to write
+        fmt: (default to None, from the extension) one of FORMATS
+        start, end: (default to None, no bound) same bounds as SqlManager.iter_range()
+        compress: (default to None, when filename ends with .gz) gzip the file.
+            Parquet files are compressed inside the file instead.
+        chunk_size: (default to DEFAULT_CHUNK_SIZE) number of rows read and written at a time
+    Returns:
+        The ExportReport
+    Raises:
+        ValueError: if the format is unknown
+        RuntimeError: if fmt is "parquet" and pyarrow is not installed
+    """
+    fmt = fmt or detect_format(filename)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("pyarrow is needed to write Parquet files, install it or export to a .bin file")
+    if compress is None:
+        compress = str(filename).lower().endswith(".gz")
+    report = ExportReport(fmt)
+    started = time.perf_counter()
+    chunks = iter_chunks(sql_manager, start, end, chunk_size)
+    if fmt == "parquet":
+        report.rows = _write_parquet(filename, chunks, "gzip" if compress else "snappy")
+    else:
+        # gzip's default level 9 is several times slower than 6 for a few percent smaller files
+        file = gzip.open(filename, "wb", compresslevel=GZIP_LEVEL) if compress else open(filename, "wb")
+        with file:
+            report.rows = _WRITERS[fmt](file, chunks)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def read_binary(filename):
+    """
+    Generator over the rows (key, drivetime, resttime) of a file written in the binary format,
+    gzipped or not, one block in memory at a time.
+    Raises:
+        ValueError: if the file is not in the binary format, or "truncated binary log" if it ends early
+    """
+    with open(filename, "rb") as raw:
+        gzipped = raw.read(2) == b"\x1f\x8b"
+    opener = gzip.open if gzipped else open
+    with opener(filename, "rb") as file:
+        magic, version = _BINARY_HEADER.unpack(_read_exact(file, _BINARY_HEADER.size))
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"{filename} is not a binary log export")
+        while True:
+            (count,) = _BINARY_COUNT.unpack(_read_exact(file, _BINARY_COUNT.size))
+            if count == 0:
+                return
+            columns = []
+            for typecode in ("q", "d", "d"):
+                column = array.array(typecode)
+                column.frombytes(_read_exact(file, count * column.itemsize))
+                if sys.byteorder == "big":
+                    column.byteswap()
+                columns.append(column)
+            yield from zip(*columns)
+
+
+def _read_exact(file, size):
+    """helper function reading size bytes of a binary export, raising ValueError if the file ends before"""
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("truncated binary log")
+    return data
+
+
+def _write_csv(file, chunks):
+    """helper function writing the chunks as CSV rows"""
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(["timestamp", "drivetime", "resttime"])
+    rows = 0
+    format_key = timestamp_codec.format_key
+    for chunk in chunks:
+        writer.writerows([(format_key(k), d, r) for k, d, r in chunk])
+        rows += len(chunk)
+    text.flush()
+    text.detach()
+    return rows
+
+
+def _write_jsonl(file, chunks):
+    """helper function writing the chunks as one JSON object per line"""
+    rows = 0
+    format_key = timestamp_codec.format_key
+    # the object is always the same, so it is formatted directly rather than through json.dumps
+    for chunk in chunks:
+        lines = [f'{{"timestamp": "{format_key(k)}", "drivetime": {_json_number(d)}, "resttime": {_json_number(r)}}}'
+                 for k, d, r in chunk]
+        file.write(("\n".join(lines) + "\n").encode("utf-8"))
+        rows += len(chunk)
+    return rows
+
+
+def _json_number(value):
+    """helper function giving the JSON text of a time read from sqlite"""
+    if value is None:
+        return "null"
+    value = float(value)
+    # repr of a finite float is already valid JSON, json.dumps handles the special values
+    return repr(value) if math.isfinite(value) else json.dumps(value)
+
+
+def _write_binary(file, chunks):
+    """helper function writing the chunks as blocks of little-endian columns, see BINARY_MAGIC"""
+    file.write(_BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION))
+    rows = 0
+    for chunk in chunks:
+        keys, drives, rests = zip(*chunk)
+        file.write(_BINARY_COUNT.pack(len(chunk)))
+        for typecode, values in (("q", keys), ("d", drives), ("d", rests)):
+            # sqlite returns None for missing times, stored as 0
+            column = array.array(typecode, [0 if v is None else v for v in values])
+            if sys.byteorder == "big":
+                column.byteswap()
+            file.write(column.tobytes())
+        rows += len(chunk)
+    file.write(_BINARY_COUNT.pack(0))
+    return rows
+
+
+def _write_parquet(filename, chunks, compression):
+    """helper function writing every chunk as a row group of a Parquet file"""
+    schema = pa.schema([("timestamp", pa.timestamp("s")), ("drivetime", pa.float64()), ("resttime", pa.float64())])
+    rows = 0
+    with pq.ParquetWriter(filename, schema, compression=compression) as writer:
+        for chunk in chunks:
+            keys, drives, rests = zip(*chunk)
+            writer.write_batch(pa.record_batch([
+                pa.array([k * 60 for k in keys], type=pa.timestamp("s")),
+                pa.array(drives, type=pa.float64()),
+                pa.array(rests, type=pa.float64()),
+            ], schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+# format -> helper function writing the chunks to a binary file object, Parquet writes the file itself
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "binary": _write_binary}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the logs of a user database.")
+    parser.add_argument("database", help="sqlite database file of the user")
+    parser.add_argument("output", help="file to write, the format comes from its extension (.csv, .jsonl, "
+                                       ".parquet, .bin), add .gz to compress it")
+    parser.add_argument("--format", choices=FORMATS, help="format of the file, overrides the extension")
+    parser.add_argument("--start", help="first day to export, YYYY-MM-DD")
+    parser.add_argument("--end", help="last day to export, YYYY-MM-DD")
+    parser.add_argument("--gzip", action="store_true", help="compress the file even without a .gz extension")
+    args = parser.parse_args()
+
+    manager = SqlManager(args.database, read_only=True)
+    try:
+        report = export(manager, args.output, args.format, args.start, args.end, compress=args.gzip or None)
+    finally:
+        manager.close()
+    print(f"{args.output}: {report}")
@@ -0,0 +1,88 @@
+"""
+Tests of log_export.py: every format read back, gzipped or not, and truncated binary files.
+Run with: python -m pytest log_export_test.py
+"""
+import datetime as dt
+import gzip
+
+import pytest
+
+import log_export
+import log_import
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+ENTRIES = [LogEntry(dt.datetime(1969, 12, 31, 23, 59), 1.25, 2.0)] + [
+    LogEntry(dt.datetime(2025, 1, 1, 6, 0) + dt.timedelta(hours=13 * i), i % 12, 10.5) for i in range(40)]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    manager.add_entries(ENTRIES)
+    yield manager
+    manager.close()
+
+
+def rows(manager):
+    return list(manager.iter_range(raw=True))
+
+
+@pytest.mark.parametrize("name", ["logs.csv", "logs.csv.gz", "logs.jsonl", "logs.jsonl.gz"])
+def test_text_round_trip(manager, tmp_path, name):
+    target = tmp_path / name
+    report = log_export.export(manager, target, chunk_size=7)
+    assert report.rows == len(ENTRIES)
+    assert report.format == log_import.detect_format(name)
+    copy = SqlManager(str(tmp_path / "copy.db"))
+    try:
+        imported = log_import.import_file(copy, target)
+        assert (imported.imported, imported.rejected) == (len(ENTRIES), 0)
+        assert rows(copy) == rows(manager)
+    finally:
+        copy.close()
+
+
+@pytest.mark.parametrize("name", ["logs.bin", "logs.bin.gz"])
+def test_binary_round_trip(manager, tmp_path, name):
+    target = tmp_path / name
+    log_export.export(manager, target, chunk_size=7)
+    with open(target, "rb") as file:
+        assert (file.read(2) == b"\x1f\x8b") == name.endswith(".gz")
+    assert list(log_export.read_binary(target)) == rows(manager)
+
+
+def test_export_range(manager, tmp_path):
+    target = tmp_path / "days.csv"
+    report = log_export.export(manager, target, start="2025-01-02", end="2025-01-03")
+    assert report.rows == 4
+    assert target.read_text().splitlines() == [
+        "timestamp,drivetime,resttime", "01/02/2025 08:00,2.0,10.5", "01/02/2025 21:00,3.0,10.5"
+        , "01/03/2025 10:00,4.0,10.5", "01/03/2025 23:00,5.0,10.5"]
+
+
+@pytest.mark.parametrize("cut", [3, 6, 9, 20, -9, -1])
+def test_truncated_binary(manager, tmp_path, cut):
+    target = tmp_path / "logs.bin"
+    log_export.export(manager, target)
+    data = target.read_bytes()
+    target.write_bytes(data[:cut])
+    with pytest.raises(ValueError, match="truncated binary log"):
+        list(log_export.read_binary(target))
+
+
+def test_not_a_binary_export(tmp_path):
+    target = tmp_path / "logs.bin"
+    with gzip.open(target, "wb") as file:
+        file.write(b"PK\x03\x04 not a log")
+    with pytest.raises(ValueError, match="not a binary log export"):
+        list(log_export.read_binary(target))
+
+
+def test_parquet_needs_pyarrow(manager, tmp_path):
+    assert log_export.detect_format("logs.parquet") == "parquet"
+    if log_export.pq is not None:
+        pytest.skip("pyarrow is installed")
+    with pytest.raises(RuntimeError):
+        log_export.export(manager, tmp_path / "logs.parquet")
+    assert not (tmp_path / "logs.parquet").exists()
@@ -0,0 +1,272 @@
+# log_import.py
+# Imports historical logs from CSV or JSON-lines files (optionally gzipped) into a user database.
+# Rows are streamed, validated a batch at a time like the Daily Log form does and inserted in large transactions:
+#     python log_import.py TestingFile.db old_logs.csv --rejects rejected.csv
+#     python log_import.py Maya.db 2019.jsonl.gz
+# CSV files need a header naming the columns timestamp (or date and time), drivetime and resttime,
+# JSON lines are objects with the same keys. Timestamps are "MM/DD/YYYY HH:MM".
+
+import argparse
+import csv
+import gzip
+import json
+import pathlib
+import time
+
+import timestamp_codec
+import validation
+from sql_manager import SqlManager
+
+FORMATS = ("csv", "jsonl")
+DEFAULT_BATCH_SIZE = 10000
+# normalized column name -> field, headers are compared lower case without blanks or underscores
+COLUMN_ALIASES = {
+    "timestamp": "timestamp",
+    "date": "date",
+    "time": "time",
+    "drivetime": "drivetime",
+    "drivingtime": "drivetime",
+    "driving": "drivetime",
+    "resttime": "resttime",
+    "restingtime": "resttime",
+    "resting": "resttime",
+}
+
+
+class ImportReport:
+    """
+    Progress and outcome of an import, updated after every batch.
+
+    Attributes:
+        read(int): number of records read so far
+        imported(int): number of rows inserted
+        duplicates(int): number of valid rows ignored because their timestamp was already stored
+        rejected(int): number of invalid records
+        seconds(float): time spent so far
+        rejects(list): (line number, reason) of the first MAX_KEPT_REJECTS invalid records
+    """
+    MAX_KEPT_REJECTS = 100
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.seconds = 0.0
+        self.rejects = []
+
+    def rows_per_second(self):
+        """Returns: the number of records read per second"""
+        return self.read / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.read} read, {self.imported} imported, {self.duplicates} duplicate(s), "
+                f"{self.rejected} rejected in {self.seconds:.1f} s ({self.rows_per_second():.0f} rows/s)")
+
+
+def detect_format(filename):
+    """
+    Returns: "csv" or "jsonl" from the extension of filename, a .gz suffix is ignored
+    Raises:
+        ValueError: if the extension is not known
+    """
+    suffixes = [s.lower() for s in pathlib.Path(filename).suffixes if s.lower() != ".gz"]
+    if suffixes and suffixes[-1] == ".csv":
+        return "csv"
+    if suffixes and suffixes[-1] in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"Can not tell the format of {filename}, expected one of {FORMATS}")
+
+
+def open_text(filename):
+    """Open a text file for reading, decompressing it if its name ends with .gz"""
+    if str(filename).lower().endswith(".gz"):
+        return gzip.open(filename, "rt", encoding="utf-8", newline="")
+    return open(filename, "r", encoding="utf-8", newline="")
+
+
+def read_records(file, fmt):
+    """
+    Generator over the records of an open file, one at a time.
+    Yields:
+        (line number, record) where record is a dictionary from field (see COLUMN_ALIASES) to raw value,
+        or None for a line that could not be read at all
+    Raises:
+        ValueError: if a CSV header has no usable columns
+    """
+    if fmt == "jsonl":
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                yield number, None
+                continue
+            if not isinstance(obj, dict):
+                yield number, None
+                continue
+            yield number, {COLUMN_ALIASES.get(_normalize(k)): v for k, v in obj.items()}
+        return
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [COLUMN_ALIASES.get(_normalize(name)) for name in header]
+    if "drivetime" not in fields or "resttime" not in fields:
+        raise ValueError(f"CSV header {header} has no drivetime and resttime columns")
+    for row in reader:
+        if not row:
+            continue
+        yield reader.line_num, dict(zip(fields, row))
+
+
+def parse_record(record):
+    """
+    Validate a record and convert it to a row of the logs table, see parse_records().
+    Returns:
+        (key, drivetime, resttime)
+    Raises:
+        ValueError: with the reason if the record is invalid
+    """
+    rows, rejects = parse_records([(0, record)])
+    if rejects:
+        raise ValueError(rejects[0][1])
+    return rows[0]
+
+
+def parse_records(records):
+    """
+    Validate a batch of records at once and convert the valid ones to rows of the logs table.
+    The columns of the batch go through validation.validate_columns(): dates and times must exist
+    and the driving and resting times must be hours between 0 and validation.MAX_HOURS
+    and validation.MAX_REST_HOURS.
+    Args:
+        records: list of (line number, record) as read_records() yields them
+    Returns:
+        (rows, rejects) where rows are the (key, drivetime, resttime) of the valid records
+        and rejects the (line number, reason, record) of the invalid ones
+    """
+    columns = [_fields(record) for _, record in records]
+    dates, times, drivetimes, resttimes = zip(*columns) if columns else ((), (), (), ())
+    codes = validation.validate_columns(dates, times, drivetimes, resttimes)
+    rows = []
+    rejects = []
+    parse_key = timestamp_codec.parse_key
+    for (number, record), code, date, clock, drive, rest in zip(records, codes, dates, times, drivetimes, resttimes):
+        if record is None:
+            rejects.append((number, "unreadable line", record))
+        elif code:
+            value = {validation.BAD_TIME_FORMAT: clock, validation.BAD_TIME: clock
+                     , validation.BAD_DRIVETIME: drive, validation.BAD_RESTTIME: rest}.get(code, date)
+            rejects.append((number, f"{validation.message(code)}: {value!r}", record))
+        else:
+            rows.append((parse_key(date, clock), float(drive), float(rest)))
+    return rows, rejects
+
+
+def import_file(sql_manager : SqlManager, filename, fmt = None, batch_size = DEFAULT_BATCH_SIZE
+                , progress = None, rejects_file = None):
+    """
+    Stream the records of filename into the database of sql_manager.
+    Valid rows are inserted batch_size at a time, each batch in one transaction, so memory stays
+    bounded by the batch size whatever the size of the file. Rows whose timestamp is already stored
+    are ignored, the same way SqlManager.add_entry does.
+    Args:
+        sql_manager: manager of the database to import into
+        filename: CSV or JSON-lines file, optionally gzipped
+        fmt: (default to None, from the extension) one of FORMATS
+        batch_size: (default to DEFAULT_BATCH_SIZE) number of records validated and inserted per transaction
+        progress: (default to None) function called with the ImportReport after every batch
+        rejects_file: (default to None) CSV file receiving every rejected record with its line and reason
+    Returns:
+        The ImportReport
+    Raises:
+        ValueError: if the format is unknown or a CSV file has no usable header
+    """
+    fmt = fmt or detect_format(filename)
+    report = ImportReport()
+    started = time.perf_counter()
+    rejects_out = None
+    rejects_writer = None
+    if rejects_file is not None:
+        rejects_out = open(rejects_file, "w", encoding="utf-8", newline="")
+        rejects_writer = csv.writer(rejects_out)
+        rejects_writer.writerow(["line", "reason", "record"])
+    try:
+        with open_text(filename) as file:
+            records = []
+            for record in read_records(file, fmt):
+                records.append(record)
+                if len(records) >= batch_size:
+                    _import_batch(sql_manager, records, report, started, progress, rejects_writer)
+                    records = []
+            if records:
+                _import_batch(sql_manager, records, report, started, progress, rejects_writer)
+    finally:
+        if rejects_out is not None:
+            rejects_out.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _import_batch(sql_manager, records, report, started, progress, rejects_writer):
+    """helper function validating a batch of records, inserting its rows in one transaction and reporting progress"""
+    rows, rejects = parse_records(records)
+    report.read += len(records)
+    report.rejected += len(rejects)
+    for number, reason, record in rejects:
+        if len(report.rejects) < report.MAX_KEPT_REJECTS:
+            report.rejects.append((number, reason))
+        if rejects_writer is not None:
+            rejects_writer.writerow([number, reason, json.dumps(record, default=str)])
+    if rows:
+        with sql_manager.batch():
+            inserted = sql_manager.add_rows(rows)
+        report.imported += inserted
+        report.duplicates += len(rows) - inserted
+    report.seconds = time.perf_counter() - started
+    if progress is not None:
+        progress(report)
+
+
+def _fields(record):
+    """helper function giving the raw (date, time, drivetime, resttime) of a record, all None for an unreadable one"""
+    if record is None:
+        return None, None, None, None
+    if record.get("timestamp") is not None:
+        parts = str(record["timestamp"]).split()
+        date, clock = parts if len(parts) == 2 else (str(record["timestamp"]), "")
+    else:
+        date, clock = str(record.get("date") or "").strip(), str(record.get("time") or "").strip()
+    return date, clock, record.get("drivetime"), record.get("resttime")
+
+
+def _normalize(name):
+    """helper function normalizing a column name for COLUMN_ALIASES"""
+    return str(name).strip().lower().replace(" ", "").replace("_", "")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import logs from CSV or JSON-lines files into a user database.")
+    parser.add_argument("database", help="sqlite database file of the user, created if missing")
+    parser.add_argument("files", nargs="+", help="CSV or JSON-lines files, optionally gzipped")
+    parser.add_argument("--format", choices=FORMATS, help="format of the files, from their extension by default")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--rejects", help="CSV file listing the rejected records")
+    args = parser.parse_args()
+
+    manager = SqlManager(args.database, profile="fast")
+    try:
+        for filename in args.files:
+            rejects = args.rejects
+            if rejects is not None and len(args.files) > 1:
+                rejects = f"{pathlib.Path(filename).stem}.{rejects}"
+            report = import_file(manager, filename, args.format, args.batch_size
+                                 , progress=lambda r: print(f"\r{filename}: {r}", end="", flush=True)
+                                 , rejects_file=rejects)
+            print(f"\r{filename}: {report}")
+            for number, reason in report.rejects[:10]:
+                print(f"    line {number}: {reason}")
+    finally:
+        manager.close()
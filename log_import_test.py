@@ -0,0 +1,85 @@
+"""
+Tests of log_import.py: CSV and JSON-lines files, gzipped or not, with rejected and duplicate records.
+Run with: python -m pytest log_import_test.py
+"""
+import csv
+import datetime as dt
+import gzip
+
+import pytest
+
+import log_import
+from sql_manager import SqlManager
+
+CSV_TEXT = """Date,Time,Driving Time,Resting Time
+03/01/2025,06:00,8,10
+03/02/2025,06:30,8.5,11
+02/30/2025,06:00,8,10
+03/03/2025,25:00,8,10
+03/04/2025,06:00,30,10
+03/05/2025,06:00,eight,10
+
+03/01/2025,06:00,9,9
+"""
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    yield manager
+    manager.close()
+
+
+def stored(manager):
+    return [(SqlManager.to_timestamp(k), d, r) for k, d, r in manager.iter_range(raw=True)]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 1000])
+def test_csv_import_with_rejects_and_duplicates(manager, tmp_path, batch_size):
+    source = tmp_path / "old.csv"
+    source.write_text(CSV_TEXT)
+    rejects = tmp_path / "rejects.csv"
+    progress = []
+    report = log_import.import_file(manager, source, batch_size=batch_size, progress=progress.append
+                                    , rejects_file=rejects)
+    assert (report.read, report.imported, report.duplicates, report.rejected) == (7, 2, 1, 4)
+    assert len(progress) == -(-7 // batch_size)
+    assert stored(manager) == [(dt.datetime(2025, 3, 1, 6, 0), 8.0, 10.0), (dt.datetime(2025, 3, 2, 6, 30), 8.5, 11.0)]
+    assert [number for number, _ in report.rejects] == [4, 5, 6, 7]
+    assert report.rejects[0][1] == "date does not exist: '02/30/2025'"
+    assert report.rejects[1][1] == "time does not exist: '25:00'"
+    with open(rejects, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["line", "reason", "record"]
+    assert [r[0] for r in rows[1:]] == ["4", "5", "6", "7"]
+
+
+def test_gzipped_jsonl_import(manager, tmp_path):
+    source = tmp_path / "2019.jsonl.gz"
+    with gzip.open(source, "wt", encoding="utf-8") as file:
+        file.write('{"timestamp": "01/02/2019 07:05", "drivetime": 7.5, "resttime": 10}\n')
+        file.write('{"date": "01/03/2019", "time": "07:05", "driving_time": "6", "resting_time": "12"}\n')
+        file.write("not json\n")
+        file.write("[1, 2, 3]\n")
+        file.write('{"timestamp": "1/4/2019 7:05", "drivetime": 1, "resttime": 1}\n')
+    report = log_import.import_file(manager, source)
+    assert (report.read, report.imported, report.rejected) == (5, 2, 3)
+    assert [reason for _, reason in report.rejects][:2] == ["unreadable line", "unreadable line"]
+    assert stored(manager) == [(dt.datetime(2019, 1, 2, 7, 5), 7.5, 10.0), (dt.datetime(2019, 1, 3, 7, 5), 6.0, 12.0)]
+
+
+def test_detect_format_and_bad_header(tmp_path):
+    assert log_import.detect_format("a.CSV.gz") == "csv"
+    assert log_import.detect_format("a.ndjson") == "jsonl"
+    with pytest.raises(ValueError):
+        log_import.detect_format("a.txt")
+    source = tmp_path / "bad.csv"
+    source.write_text("when,how long\n03/01/2025 06:00,8\n")
+    with log_import.open_text(source) as file, pytest.raises(ValueError):
+        list(log_import.read_records(file, "csv"))
+
+
+def test_parse_record():
+    assert log_import.parse_record({"timestamp": "12/31/1969 23:59", "drivetime": "1", "resttime": 2}) == (-1, 1.0, 2.0)
+    with pytest.raises(ValueError, match="driving time"):
+        log_import.parse_record({"timestamp": "12/31/1969 23:59", "drivetime": "-1", "resttime": 2})
@@ -0,0 +1,113 @@
+"""
+Vectorized statistics over the columns returned by SqlManager.get_columns().
+Every function works on whole NumPy arrays at once, with no Python loop over the entries.
+"""
+import numpy as np
+from sql_manager import SqlManager
+
+DEFAULT_PERCENTILES = (50, 90, 95)
+
+
+def per_day(minutes, drivetime, resttime):
+    """
+    Total the drive and rest times of the entries of each day.
+    Args:
+        minutes, drivetime, resttime: columns as returned by SqlManager.get_columns()
+    Returns:
+        A tuple of arrays (days, drive totals, rest totals) for every day that has entries,
+        days are numbered from SqlManager.EPOCH and sorted
+    """
+    days, index = np.unique(minutes // 1440, return_inverse=True)
+    return (days, np.bincount(index, weights=drivetime, minlength=len(days))
+            , np.bincount(index, weights=resttime, minlength=len(days)))
+
+
+def calendar_days(days, totals):
+    """
+    Spread per-day totals over every calendar day from the first to the last one, days without entries
+    counting as 0, so that rolling windows cover calendar days rather than days with entries.
+    Returns:
+        A tuple of arrays (every day from days[0] to days[-1], totals of each day)
+    """
+    if len(days) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    full = np.zeros(days[-1] - days[0] + 1)
+    full[days - days[0]] = totals
+    return np.arange(days[0], days[-1] + 1), full
+
+
+def rolling_mean(values, window):
+    """
+    Mean of every run of window consecutive values, computed with a cumulative sum.
+    Returns:
+        An array of len(values) - window + 1 means, empty if there are fewer values than window
+    Raises:
+        ValueError: if window is not positive
+    """
+    if window <= 0:
+        raise ValueError("window must be positive")
+    if len(values) < window:
+        return np.empty(0)
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def percentiles(values, q = DEFAULT_PERCENTILES):
+    """
+    Returns: a dictionary from each percentile of q to its value, None for every one if values is empty
+    """
+    if len(values) == 0:
+        return {p: None for p in q}
+    return dict(zip(q, np.percentile(values, q).tolist()))
+
+
+def ratio_distribution(drivetime, resttime, bins = 10, max_ratio = 4.0):
+    """
+    Histogram of the drive/rest ratio of the entries that have rest time.
+    Ratios above max_ratio are counted in the last bin.
+    Returns:
+        A tuple of arrays (counts, bin edges), as numpy.histogram does
+    """
+    rested = resttime > 0
+    ratios = np.minimum(drivetime[rested] / resttime[rested], max_ratio)
+    return np.histogram(ratios, bins=bins, range=(0, max_ratio))
+
+
+def summarize(minutes, drivetime, resttime, window = 7):
+    """
+    Compute the statistics shown by the Analytics page for a range of entries.
+    Args:
+        minutes, drivetime, resttime: columns as returned by SqlManager.get_columns()
+        window: (default to 7) number of calendar days of the rolling average
+    Returns:
+        A dictionary with:
+            "entries", "days": number of entries and of days with entries
+            "mean_daily_drive": average drive time of the days with entries (None without entries)
+            "daily_drive_percentiles": percentiles of the daily drive totals, see percentiles()
+            "rolling_drive": rolling mean of the daily drive totals over window calendar days
+            "latest_rolling_drive": last value of rolling_drive, None if the range is shorter than window
+            "ratio_percentiles": percentiles of the drive/rest ratio of the entries with rest time
+            "ratio_histogram": see ratio_distribution()
+    """
+    days, daily_drive, daily_rest = per_day(minutes, drivetime, resttime)
+    rolling = rolling_mean(calendar_days(days, daily_drive)[1], window)
+    rested = resttime > 0
+    return {
+        "entries": len(minutes),
+        "days": len(days),
+        "mean_daily_drive": float(daily_drive.mean()) if len(days) else None,
+        "daily_drive_percentiles": percentiles(daily_drive),
+        "rolling_drive": rolling,
+        "latest_rolling_drive": float(rolling[-1]) if len(rolling) else None,
+        "ratio_percentiles": percentiles(drivetime[rested] / resttime[rested]),
+        "ratio_histogram": ratio_distribution(drivetime, resttime),
+    }
+
+
+def summarize_range(sql_manager : SqlManager, start = None, end = None, window = 7):
+    """
+    Read the entries between start and end as columns and summarize() them.
+    Args:
+        start, end: (default to None, no bound) same bounds as SqlManager.iter_range()
+    """
+    return summarize(*sql_manager.get_columns(start, end), window=window)
@@ -1,5 +1,6 @@
 import customtkinter as ctk
-from Analytics import AnalyticsPage   # or from Analytics import AnalyticsPage if you renamed
+from analytics import AnalyticsPage
+from sql_manager import SqlManager
 
 if __name__ == "__main__":
     ctk.set_appearance_mode("light")
@@ -15,6 +16,8 @@ if __name__ == "__main__":
         font=("Arial", 24)
     )
     header.pack(pady=20)  # font name and size
-    page = AnalyticsPage(root, "truck_time_logs.db")
+    manager = SqlManager("truck_time_logs.db")
+    page = AnalyticsPage(root, manager)
     page.pack(fill="both", expand=True)
     root.mainloop()
+    manager.close()
@@ -0,0 +1,59 @@
+# migrate_logs.py
+# Upgrades user database files to the current SqlManager schema in place.
+# Opening a file with SqlManager already migrates it, this script lets it be done ahead of time:
+#     python migrate_logs.py truck_time_logs.db TestingFile.db
+
+import argparse
+import pathlib
+import sqlite3
+
+from sql_manager import SqlManager
+
+
+def migrate(filename):
+    """
+    Open filename with SqlManager, which migrates it to SqlManager.SCHEMA_VERSION if needed.
+    Returns:
+        a tuple (version before, number of log rows, number of rows this run moved to logs_quarantine)
+    Raises:
+        FileNotFoundError: if filename does not exist, a mistyped name must not create an empty database
+    """
+    path = pathlib.Path(filename)
+    if not path.is_file():
+        raise FileNotFoundError(f"{filename} does not exist")
+    con = sqlite3.connect(f"{path.resolve().as_uri()}?mode=rw", uri=True)
+    try:
+        before = con.execute("PRAGMA user_version").fetchone()[0]
+        quarantined_before = _quarantined(con.cursor())
+    finally:
+        con.close()
+
+    manager = SqlManager(filename)
+    try:
+        rows = manager.cur.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+        quarantined = _quarantined(manager.cur) - quarantined_before
+    finally:
+        manager.close()
+    return before, rows, quarantined
+
+
+def _quarantined(cur):
+    """helper function counting the rows of logs_quarantine, 0 without the table"""
+    if cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs_quarantine'").fetchone() is None:
+        return 0
+    return cur.execute("SELECT COUNT(*) FROM logs_quarantine").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate user database files to the current schema.")
+    parser.add_argument("files", nargs="+", help="sqlite database files to migrate")
+    args = parser.parse_args()
+
+    for filename in args.files:
+        try:
+            before, rows, quarantined = migrate(filename)
+        except (OSError, sqlite3.Error) as e:
+            print(f"{filename}: {e}")
+            continue
+        print(f"{filename}: schema {before} -> {SqlManager.SCHEMA_VERSION}, "
+              f"{rows} log(s), {quarantined} row(s) moved to logs_quarantine")
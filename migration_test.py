@@ -0,0 +1,126 @@
+"""
+Tests of the in-place migration of legacy user databases, whose logs table is keyed by TEXT timestamps,
+to the current SqlManager schema. Every test works on a fixture file created in a temporary folder.
+Run with: python -m pytest migration_test.py
+"""
+import datetime as dt
+import sqlite3
+
+import pytest
+
+import migrate_logs
+from sql_manager import SqlManager
+
+# rows of a legacy file: both timestamp formats, a malformed timestamp and the same minute in both formats
+LEGACY_ROWS = [
+    ("2025/01/02 10:00", 8.0, 10.0),
+    ("2025/01/03 06:30", 5.5, 11.0),
+    ("01/04/2025 07:15", 9.0, 10.0),
+    ("12/31/2024 23:59", 2.0, 3.0),
+    ("not a timestamp", 1.0, 1.0),
+    ("01/02/2025 10:00", 4.0, 4.0),
+]
+
+
+def make_legacy_file(path, rows = LEGACY_ROWS):
+    """Create a schema 0 file the way the first versions of the application did."""
+    con = sqlite3.connect(path)
+    con.execute("""CREATE TABLE logs(
+                timestamp TEXT PRIMARY KEY,
+                drivetime FLOAT,
+                resttime FLOAT)""")
+    con.execute("CREATE INDEX idx_timestamp ON logs(timestamp)")
+    con.executemany("INSERT INTO logs VALUES(?, ?, ?)", rows)
+    con.commit()
+    con.close()
+    return str(path)
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    return make_legacy_file(tmp_path / "legacy.db")
+
+
+def test_migration_keeps_readable_rows(legacy_file):
+    manager = SqlManager(legacy_file)
+    try:
+        assert manager.cur.execute("PRAGMA user_version").fetchone()[0] == SqlManager.SCHEMA_VERSION
+        rows = manager.get_time_data_between_dates("2024-01-01", "2025-12-31")
+        assert rows == [
+            (dt.datetime(2024, 12, 31, 23, 59), 2.0, 3.0),
+            (dt.datetime(2025, 1, 2, 10, 0), 8.0, 10.0),
+            (dt.datetime(2025, 1, 3, 6, 30), 5.5, 11.0),
+            (dt.datetime(2025, 1, 4, 7, 15), 9.0, 10.0),
+        ]
+        assert manager.cur.execute("SELECT typeof(timestamp), COUNT(*) FROM logs GROUP BY 1").fetchall() == [
+            ("integer", 4)]
+    finally:
+        manager.close()
+
+
+def test_migration_quarantines_malformed_and_duplicate_rows(legacy_file):
+    manager = SqlManager(legacy_file)
+    try:
+        quarantined = manager.cur.execute("SELECT * FROM logs_quarantine ORDER BY reason").fetchall()
+    finally:
+        manager.close()
+    # the YYYY/MM/DD row was inserted first, so it is the one kept
+    assert quarantined == [
+        ("01/02/2025 10:00", 4.0, 4.0, "duplicate timestamp"),
+        ("not a timestamp", 1.0, 1.0, "unreadable timestamp"),
+    ]
+
+
+def test_migration_fills_consistent_rollups(legacy_file):
+    manager = SqlManager(legacy_file)
+    try:
+        assert manager.verify_rollups() == {"daily_totals": [], "monthly_totals": []}
+        assert manager.get_totals()["entries"] == 4
+        # the triggers keep the rollups right after the migration
+        manager.delete_entry(dt.datetime(2025, 1, 2, 10, 0))
+        assert manager.verify_rollups() == {"daily_totals": [], "monthly_totals": []}
+    finally:
+        manager.close()
+
+
+def test_migration_drops_legacy_index_and_is_done_once(legacy_file):
+    SqlManager(legacy_file).close()
+    manager = SqlManager(legacy_file)
+    try:
+        indexes = manager.cur.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'logs'"
+                                      ).fetchall()
+        assert indexes == []
+        assert manager.cur.execute("SELECT COUNT(*) FROM logs_quarantine").fetchone()[0] == 2
+        assert manager.count_entries() == 4
+    finally:
+        manager.close()
+
+
+def test_read_only_refuses_legacy_file(legacy_file):
+    with pytest.raises(sqlite3.DatabaseError):
+        SqlManager(legacy_file, read_only=True)
+
+
+def test_migration_of_empty_legacy_file(tmp_path):
+    manager = SqlManager(make_legacy_file(tmp_path / "empty.db", rows=[]))
+    try:
+        assert manager.count_entries() == 0
+        assert manager.verify_rollups() == {"daily_totals": [], "monthly_totals": []}
+        has_quarantine = manager.cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'logs_quarantine'"
+                                             ).fetchone()
+        assert has_quarantine is None
+    finally:
+        manager.close()
+
+
+def test_migrate_logs_reports_rows_moved_by_this_run(legacy_file):
+    assert migrate_logs.migrate(legacy_file) == (0, 4, 2)
+    # the rows quarantined by the first run are not reported again
+    assert migrate_logs.migrate(legacy_file) == (SqlManager.SCHEMA_VERSION, 4, 0)
+
+
+def test_migrate_logs_does_not_create_missing_file(tmp_path):
+    missing = tmp_path / "mistyped.db"
+    with pytest.raises(FileNotFoundError):
+        migrate_logs.migrate(str(missing))
+    assert not missing.exists()
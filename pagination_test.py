@@ -0,0 +1,71 @@
+"""
+Tests of the keyset pagination of SqlManager.get_timestamps_page() and get_entries_page().
+Run with: python -m pytest pagination_test.py
+"""
+import datetime as dt
+
+import pytest
+
+from log_entry import LogEntry
+from sql_manager import SqlManager
+
+# 25 entries, one every 7 hours, the first one before EPOCH
+TIMESTAMPS = [dt.datetime(1969, 12, 30, 1, 0) + dt.timedelta(hours=7 * i) for i in range(25)]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    manager.add_entries([LogEntry(t, i % 12, 10) for i, t in enumerate(TIMESTAMPS)])
+    yield manager
+    manager.close()
+
+
+def all_pages(manager, limit, **kwargs):
+    pages = []
+    token = None
+    while True:
+        page, token = manager.get_timestamps_page(after=token, limit=limit, **kwargs)
+        pages.append(page)
+        if token is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 4, 5, 24, 25, 100])
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_cover_every_timestamp_once(manager, limit, descending):
+    pages = all_pages(manager, limit, descending=descending)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+    assert sum(pages, []) == sorted(TIMESTAMPS, reverse=descending)
+
+
+def test_pages_within_range(manager):
+    start, end = TIMESTAMPS[3], TIMESTAMPS[13]
+    pages = all_pages(manager, 3, start=start, end=end)
+    assert sum(pages, []) == TIMESTAMPS[13:2:-1]
+
+
+def test_after_datetime_and_offset(manager):
+    page, token = manager.get_timestamps_page(after=TIMESTAMPS[10], limit=3, descending=False)
+    assert page == TIMESTAMPS[11:14]
+    assert token == SqlManager.to_key(TIMESTAMPS[13])
+    page, _ = manager.get_timestamps_page(limit=3, offset=6)
+    assert page == TIMESTAMPS[18:15:-1]
+
+
+def test_entries_page_matches_timestamps_page(manager):
+    entries, token = manager.get_entries_page(limit=10)
+    timestamps, same_token = manager.get_timestamps_page(limit=10)
+    assert [e.timestamp for e in entries] == timestamps
+    assert token == same_token
+    assert entries[0] == manager.get_entry(TIMESTAMPS[-1])
+    assert (entries[0].drivetime, entries[0].resttime) == (24 % 12, 10)
+
+
+def test_empty_database_has_one_empty_page(tmp_path):
+    manager = SqlManager(str(tmp_path / "empty.db"))
+    try:
+        assert manager.get_timestamps_page() == ([], None)
+    finally:
+        manager.close()
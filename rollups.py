@@ -0,0 +1,30 @@
+# rollups.py
+# Checks or rebuilds the daily_totals and monthly_totals summary tables of user database files.
+#     python rollups.py verify truck_time_logs.db TestingFile.db
+#     python rollups.py rebuild truck_time_logs.db
+
+import argparse
+
+from sql_manager import SqlManager
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify or rebuild the rollup tables of user database files.")
+    parser.add_argument("command", choices=["verify", "rebuild"]
+                        , help="verify: report buckets that differ from the logs, rebuild: recompute them")
+    parser.add_argument("files", nargs="+", help="sqlite database files")
+    args = parser.parse_args()
+
+    for filename in args.files:
+        # opening the file creates and fills the rollup tables if it is older than them
+        manager = SqlManager(filename)
+        if args.command == "rebuild":
+            manager.rebuild_rollups()
+            print(f"{filename}: rollups rebuilt")
+        else:
+            for table, buckets in manager.verify_rollups().items():
+                if buckets:
+                    print(f"{filename}: {table} has {len(buckets)} wrong bucket(s): {buckets[:10]}")
+                else:
+                    print(f"{filename}: {table} is up to date")
+        manager.close()
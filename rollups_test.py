@@ -0,0 +1,65 @@
+"""
+Tests of the daily_totals and monthly_totals rollups kept by the triggers of SqlManager.
+Run with: python -m pytest rollups_test.py
+"""
+import datetime as dt
+
+import pytest
+
+import validation
+from log_batch import LogBatch
+from sql_manager import SqlManager
+
+CLEAN = {"daily_totals": [], "monthly_totals": []}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SqlManager(str(tmp_path / "user.db"))
+    yield manager
+    manager.close()
+
+
+def test_key_before_epoch_is_in_its_own_day(manager):
+    key = SqlManager.to_key(dt.datetime(1969, 12, 31, 23, 59))
+    manager.add_rows([(key, 1.0, 2.0)])
+    assert manager.cur.execute("SELECT bucket, entries FROM daily_totals").fetchall() == [(-1, 1)]
+    assert manager.cur.execute("SELECT bucket FROM monthly_totals").fetchall() == [(1969 * 12 + 11,)]
+    assert manager.verify_rollups() == CLEAN
+
+
+def test_keys_out_of_range_are_rejected(manager):
+    rows = [(0, 1.0, 1.0), (validation.MAX_KEY + 1, 1.0, 1.0)]
+    with pytest.raises(ValueError):
+        manager.add_rows(rows)
+    with pytest.raises(ValueError):
+        manager.write_batch(LogBatch.from_rows([(2**62, 1.0, 1.0)]))
+    assert manager.count_entries() == 0
+
+
+def test_key_without_month_gets_no_bucket(manager):
+    # written around the checks of the manager, as an older version could
+    manager.cur.execute("INSERT INTO logs VALUES(?, 1, 1)", (2**62,))
+    manager.add_rows([(600, 1.0, 2.0)])
+    assert manager.cur.execute("SELECT COUNT(*) FROM monthly_totals").fetchone()[0] == 1
+    assert manager.verify_rollups() == CLEAN
+    manager.cur.execute("DELETE FROM logs WHERE timestamp = ?", (2**62,))
+    manager.rebuild_rollups()
+    assert manager.verify_rollups() == CLEAN
+
+
+def test_upgrade_refills_truncated_day_buckets(tmp_path):
+    filename = str(tmp_path / "old.db")
+    manager = SqlManager(filename)
+    manager.add_rows([(-1, 1.0, 2.0)])
+    # the bucket a schema 4 trigger gave it, truncated toward zero
+    manager.cur.execute("UPDATE daily_totals SET bucket = 0")
+    manager.cur.execute("PRAGMA user_version = 4")
+    manager.con.commit()
+    manager.close()
+    manager = SqlManager(filename)
+    try:
+        assert manager.cur.execute("SELECT bucket FROM daily_totals").fetchall() == [(-1,)]
+        assert manager.verify_rollups() == CLEAN
+    finally:
+        manager.close()
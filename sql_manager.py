@@ -1,49 +1,148 @@
 import sqlite3 as sql
+import array
 from log_entry import LogEntry
 import datetime as dt
+import contextlib
+import pathlib
+from log_batch import LogBatch
+import timestamp_codec
+import validation
+try:
+    import numpy as np
+except ImportError: # numpy is only needed by get_columns()
+    np = None
 
 class SqlManager:
     """
     A class that manage the logs table in a sqlite local database file.
     The logs table contains the columns: 
-        timestamp TEXT PRIMARY KEY, 
-        drivetime FLOAT, 
-        resttime FLOAT.
+        timestamp INTEGER PRIMARY KEY (minutes since 1970/01/01 00:00), 
+        drivetime REAL, 
+        resttime REAL.
+    The schema version is kept in sqlite's user_version, files written by older versions
+    (timestamp stored as TEXT) are migrated in place when they are opened.
+    The daily_totals and monthly_totals tables hold the number of entries and the drive and rest
+    totals of every day and month, kept up to date by triggers on logs whoever writes to it.
+    The same triggers increment the counter of the data_version table on every change,
+    so a cached result computed from the file can tell whether it is still current.
     Any errors generated from sqlite3 operations will NOT be handled by the manager.
+    A single manager is meant to be shared by every page that works on the same file,
+    call close() once it is no longer needed.
 
     Attributes:
         filename(str): name of the sqlite database file
         con(sqlite3.Connection): SQLite connection to the database
         cur(sqlite3.Cursor): SQLite cursor for the SQL connection con
+
+    Writes are committed right away, unless they are made inside a batch() scope,
+    in which case they are committed once when the outermost scope exits.
+    Functions registered with add_listener() are called after every write made through the manager,
+    or once the outermost batch() scope commits for the writes made inside it.
     """
-    TIMESTAMP_FORMAT = "%Y/%m/%d %H:%M"
-    
-    def __init__(self, filename : str):
+    SCHEMA_VERSION = 5
+    # text formats of the timestamp column used before SCHEMA_VERSION 2, only read during migration
+    LEGACY_TIMESTAMP_FORMATS = (timestamp_codec.YMD_FORMAT_STR, timestamp_codec.FORMAT_STR)
+    # timestamps are stored as the number of minutes since EPOCH
+    EPOCH = timestamp_codec.EPOCH
+    # smallest and largest keys sqlite can store, used for open ranges
+    MIN_KEY = -2**63
+    MAX_KEY = 2**63 - 1
+    # timestamp is an alias of the rowid, so lookups and range scans need no extra index
+    _LOGS_TABLE_SQL = """CREATE TABLE IF NOT EXISTS {name}(
+                         timestamp INTEGER PRIMARY KEY, 
+                         drivetime REAL, 
+                         resttime REAL)"""
+    # rows removed from logs by the migration or by integrity_scan.py, with the reason they were removed
+    QUARANTINE_TABLE_SQL = """CREATE TABLE IF NOT EXISTS logs_quarantine(
+                           timestamp, drivetime REAL, resttime REAL, reason TEXT)"""
+    # bucket number of a timestamp key {ts}: days since EPOCH, and year * 12 + month - 1
+    # sqlite's integer division truncates toward zero, this one rounds down so keys before EPOCH
+    # fall in the right bucket. {n} must not have side effects, it is evaluated twice
+    FLOOR_DIV_SQL = "(({n}) - ((({n}) % {d}) + {d}) % {d}) / {d}"
+    DAY_SQL = FLOOR_DIV_SQL.format(n="{ts}", d=1440)
+    MONTH_SQL = ("CAST(strftime('%Y', {ts} * 60, 'unixepoch') AS INTEGER) * 12"
+                 " + CAST(strftime('%m', {ts} * 60, 'unixepoch') AS INTEGER) - 1")
+    # rollup table name -> sql of its bucket number
+    ROLLUPS = {"daily_totals": DAY_SQL, "monthly_totals": MONTH_SQL}
+    # pragmas applied when the database is opened, by profile name.
+    # "default" keeps sqlite's rollback journal and full syncs.
+    # "fast" uses write-ahead logging so readers are not blocked by a writer,
+    # only syncs at checkpoints, and keeps a larger cache with memory-mapped reads.
+    PROFILES = {
+        "default": {},
+        "fast": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -16384,      # negative means KiB, so 16 MiB
+            "mmap_size": 268435456,    # 256 MiB
+            "temp_store": "MEMORY",
+        },
+    }
+    # number of rows fetched from sqlite at a time by iter_range()
+    DEFAULT_CHUNK_SIZE = 500
+    # pragmas reported by get_pragmas()
+    REPORTED_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "page_size")
+
+    def __init__(self, filename : str, profile : str = "default", read_only : bool = False):
         """
         Constructor of the SqlManager. It will try to connect to the filename provided.
+        Args:
+            filename: the sqlite database file
+            profile: (default to "default") name of the pragma profile in PROFILES to open with
+            read_only: (default to False) open the file read-only. The file must already exist
+                with the current schema, it is neither created nor migrated, and every write fails.
+        Raises:
+            ValueError: if profile is not a key of PROFILES
+            sqlite3.DatabaseError: if read_only and the schema is not SCHEMA_VERSION
         """
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}, expected one of {list(self.PROFILES)}")
         self.filename = filename
+        self.profile = profile
+        self.read_only = read_only
+        # number of nested batch() scopes currently open
+        self._batch_depth = 0
+        # functions called with the list of changed timestamps after each write
+        self._listeners = []
+        # keys changed inside the open batch() scope, passed to the listeners once it commits
+        self._pending_keys = []
         # connect to the database
-        self.con = sql.connect(filename)
+        if read_only:
+            self.con = sql.connect(f"{pathlib.Path(filename).resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            self.con = sql.connect(filename)
         self.cur = self.con.cursor()
-        # create a table named logs if not exists. timestamp set to primary key for fast lookup
-        self.cur.execute(f"""CREATE TABLE IF NOT EXISTS logs(
-                         timestamp TEXT PRIMARY KEY, 
-                         drivetime FLOAT, 
-                         resttime FLOAT)""")
-        # create an index for logs based on the timestamp to enhance sorting
-        self.cur.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON logs(timestamp)")
-        self.con.commit()
+        for name, value in self.PROFILES[profile].items():
+            # the journal mode is stored in the file, a reader can not change it
+            if not (read_only and name == "journal_mode"):
+                self.cur.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            version = self.cur.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                self.con.close()
+                raise sql.DatabaseError(f"{filename} has schema version {version}, "
+                                        f"migrate it to {self.SCHEMA_VERSION} first with migrate_logs.py "
+                                        f"or by opening it for writing once")
+        else:
+            self._upgrade_schema()
+
+    def open_reader(self):
+        """
+        Open another, read-only manager on the same file with the same profile.
+        sqlite connections can only be used by the thread that opened them,
+        so background work must call this from its own thread and close the reader when done.
+        """
+        return SqlManager(self.filename, profile=self.profile, read_only=True)
 
     def get_entry(self, timestamp : dt.datetime):
         """
         Creates a LogEntry according to a sql data row.
-        (date and time of the entry will be stored in iso format text in sql for easy ordering)
+        (date and time of the entry are stored as minutes since EPOCH in sql for easy ordering)
 
         Returns: a logEntry stored in the databased 
         """
         row = self.cur.execute("SELECT timestamp, drivetime, resttime FROM logs WHERE timestamp = ?"
-                               , (self._to_text(timestamp),)).fetchone()
+                               , (self._to_key(timestamp),)).fetchone()
         if(row == None):
             return None
         return self._row_to_entry(row)
@@ -62,17 +161,128 @@ class SqlManager:
             rows = self.cur.execute("SELECT timestamp from logs ORDER BY timestamp DESC LIMIT ?", (n,)).fetchall()
         else:
             rows = self.cur.execute("SELECT timestamp FROM logs ORDER BY timestamp DESC").fetchall()
-        result = []
-        for r in rows:
-            result.append([self._to_timestamp(r[0])])
-        return result
+        to_timestamp = timestamp_codec.key_to_datetime
+        return [[to_timestamp(r[0])] for r in rows]
     
+    def get_timestamps_page(self, after = None, limit = 200, descending = True
+                            , start = None, end = None, offset = 0):
+        """
+        Get one page of entries' timestamps using keyset pagination: the page starts right after
+        the continuation token of the previous page, so every page costs one primary key seek
+        no matter how deep it is.
+        Args:
+            after: (default to None, the first page) continuation token returned with the previous page,
+                or a datetime.datetime to start after
+            limit: (default to 200) maximum number of timestamps in the page
+            descending: (default to True) page from the latest entry to the earliest
+            start, end: (default to None, no bound) only page through entries in this range,
+                same bounds as iter_range()
+            offset: (default to 0) number of entries skipped before the page, used to jump
+                to a page far from any known token
+        Returns:
+            A tuple (timestamps, token) where timestamps is a list of datetime objects and token is
+            the continuation token for the next page, or None when there are no more entries.
+        """
+        rows, token = self._page("timestamp", after, limit, descending, start, end, offset)
+        to_timestamp = timestamp_codec.key_to_datetime
+        return [to_timestamp(r[0]) for r in rows], token
+
+    def get_entries_page(self, after = None, limit = 200, descending = True
+                         , start = None, end = None, offset = 0):
+        """
+        Same as get_timestamps_page(), but the page holds whole entries, read in the same query.
+        Returns:
+            A tuple (entries, token) where entries is a list of LogEntry objects and token is
+            the continuation token for the next page, or None when there are no more entries.
+        """
+        rows, token = self._page("timestamp, drivetime, resttime", after, limit, descending, start, end, offset)
+        return [self._row_to_entry(r) for r in rows], token
+
+    def count_entries(self, start = None, end = None):
+        """
+        Count the entries whose timestamp is between start and end (both inclusive).
+        Args:
+            start, end: (default to None, no bound) same bounds as iter_range()
+        """
+        conditions, params = self._range_conditions(start, end)
+        query = "SELECT COUNT(*) FROM logs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return self.cur.execute(query, params).fetchone()[0]
+
+    def get_totals(self, start = None, end = None):
+        """
+        Sum up the entries whose timestamp is between start and end (both inclusive).
+        Args:
+            start, end: (default to None, no bound) same bounds as iter_range()
+        Returns:
+            A dictionary with the number of "entries", the "first" and "last" timestamps
+            (None when there is no entry) and the "drivetime" and "resttime" totals
+        """
+        conditions, params = self._range_conditions(start, end)
+        query = "SELECT COUNT(*), MIN(timestamp), MAX(timestamp), TOTAL(drivetime), TOTAL(resttime) FROM logs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        count, first, last, drive, rest = self.cur.execute(query, params).fetchone()
+        return {"entries": count
+                , "first": None if first is None else self._to_timestamp(first)
+                , "last": None if last is None else self._to_timestamp(last)
+                , "drivetime": drive
+                , "resttime": rest}
+
+    def add_listener(self, listener):
+        """
+        Register a function called after every write made through the manager.
+        It is called with the list of datetime objects (to the minute) whose entries were
+        added, changed or removed, and must not write to the database itself.
+        Writes made inside a batch() scope are passed in one call once the outermost scope commits,
+        and never if it is rolled back.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Unregister a function registered with add_listener(), if it is registered."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
     def add_entry(self, entry : LogEntry):
         """
         Add the entry to the database
         """
-        self.cur.execute("INSERT OR IGNORE INTO logs VALUES(?, ?, ?)", self._entry_to_row(entry))
-        self.con.commit()
+        row = self._entry_to_row(entry)
+        self.cur.execute("INSERT OR IGNORE INTO logs VALUES(?, ?, ?)", row)
+        self._commit()
+        self._notify([row[0]])
+
+    def add_entries(self, entries):
+        """
+        Add every entry of the iterable entries to the database in a single executemany call.
+        Entries whose timestamp is already stored are ignored, the same way add_entry does.
+        """
+        rows = [self._entry_to_row(entry) for entry in entries]
+        self.cur.executemany("INSERT OR IGNORE INTO logs VALUES(?, ?, ?)", rows)
+        self._commit()
+        self._notify([row[0] for row in rows])
+
+    def add_rows(self, rows):
+        """
+        Add rows (key, drivetime, resttime) keyed by minutes since EPOCH, as iter_range(raw=True)
+        returns them, in a single executemany call. Rows whose key is already stored are ignored.
+        Bulk loaders use it to skip building a LogEntry per row.
+        Args:
+            rows: a sequence of (int, float, float) tuples
+        Returns:
+            the number of rows inserted
+        Raises:
+            ValueError: if a key is not the key of a datetime, nothing is inserted then
+        """
+        keys = [row[0] for row in rows]
+        self._check_keys(keys)
+        self.cur.executemany("INSERT OR IGNORE INTO logs VALUES(?, ?, ?)", rows)
+        inserted = self.cur.rowcount
+        self._commit()
+        self._notify(keys)
+        return inserted
 
     def update_entry(self, timestamp : dt.datetime, entry : LogEntry):
         """
@@ -81,14 +291,15 @@ class SqlManager:
         the new entry stored will be the input LogEntry instance.
         Note: timestamp input is a datetime object, similarly, the timestamp attribute of a LogEntry object
         also is a datetime object, but to store in our database, they will be convert to equivalent
-        text representation according to format defined by the sql manager.
+        minutes since EPOCH, the key used by the sql manager.
         """
         row = self._entry_to_row(entry)
-        row.append(self._to_text(timestamp))
+        row.append(self._to_key(timestamp))
         # update the new entry information in sql file
         self.cur.execute("UPDATE logs SET timestamp = ?, drivetime = ?, resttime = ? WHERE timestamp = ?"
                          , row)
-        self.con.commit()
+        self._commit()
+        self._notify([row[3], row[0]])
 
     def delete_entry(self, timestamp : dt.datetime):
         """
@@ -99,35 +310,482 @@ class SqlManager:
         if(isinstance(timestamp, LogEntry)):
             timestamp = timestamp.timestamp
         deleted_entry = self.get_entry(timestamp=timestamp)
-        self.cur.execute("DELETE FROM logs WHERE timestamp = ?", [self._to_text(timestamp)])
-        self.con.commit()
+        key = self._to_key(timestamp)
+        self.cur.execute("DELETE FROM logs WHERE timestamp = ?", [key])
+        self._commit()
+        self._notify([key])
         return deleted_entry
 
+    def delete_entries(self, timestamps):
+        """
+        delete the entries with the timestamps (datetime or LogEntry objects) of the iterable
+        from the database in a single executemany call.
+        Returns:
+            the number of rows deleted
+        """
+        keys = [self._to_key(t.timestamp if isinstance(t, LogEntry) else t) for t in timestamps]
+        self.cur.executemany("DELETE FROM logs WHERE timestamp = ?", ([k] for k in keys))
+        deleted = self.cur.rowcount
+        self._commit()
+        self._notify(keys)
+        return deleted
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager that groups every write made inside it into one transaction.
+        The transaction is committed once when the outermost scope exits,
+        or rolled back if an exception leaves the outermost scope.
+        Scopes can be nested, but only the outermost one is a transaction: an exception raised in an inner
+        scope and caught before the outermost one exits rolls nothing back, the writes of the inner scope
+        are committed with the outer one.
+        Listeners are called once the outermost scope has committed, with every key written inside it.
+        Usage:
+            with manager.batch():
+                for e in entries:
+                    manager.add_entry(e)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.con.rollback()
+                self._pending_keys = []
+            raise
+        self._batch_depth -= 1
+        self._commit()
+        if self._batch_depth == 0:
+            keys, self._pending_keys = self._pending_keys, []
+            self._notify(keys)
+
+    def key_range(self, start = None, end = None):
+        """
+        Convert the bounds of a range to timestamp keys (minutes since EPOCH), for modules that
+        query the logs table directly with "WHERE timestamp BETWEEN ? AND ?".
+        Args:
+            start, end: (default to None, no bound) same bounds as iter_range()
+        Returns:
+            A tuple (lower key, upper key), both inclusive
+        """
+        lower = self.MIN_KEY if start is None else self._lower_key(start)
+        upper = self.MAX_KEY if end is None else self._upper_key(end)
+        return lower, upper
+
+    def data_version(self):
+        """
+        Get the counter incremented by every change to the logs table, whichever connection made it.
+        It only ever grows, results computed from the file at one version are valid as long as it is unchanged.
+        Returns: the current data version (int)
+        """
+        return self.cur.execute("SELECT version FROM data_version").fetchone()[0]
+
+    def rebuild_rollups(self):
+        """
+        Recompute the daily_totals and monthly_totals tables from the logs table, in one transaction.
+        """
+        with self.batch():
+            self._fill_rollups()
+
+    def verify_rollups(self, tolerance = 1e-6):
+        """
+        Compare the daily_totals and monthly_totals tables with totals computed from the logs table.
+        Args:
+            tolerance: (default to 1e-6) largest difference of drive or rest total accepted,
+                the triggers add and subtract floats so totals can drift slightly
+        Returns:
+            A dictionary from rollup table name to the list of bucket numbers that are wrong or missing
+        """
+        result = {}
+        for table, bucket in self.ROLLUPS.items():
+            rows = self.cur.execute(f"""
+                WITH expected AS (
+                    SELECT {bucket.format(ts="timestamp")} AS bucket, COUNT(*) AS entries
+                         , TOTAL(drivetime) AS drivetime, TOTAL(resttime) AS resttime
+                    FROM logs GROUP BY bucket HAVING bucket IS NOT NULL)
+                SELECT e.bucket FROM expected e LEFT JOIN {table} t ON t.bucket = e.bucket
+                WHERE t.bucket IS NULL OR t.entries != e.entries
+                   OR abs(t.drivetime - e.drivetime) > ? OR abs(t.resttime - e.resttime) > ?
+                UNION
+                SELECT t.bucket FROM {table} t LEFT JOIN expected e ON e.bucket = t.bucket
+                WHERE e.bucket IS NULL
+                ORDER BY 1""", (tolerance, tolerance)).fetchall()
+            result[table] = [r[0] for r in rows]
+        return result
+
+    @classmethod
+    def to_key(cls, timestamp : dt.datetime):
+        """
+        Convert a datetime to the key it is stored under: the minutes since EPOCH (seconds are dropped).
+        """
+        return timestamp_codec.datetime_to_key(timestamp)
+
+    @classmethod
+    def to_timestamp(cls, key : int):
+        """
+        Convert a key (minutes since EPOCH) back to a datetime.
+        """
+        return timestamp_codec.key_to_datetime(key)
+
+    @classmethod
+    def legacy_to_key(cls, timestamp_str):
+        """
+        Read a TEXT timestamp written before SCHEMA_VERSION 2, in any of LEGACY_TIMESTAMP_FORMATS.
+        Returns: the minutes since EPOCH, or None if it matches none of the formats
+        """
+        if not isinstance(timestamp_str, str):
+            return None
+        for fmt in cls.LEGACY_TIMESTAMP_FORMATS:
+            try:
+                return timestamp_codec.parse_timestamp_key(timestamp_str, fmt)
+            except ValueError:
+                pass
+        # strptime also accepted fields without their leading zero
+        for fmt in cls.LEGACY_TIMESTAMP_FORMATS:
+            try:
+                return timestamp_codec.datetime_to_key(dt.datetime.strptime(timestamp_str.strip(), fmt))
+            except ValueError:
+                pass
+        return None
+
+    def get_pragmas(self):
+        """
+        Get the value of the pragmas in REPORTED_PRAGMAS currently in effect on the connection.
+        Returns:
+            A dictionary from pragma name to its value, for example {"journal_mode": "wal", ...}
+        """
+        return {name: self.cur.execute(f"PRAGMA {name}").fetchone()[0] for name in self.REPORTED_PRAGMAS}
+
+    def close(self):
+        """
+        Commit any pending change and close the connection to the database.
+        The manager should not be used after it is closed.
+        """
+        if self.con is None:
+            return
+        self.con.commit()
+        self.con.close()
+        self.con = None
+        self.cur = None
+
+    def iter_range(self, start = None, end = None, chunk_size = DEFAULT_CHUNK_SIZE
+                   , raw = False, descending = False):
+        """
+        Lazily get the entries whose timestamp is between start and end (both inclusive).
+        The query seeks on the primary key and rows are fetched chunk_size at a time,
+        so only one chunk is held in memory no matter how large the range is.
+        Args:
+            start, end: (default to None, no bound) datetime.date, datetime.datetime or "YYYY-MM-DD" strings.
+                A date without a time covers the whole day.
+            chunk_size: (default to DEFAULT_CHUNK_SIZE) number of rows per fetchmany call
+            raw: (default to False) yield (key, drivetime, resttime) tuples instead of LogEntry objects,
+                where key is the minutes since EPOCH
+            descending: (default to False) yield the latest entries first
+        Returns:
+            A generator of LogEntry objects (or tuples when raw is True) ordered by timestamp
+        """
+        query = "SELECT timestamp, drivetime, resttime FROM logs"
+        conditions, params = self._range_conditions(start, end)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp DESC" if descending else " ORDER BY timestamp"
+        # a cursor of its own, so other calls on the manager do not reset the iteration
+        cur = self.con.cursor()
+        try:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if raw:
+                    yield from rows
+                else:
+                    for row in rows:
+                        yield self._row_to_entry(row)
+        finally:
+            cur.close()
+
+    def get_columns(self, start = None, end = None):
+        """
+        Read the entries whose timestamp is between start and end (both inclusive) as NumPy columns,
+        ordered by timestamp. Rows are decoded by numpy straight from the cursor,
+        without creating a LogEntry or datetime per row. Requires numpy.
+        Args:
+            start, end: (default to None, no bound) same bounds as iter_range()
+        Returns:
+            A tuple of three arrays of the same length: (minutes since EPOCH as int64,
+            drivetime as float64, resttime as float64)
+        Raises:
+            ImportError: if numpy is not installed
+        """
+        if np is None:
+            raise ImportError("get_columns() requires numpy")
+        conditions, params = self._range_conditions(start, end)
+        query = "SELECT timestamp, drivetime, resttime FROM logs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp"
+        # each chunk of rows becomes a float64 block, keys stay exact below 2**53 minutes
+        blocks = []
+        cur = self.con.cursor()
+        try:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(self.DEFAULT_CHUNK_SIZE * 8)
+                if not rows:
+                    break
+                blocks.append(np.array(rows, dtype=np.float64))
+        finally:
+            cur.close()
+        table = np.concatenate(blocks) if blocks else np.empty((0, 3))
+        # missing drive or rest times are read as 0, like TOTAL() does
+        np.nan_to_num(table, copy=False)
+        return (table[:, 0].astype(np.int64), np.ascontiguousarray(table[:, 1])
+                , np.ascontiguousarray(table[:, 2]))
+
+    def read_batch(self, start = None, end = None):
+        """
+        Read the entries whose timestamp is between start and end (both inclusive) as a LogBatch,
+        ordered by timestamp. Rows are fetched DEFAULT_CHUNK_SIZE * 8 at a time and appended to the
+        columns without creating a LogEntry or datetime per row. Missing times are read as 0.
+        Args:
+            start, end: (default to None, no bound) same bounds as iter_range()
+        """
+        conditions, params = self._range_conditions(start, end)
+        query = "SELECT timestamp, COALESCE(drivetime, 0.0), COALESCE(resttime, 0.0) FROM logs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp"
+        # the columns are filled before the batch views them, an array with views can not grow
+        keys = array.array(LogBatch.KEY_TYPE)
+        drivetimes = array.array(LogBatch.TIME_TYPE)
+        resttimes = array.array(LogBatch.TIME_TYPE)
+        cur = self.con.cursor()
+        try:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(self.DEFAULT_CHUNK_SIZE * 8)
+                if not rows:
+                    break
+                chunk_keys, chunk_drives, chunk_rests = zip(*rows)
+                keys.extend(chunk_keys)
+                drivetimes.extend(chunk_drives)
+                resttimes.extend(chunk_rests)
+        finally:
+            cur.close()
+        return LogBatch(keys, drivetimes, resttimes)
+
+    def write_batch(self, batch : LogBatch):
+        """
+        Add every row of the LogBatch to the database in a single executemany call.
+        Rows whose key is already stored are ignored, the same way add_entry does.
+        Returns:
+            the number of rows inserted
+        Raises:
+            ValueError: if a key is not the key of a datetime, nothing is inserted then
+        """
+        self._check_keys(batch.keys)
+        self.cur.executemany("INSERT OR IGNORE INTO logs VALUES(?, ?, ?)", batch.rows())
+        inserted = self.cur.rowcount
+        self._commit()
+        self._notify(batch.keys.tolist())
+        return inserted
+
     def get_time_data_between_dates(self, start_date, end_date):
         """
-        Fetch drive and rest time logs between two dates from the database.
-        Returns a list of rows: [(timestamp, drivetime, resttime), ...]
+        Fetch drive and rest time logs between two dates (both inclusive) from the database.
+        Args:
+            start_date, end_date: datetime.date, datetime.datetime or "YYYY-MM-DD" strings.
+                A date without a time covers the whole day.
+        Returns a list of rows: [(timestamp, drivetime, resttime), ...] where timestamp is a datetime
         """
         try:
-            query = """
-            SELECT timestamp, drivetime, resttime
-            FROM logs
-            WHERE date(timestamp) BETWEEN ? AND ?
-            ORDER BY timestamp;
-            """
-            self.cur.execute(query, (start_date, end_date))
-            return self.cur.fetchall()
+            to_timestamp = timestamp_codec.key_to_datetime
+            return [(to_timestamp(r[0]), r[1], r[2])
+                    for r in self.iter_range(start_date, end_date, raw=True)]
         except Exception as e:
             print(f"Database error: {e}")
             return []
 
+    def _upgrade_schema(self):
+        """
+        helper method that creates the logs table, or migrates it in place to SCHEMA_VERSION.
+        The whole upgrade runs in one transaction, so an interrupted migration leaves the file untouched.
+        """
+        version = self.cur.execute("PRAGMA user_version").fetchone()[0]
+        if version > self.SCHEMA_VERSION:
+            raise sql.DatabaseError(f"{self.filename} has schema version {version}, "
+                                    f"newer than the supported version {self.SCHEMA_VERSION}")
+        # the table can still be missing if it was dropped by hand, which also drops its triggers
+        has_logs = self.cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs'"
+                                    ).fetchone() is not None
+        if version == self.SCHEMA_VERSION and has_logs:
+            return
+        self.cur.execute("BEGIN IMMEDIATE")
+        try:
+            if version < 2:
+                self._migrate_text_timestamps()
+            self.cur.execute(self._LOGS_TABLE_SQL.format(name="logs"))
+            self._create_rollups()
+            # before version 5 the day buckets of keys before EPOCH were truncated toward zero
+            if version < 5 or not has_logs:
+                self._fill_rollups()
+            self.cur.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self.con.commit()
+        except BaseException:
+            self.con.rollback()
+            raise
+
+    def _migrate_text_timestamps(self):
+        """
+        helper method of _upgrade_schema that converts a logs table keyed by TEXT timestamps
+        (any of LEGACY_TIMESTAMP_FORMATS) to one keyed by minutes since EPOCH.
+        Rows whose timestamp can not be read, or that fall on a minute already converted,
+        are moved to the logs_quarantine table instead of being dropped.
+        """
+        columns = self.cur.execute("PRAGMA table_info(logs)").fetchall()
+        self.cur.execute(self._LOGS_TABLE_SQL.format(name="logs_v2"))
+        if len(columns) > 0:
+            read_cur = self.con.cursor()
+            read_cur.execute("SELECT timestamp, drivetime, resttime FROM logs ORDER BY rowid")
+            seen = set()
+            kept = []
+            rejected = []
+            for row in read_cur:
+                key = self.legacy_to_key(row[0])
+                if key is None:
+                    rejected.append((row[0], row[1], row[2], "unreadable timestamp"))
+                elif key in seen:
+                    rejected.append((row[0], row[1], row[2], "duplicate timestamp"))
+                else:
+                    seen.add(key)
+                    kept.append((key, row[1], row[2]))
+            self.cur.executemany("INSERT INTO logs_v2 VALUES(?, ?, ?)", kept)
+            if rejected:
+                self.cur.execute(self.QUARANTINE_TABLE_SQL)
+                self.cur.executemany("INSERT INTO logs_quarantine VALUES(?, ?, ?, ?)", rejected)
+            # dropping the table also drops the old idx_timestamp index,
+            # the INTEGER PRIMARY KEY is the rowid so no extra index is needed
+            self.cur.execute("DROP TABLE logs")
+        self.cur.execute("ALTER TABLE logs_v2 RENAME TO logs")
+
+    def _create_rollups(self):
+        """
+        helper method of _upgrade_schema that creates the rollup tables and the triggers on logs
+        that keep them up to date. A bucket whose last entry is removed is deleted.
+        Keys out of the range of sqlite's date functions have no month, they are left out of the rollups
+        rather than given a NULL bucket, which an INTEGER PRIMARY KEY would turn into a rowid.
+        The triggers also increment the data_version counter, triggers of older schema versions are replaced.
+        """
+        self.cur.execute("CREATE TABLE IF NOT EXISTS data_version(version INTEGER NOT NULL)")
+        # start from a random value, so a file recreated under the same name does not repeat old versions
+        self.cur.execute("""INSERT INTO data_version SELECT abs(random() / 2)
+                         WHERE NOT EXISTS (SELECT 1 FROM data_version)""")
+        for table, bucket in self.ROLLUPS.items():
+            self.cur.execute(f"""CREATE TABLE IF NOT EXISTS {table}(
+                             bucket INTEGER PRIMARY KEY,
+                             entries INTEGER NOT NULL,
+                             drivetime REAL NOT NULL,
+                             resttime REAL NOT NULL)""")
+        bump = "UPDATE data_version SET version = version + 1;"
+        add = ""
+        remove = ""
+        for table, bucket in self.ROLLUPS.items():
+            new = bucket.format(ts="NEW.timestamp")
+            old = bucket.format(ts="OLD.timestamp")
+            add += f"""
+                INSERT INTO {table} SELECT {new}, 1, COALESCE(NEW.drivetime, 0), COALESCE(NEW.resttime, 0)
+                WHERE {new} IS NOT NULL
+                ON CONFLICT(bucket) DO UPDATE SET entries = entries + 1
+                    , drivetime = drivetime + excluded.drivetime, resttime = resttime + excluded.resttime;"""
+            remove += f"""
+                UPDATE {table} SET entries = entries - 1
+                    , drivetime = drivetime - COALESCE(OLD.drivetime, 0)
+                    , resttime = resttime - COALESCE(OLD.resttime, 0)
+                WHERE bucket = {old};
+                DELETE FROM {table} WHERE bucket = {old} AND entries <= 0;"""
+        for trigger in ("logs_rollup_insert", "logs_rollup_delete", "logs_rollup_update"):
+            self.cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        self.cur.execute(f"CREATE TRIGGER logs_rollup_insert AFTER INSERT ON logs BEGIN {add} {bump} END")
+        self.cur.execute(f"CREATE TRIGGER logs_rollup_delete AFTER DELETE ON logs BEGIN {remove} {bump} END")
+        self.cur.execute(f"CREATE TRIGGER logs_rollup_update AFTER UPDATE ON logs BEGIN {remove} {add} {bump} END")
+
+    def _fill_rollups(self):
+        """
+        helper method that recomputes every rollup table from the logs table.
+        """
+        for table, bucket in self.ROLLUPS.items():
+            self.cur.execute(f"DELETE FROM {table}")
+            self.cur.execute(f"""INSERT INTO {table}
+                             SELECT {bucket.format(ts="timestamp")} AS b, COUNT(*), TOTAL(drivetime), TOTAL(resttime)
+                             FROM logs GROUP BY b HAVING b IS NOT NULL""")
+
+    def _page(self, columns, after, limit, descending, start, end, offset):
+        """
+        helper method of the get_*_page methods that runs the keyset pagination query.
+        Returns:
+            A tuple (rows, token) where rows are the selected columns, the timestamp key first
+        """
+        if isinstance(after, dt.datetime):
+            after = self._to_key(after)
+        conditions, params = self._range_conditions(start, end)
+        if after is not None:
+            conditions.append("timestamp < ?" if descending else "timestamp > ?")
+            params.append(after)
+        query = f"SELECT {columns} FROM logs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp DESC" if descending else " ORDER BY timestamp"
+        # one extra row tells whether there is a next page
+        query += " LIMIT ? OFFSET ?"
+        params += [limit + 1, offset]
+        rows = self.cur.execute(query, params).fetchall()
+        token = None
+        if len(rows) > limit:
+            rows.pop()
+            token = rows[-1][0]
+        return rows, token
+
+    def _notify(self, keys):
+        """
+        helper method that calls the registered listeners with the changed timestamp keys,
+        or keeps the keys for later while a batch() scope is open.
+        """
+        if not self._listeners or not keys:
+            return
+        if self._batch_depth > 0:
+            self._pending_keys.extend(keys)
+            return
+        # a key written twice in a batch is passed once
+        keys = list(dict.fromkeys(keys))
+        timestamps = [timestamp_codec.key_to_datetime(k) for k in keys]
+        for listener in list(self._listeners):
+            listener(timestamps)
+
+    def _check_keys(self, keys):
+        """
+        helper method raising ValueError if a key of the sequence is out of the range of datetime,
+        such keys can not be read back and sqlite's date functions can not put them in a rollup bucket.
+        """
+        if len(keys) > 0 and (min(keys) < validation.MIN_KEY or max(keys) > validation.MAX_KEY):
+            raise ValueError(f"timestamp keys must be between {validation.MIN_KEY} and {validation.MAX_KEY}")
+
+    def _commit(self):
+        """
+        helper method that commits the pending changes, unless a batch() scope is open.
+        """
+        if self._batch_depth == 0:
+            self.con.commit()
+
     def _entry_to_row(self, entry : LogEntry):
         """
         helper method that create a row representation of the entry to be stored in database.
-        that is, create a list [string timestamp, float drivetime, float resttime] for the entry.
+        that is, create a list [int timestamp key, float drivetime, float resttime] for the entry.
         """
         result = []
-        result.append (self._to_text(entry.timestamp))
+        # the entry already holds its key
+        result.append (entry.key)
         result.append (float(entry.drivetime))
         result.append (float(entry.resttime))
         return result
@@ -135,24 +793,62 @@ class SqlManager:
     def _row_to_entry(self, row):
         """
         Returns a LogEntry object with data stored in row.
-        row[0] should be a string in the format TIMESTAMP_FORMAT, representing the timestamp.
+        row[0] should be an int of minutes since EPOCH, representing the timestamp.
         row[1] and row[2] should be floats that represents the drivetime and resttime respectively.
         """
         return LogEntry(self._to_timestamp(row[0]), row[1], row[2])
 
-    def _to_text(self, timestamp : dt.datetime):
+    def _to_key(self, timestamp : dt.datetime):
         """
-        helper method that used to format the timestamp of a LogEntry to be 
-        stored in the database, for easier ordering
+        helper method that converts the timestamp of a LogEntry to the integer key
+        stored in the database: the minutes since EPOCH (seconds are dropped).
         """
-        return timestamp.strftime(self.TIMESTAMP_FORMAT)
+        return timestamp_codec.datetime_to_key(timestamp)
 
-    def _to_timestamp(self, timestamp_str : str):
+    def _to_timestamp(self, key : int):
         """
         helper method that create a datetime.datetime object from 
-        a text representation of the timestamp stored in our database
+        the integer key of the timestamp stored in our database
+        """
+        return timestamp_codec.key_to_datetime(key)
+
+    def _range_conditions(self, start, end):
+        """
+        helper method that builds the WHERE conditions on the timestamp key for a range.
+        Returns:
+            A tuple (conditions, params): a list of sql conditions and the list of their parameters
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(self._lower_key(start))
+        if end is not None:
+            conditions.append("timestamp <= ?")
+            params.append(self._upper_key(end))
+        return conditions, params
+
+    def _lower_key(self, value):
+        """
+        helper method that converts the lower bound of a range to a key.
+        value can be a datetime, a date (start of that day) or a "YYYY-MM-DD" string.
+        """
+        if isinstance(value, str):
+            value = dt.date.fromisoformat(value)
+        if not isinstance(value, dt.datetime):
+            value = dt.datetime.combine(value, dt.time.min)
+        return self._to_key(value)
+
+    def _upper_key(self, value):
+        """
+        helper method that converts the upper bound of a range to a key.
+        value can be a datetime, a date (end of that day) or a "YYYY-MM-DD" string.
         """
-        return dt.datetime.strptime(timestamp_str, self.TIMESTAMP_FORMAT)
+        if isinstance(value, str):
+            value = dt.date.fromisoformat(value)
+        if not isinstance(value, dt.datetime):
+            return self._lower_key(value) + 1439
+        return self._to_key(value)
 
 
 # test:
@@ -161,7 +857,7 @@ class SqlManager:
 # manager.cur.execute("DROP TABLE logs")
 # manager.con.commit()
 # manager = SqlManager("test.db")
-# print(manager._to_text(e.timestamp))
+# print(manager._to_key(e.timestamp))
 # print(manager._entry_to_row(e))
 
 # manager.add_entry(e)
@@ -64,8 +64,7 @@ manager.cur.execute("DROP TABLE IF EXISTS logs")
 manager.con.commit()
 manager = SM("test.db")
 
-for e in data_sets[choice-1]:
-    manager.add_entry(e)
+manager.add_entries(data_sets[choice-1])
 
 current_content = manager.get_timestamps()
 for timestamp in current_content:
@@ -0,0 +1,159 @@
+"""
+Fixed-width parsing and formatting of timestamps, shared by every module that reads or writes them.
+The application writes "MM/DD/YYYY HH:MM" (FORMAT_STR), files older than SqlManager schema 2 may also hold
+"YYYY/MM/DD HH:MM" (YMD_FORMAT_STR). The fields sit at fixed positions, so they are read by slicing
+instead of strptime and written with string formatting instead of strftime.
+Dates are memoized both ways, since logs repeat the same days over and over.
+Timestamps can be decoded straight to the key SqlManager stores: the minutes since EPOCH.
+"""
+import datetime as dt
+import functools
+
+DATE_FORMAT = "%m/%d/%Y"
+TIME_FORMAT = "%H:%M"
+FORMAT_STR = DATE_FORMAT + " " + TIME_FORMAT
+YMD_DATE_FORMAT = "%Y/%m/%d"
+YMD_FORMAT_STR = YMD_DATE_FORMAT + " " + TIME_FORMAT
+# timestamps are stored as the number of minutes since EPOCH
+EPOCH = dt.datetime(1970, 1, 1)
+EPOCH_MINUTES = EPOCH.toordinal() * 1440
+_EPOCH_DAYS = EPOCH.toordinal()
+_FORMATS = (FORMAT_STR, YMD_FORMAT_STR)
+# "HH:MM" -> minutes since midnight, and back as (hour, minute), for every minute of a day
+_TIME_MINUTES = {f"{m // 60:02d}:{m % 60:02d}": m for m in range(1440)}
+_HOUR_MINUTE = [divmod(m, 60) for m in range(1440)]
+# date format -> (slice of the year, of the month, of the day, positions of the two "/")
+_DATE_LAYOUTS = {
+    DATE_FORMAT: (slice(6, 10), slice(0, 2), slice(3, 5), (2, 5)),
+    YMD_DATE_FORMAT: (slice(0, 4), slice(5, 7), slice(8, 10), (4, 7)),
+}
+
+
+@functools.lru_cache(maxsize=8192)
+def date_to_days(date_str : str, fmt : str = DATE_FORMAT):
+    """
+    Read a date written in fmt, one of DATE_FORMAT and YMD_DATE_FORMAT.
+    Returns: the number of days from EPOCH to the date
+    Raises:
+        ValueError: if date_str is not a valid date in this format
+    """
+    year, month, day, separators = _DATE_LAYOUTS[fmt]
+    if len(date_str) != 10 or date_str[separators[0]] != "/" or date_str[separators[1]] != "/":
+        raise ValueError(f"date {date_str!r} does not match {fmt}")
+    # int() accepts signs, blanks and non-ASCII digits, the fields must be plain ASCII digits
+    year, month, day = date_str[year], date_str[month], date_str[day]
+    digits = year + month + day
+    if not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"date {date_str!r} does not match {fmt}")
+    return dt.date(int(year), int(month), int(day)).toordinal() - _EPOCH_DAYS
+
+
+def time_to_minutes(time_str : str):
+    """
+    Read a "HH:MM" time.
+    Returns: the number of minutes since midnight
+    Raises:
+        ValueError: if time_str is not a valid time in this format
+    """
+    minutes = _TIME_MINUTES.get(time_str)
+    if minutes is None:
+        raise ValueError(f"time {time_str!r} does not match {TIME_FORMAT} or is out of range")
+    return minutes
+
+
+def parse_key(date_str : str, time_str : str, fmt : str = DATE_FORMAT):
+    """
+    Read a date written in fmt and a "HH:MM" time.
+    Returns: the key of the timestamp, in minutes since EPOCH
+    Raises:
+        ValueError: if either is invalid
+    """
+    return date_to_days(date_str, fmt) * 1440 + time_to_minutes(time_str)
+
+
+def parse_timestamp_key(timestamp_str : str, fmt : str = FORMAT_STR):
+    """
+    Read a timestamp written in fmt (FORMAT_STR or YMD_FORMAT_STR), surrounding blanks are ignored.
+    Only the fixed-width form is accepted, so it also checks the format strictly.
+    Returns: the key of the timestamp, in minutes since EPOCH
+    Raises:
+        ValueError: if timestamp_str is invalid
+    """
+    timestamp_str = timestamp_str.strip()
+    if len(timestamp_str) != 16 or timestamp_str[10] != " ":
+        raise ValueError(f"timestamp {timestamp_str!r} does not match {fmt}")
+    minutes = _TIME_MINUTES.get(timestamp_str[11:])
+    if minutes is None:
+        raise ValueError(f"timestamp {timestamp_str!r} does not match {fmt} or is out of range")
+    return date_to_days(timestamp_str[:10], fmt[:-len(TIME_FORMAT) - 1]) * 1440 + minutes
+
+
+def parse_datetime(timestamp_str : str, fmt : str = FORMAT_STR):
+    """
+    Read a timestamp written in fmt to a datetime, seconds at 0.
+    FORMAT_STR and YMD_FORMAT_STR are sliced, other formats and timestamps that are not zero-padded,
+    which strptime accepts, fall back to strptime.
+    Raises:
+        ValueError: if timestamp_str is invalid
+    """
+    if fmt in _FORMATS:
+        try:
+            return key_to_datetime(parse_timestamp_key(timestamp_str, fmt))
+        except ValueError:
+            pass
+    return dt.datetime.strptime(timestamp_str.strip(), fmt)
+
+
+@functools.lru_cache(maxsize=8192)
+def _days_to_ymd(days : int):
+    """helper function giving (year, month, day) of the day days after EPOCH"""
+    date = dt.date.fromordinal(days + _EPOCH_DAYS)
+    return date.year, date.month, date.day
+
+
+def key_to_datetime(key : int):
+    """
+    Returns: the datetime of a key in minutes since EPOCH
+    """
+    days, minutes = divmod(key, 1440)
+    return dt.datetime(*_days_to_ymd(days), *_HOUR_MINUTE[minutes])
+
+
+def datetime_to_key(timestamp : dt.datetime):
+    """
+    Returns: the key of a datetime, in minutes since EPOCH, seconds dropped
+    """
+    return timestamp.toordinal() * 1440 - EPOCH_MINUTES + timestamp.hour * 60 + timestamp.minute
+
+
+@functools.lru_cache(maxsize=8192)
+def days_to_date(days : int):
+    """
+    Returns: the "MM/DD/YYYY" string of the day days after EPOCH
+    """
+    year, month, day = _days_to_ymd(days)
+    return f"{month:02d}/{day:02d}/{year:04d}"
+
+
+def format_key(key : int):
+    """
+    Returns: the "MM/DD/YYYY HH:MM" string of a key in minutes since EPOCH
+    """
+    days, minutes = divmod(key, 1440)
+    return f"{days_to_date(days)} {minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def format_date(timestamp : dt.date):
+    """Returns: the "MM/DD/YYYY" string of a date or datetime"""
+    return f"{timestamp.month:02d}/{timestamp.day:02d}/{timestamp.year:04d}"
+
+
+def format_time(timestamp : dt.datetime):
+    """Returns: the "HH:MM" string of a datetime or time"""
+    return f"{timestamp.hour:02d}:{timestamp.minute:02d}"
+
+
+def format_datetime(timestamp : dt.datetime):
+    """Returns: the "MM/DD/YYYY HH:MM" string of a datetime, the same as strftime(FORMAT_STR)"""
+    return (f"{timestamp.month:02d}/{timestamp.day:02d}/{timestamp.year:04d}"
+            f" {timestamp.hour:02d}:{timestamp.minute:02d}")
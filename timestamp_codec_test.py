@@ -0,0 +1,71 @@
+"""
+Tests of timestamp_codec against strptime and strftime, around EPOCH and with malformed input.
+Run with: python -m pytest timestamp_codec_test.py
+"""
+import datetime as dt
+import random
+
+import pytest
+
+import timestamp_codec
+from timestamp_codec import FORMAT_STR, YMD_FORMAT_STR
+
+
+def random_datetimes(count = 2000, seed = 0):
+    rng = random.Random(seed)
+    lower = dt.datetime(1900, 1, 1)
+    span = (dt.datetime(2100, 1, 1) - lower) // dt.timedelta(minutes=1)
+    return [lower + dt.timedelta(minutes=rng.randrange(span)) for _ in range(count)] + [
+        timestamp_codec.EPOCH, timestamp_codec.EPOCH - dt.timedelta(minutes=1), dt.datetime(1969, 1, 1)
+        , dt.datetime(2024, 2, 29, 23, 59), dt.datetime(1900, 3, 1)]
+
+
+@pytest.mark.parametrize("fmt", [FORMAT_STR, YMD_FORMAT_STR])
+def test_parse_matches_strptime(fmt):
+    for timestamp in random_datetimes():
+        text = timestamp.strftime(fmt)
+        key = timestamp_codec.parse_timestamp_key(text, fmt)
+        assert timestamp_codec.key_to_datetime(key) == dt.datetime.strptime(text, fmt)
+        assert timestamp_codec.parse_datetime(text, fmt) == timestamp
+
+
+def test_format_matches_strftime():
+    for timestamp in random_datetimes():
+        key = timestamp_codec.datetime_to_key(timestamp)
+        assert timestamp_codec.format_key(key) == timestamp.strftime(FORMAT_STR)
+        assert timestamp_codec.format_datetime(timestamp) == timestamp.strftime(FORMAT_STR)
+        assert timestamp_codec.days_to_date(key // 1440) == timestamp.strftime("%m/%d/%Y")
+        assert timestamp_codec.key_to_datetime(key) == timestamp
+
+
+def test_keys_before_epoch():
+    assert timestamp_codec.parse_timestamp_key("12/31/1969 23:59") == -1
+    assert timestamp_codec.parse_key("12/31/1969", "00:00") == -1440
+    assert timestamp_codec.format_key(-1) == "12/31/1969 23:59"
+    assert timestamp_codec.key_to_datetime(-1441) == dt.datetime(1969, 12, 30, 23, 59)
+    assert timestamp_codec.datetime_to_key(dt.datetime(1969, 12, 31, 23, 59, 59)) == -1
+
+
+@pytest.mark.parametrize("text", ["1/4/2019 7:05", "01/4/2019 07:05", " 1/04/2019 7:5 "])
+def test_unpadded_input_falls_back_to_strptime(text):
+    assert timestamp_codec.parse_datetime(text) == dt.datetime.strptime(text.strip(), FORMAT_STR)
+    with pytest.raises(ValueError):
+        timestamp_codec.parse_timestamp_key(text)
+
+
+@pytest.mark.parametrize("date", [
+    "02/30/2025", "13/01/2025", "00/10/2025", "1/01/2025 ", "01-01-2025", "+1/01/2025", " 1/01/2025"
+    , "0²/01/2025", "01/0٣/2025", "٠٣/٠١/٢٠٢٥", "01/01/２０２５"])
+def test_invalid_dates(date):
+    with pytest.raises(ValueError):
+        timestamp_codec.date_to_days(date)
+    with pytest.raises(ValueError):
+        timestamp_codec.parse_key(date, "06:00")
+
+
+@pytest.mark.parametrize("time", ["24:00", "6:00", "06:60", "06:0١", "06.00", ""])
+def test_invalid_times(time):
+    with pytest.raises(ValueError):
+        timestamp_codec.time_to_minutes(time)
+    with pytest.raises(ValueError):
+        timestamp_codec.parse_timestamp_key(f"01/01/2025 {time}")
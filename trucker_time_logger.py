@@ -3,9 +3,12 @@ from daily_log    import DailyLog
 from viewpage     import ViewPage
 from analytics    import AnalyticsPage
 from fileSelector import Users  
-import sqlite3
+from sql_manager  import SqlManager
 
 class FileManager:
+    # pragma profile the user databases are opened with, see SqlManager.PROFILES
+    DB_PROFILE = "fast"
+
     def __init__(self, root):
         self.root = root
         self.root.geometry("1024x600")
@@ -13,9 +16,11 @@ class FileManager:
         customtkinter.set_appearance_mode("light")
         customtkinter.set_default_color_theme("blue")
 
-        self.file_names = []
-        self.db_conn    = None
-        self.db_cursor  = None
+        self.file_names  = []
+        # one manager per opened database file, shared by every tab
+        self.sql_manager = None
+        # tab name -> function building its page, pages are built on first selection
+        self.lazy_tabs   = {}
 
         self.user_screen()
 
@@ -27,25 +32,20 @@ class FileManager:
     def launch_main_app(self, db_filename):
         # after picking DB, tear down user selector
         self.page.destroy()
-        self.file_names = [db_filename]
-        self.db_conn    = sqlite3.connect(db_filename)
-        self.db_cursor  = self.db_conn.cursor()
-        self.ensure_logs_table_exists()
+        self.file_names  = [db_filename]
+        # the manager creates the logs table if it is missing
+        self.sql_manager = SqlManager(db_filename, profile=self.DB_PROFILE)
         self.create_tabs()
 
-    def ensure_logs_table_exists(self):
-        self.db_cursor.execute("""
-            CREATE TABLE IF NOT EXISTS logs (
-                timestamp TEXT PRIMARY KEY,
-                drivetime REAL,
-                resttime  REAL
-            );
-        """)
-        self.db_conn.commit()
+    def close_database(self):
+        # release the shared connection, if any
+        if self.sql_manager is not None:
+            self.sql_manager.close()
+            self.sql_manager = None
 
     def create_tabs(self):
         # build the tabview container
-        self.tab_view = customtkinter.CTkTabview(self.root)
+        self.tab_view = customtkinter.CTkTabview(self.root, command=self.on_tab_selected)
         self.tab_view.pack(fill="both", expand=True)
 
         # add tabs by name (no assignment)
@@ -55,20 +55,11 @@ class FileManager:
         # --- Daily Log tab ---
         print("→ Adding Daily Log")
         dl_frame = self.tab_view.tab("Daily Log")
-        DailyLog(master=dl_frame, filename=self.file_names[0])\
-            .pack(fill="both", expand=True)
-
-        # --- View tab ---
-        print("→ Adding View Page")
-        vp_frame = self.tab_view.tab("View")
-        ViewPage(master=vp_frame, filename=self.file_names[0])\
+        DailyLog(master=dl_frame, sql_manager=self.sql_manager)\
             .pack(fill="both", expand=True)
 
-        # --- Analytics tab ---
-        print("→ Adding Analytics Page")
-        ap_frame = self.tab_view.tab("Analytics")
-        AnalyticsPage(master=ap_frame, filename=self.file_names[0])\
-            .pack(fill="both", expand=True)
+        # --- View and Analytics tabs, built when first selected ---
+        self.lazy_tabs = {"View": ViewPage, "Analytics": AnalyticsPage}
 
         # --- Log Out tab ---
         print("→ Adding Log Out label")
@@ -89,14 +80,38 @@ class FileManager:
             anchor="center"
         ).grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
 
+        # switch user without closing the app
+        customtkinter.CTkButton(
+            lo_frame,
+            text="Log Out",
+            command=self.return_to_user_screen
+        ).grid(row=1, column=0, padx=20, pady=(0, 20))
+
+    def on_tab_selected(self):
+        # build the page of a lazy tab the first time it is shown
+        name = self.tab_view.get()
+        page_class = self.lazy_tabs.pop(name, None)
+        if page_class is None:
+            return
+        print(f"→ Adding {name} Page")
+        page_class(master=self.tab_view.tab(name), sql_manager=self.sql_manager)\
+            .pack(fill="both", expand=True)
+
     def return_to_user_screen(self):
         # go back to user file selector
         self.tab_view.destroy()
+        self.close_database()
         self.user_screen()
 
+    def on_close(self):
+        # close the database before the window goes away
+        self.close_database()
+        self.root.destroy()
+
 
 if __name__ == "__main__":
     root = customtkinter.CTk()
     root.title("Trucker Time Logger")
-    FileManager(root)
+    manager = FileManager(root)
+    root.protocol("WM_DELETE_WINDOW", manager.on_close)
     root.mainloop()
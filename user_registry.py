@@ -0,0 +1,240 @@
+import os
+import pathlib
+import sqlite3 as sql
+import validation
+from sql_manager import SqlManager
+
+class UserInfo:
+    """
+    Summary of one user database file, as recorded in the registry.
+
+    Attributes:
+        filename(str): database file of the user, relative to the registry directory
+        name(str): name shown for the user, the file name without .db
+        entries(int): number of log entries, None if the file does not exist yet
+        first(datetime.datetime), last(datetime.datetime): first and last entry,
+            None without entries or when the file still has a legacy schema
+        mtime(float): last modification time of the file (or of its write-ahead log), None if it does not exist
+        schema_version(int): SqlManager schema version of the file, None if it does not exist
+        exists(bool): whether the file existed at the last refresh, a registered user gets one when first opened
+    """
+    def __init__(self, filename, entries = None, first = None, last = None, mtime = None, schema_version = None):
+        self.filename = filename
+        self.name = pathlib.Path(filename).stem
+        self.entries = entries
+        self.first = first
+        self.last = last
+        self.mtime = mtime
+        self.schema_version = schema_version
+        self.exists = mtime is not None
+
+    def summary(self):
+        """Returns: a one line description of the entries of the user"""
+        if not self.exists:
+            return "no database file"
+        if self.entries is None:
+            return "no entries yet"
+        if self.first is None:
+            return f"{self.entries} entries"
+        return f"{self.entries} entries, {self.first:%m/%d/%Y} - {self.last:%m/%d/%Y}"
+
+    def __repr__(self):
+        return f"UserInfo({self.filename!r}, entries={self.entries}, schema_version={self.schema_version})"
+
+
+class UserRegistry:
+    """
+    A class that manage the users_files table of the registry database, listing every user database
+    with its number of entries, date span, modification time and schema version, so the user selector
+    can show hundreds of users without opening their files.
+    refresh() only reads the files whose modification time or size changed since they were recorded.
+    A registry connection belongs to the thread that opened it, like a SqlManager.
+
+    Attributes:
+        filename(str): name of the registry database file
+        directory(pathlib.Path): folder holding the user database files
+        con(sqlite3.Connection): SQLite connection to the registry
+        cur(sqlite3.Cursor): SQLite cursor for the SQL connection con
+    """
+    DEFAULT_FILENAME = "UserFiles.db"
+    SCHEMA_VERSION = 1
+    # columns added to the original users_files(filename) table
+    COLUMNS = {
+        "entries": "INTEGER",
+        "first": "INTEGER",
+        "last": "INTEGER",
+        "mtime_ns": "INTEGER",
+        "size": "INTEGER",
+        "schema_version": "INTEGER",
+    }
+
+    def __init__(self, filename = DEFAULT_FILENAME, directory = None):
+        """
+        Open the registry, adding the summary columns to an older users_files table.
+        Args:
+            filename: (default to DEFAULT_FILENAME) the registry database file
+            directory: (default to None, the folder of filename) folder holding the user database files
+        """
+        self.filename = filename
+        self.directory = pathlib.Path(directory if directory is not None else os.path.dirname(filename) or ".")
+        self.con = sql.connect(filename)
+        self.cur = self.con.cursor()
+        self._upgrade_schema()
+
+    def users(self):
+        """
+        Get every registered user, without opening their files.
+        Returns: the list of UserInfo sorted by name
+        """
+        rows = self.cur.execute("""SELECT filename, entries, first, last, mtime_ns, schema_version
+                                FROM users_files ORDER BY filename COLLATE NOCASE""").fetchall()
+        return [self._row_to_user(r) for r in rows]
+
+    def register(self, filename):
+        """
+        Add a user database file to the registry, the file does not need to exist yet.
+        Returns: the UserInfo of the file
+        """
+        self.cur.execute("INSERT OR IGNORE INTO users_files(filename) VALUES(?)", (filename,))
+        self.con.commit()
+        self.refresh_file(filename)
+        return self.get(filename)
+
+    def unregister(self, filename):
+        """Remove a user from the registry, its database file is left untouched."""
+        self.cur.execute("DELETE FROM users_files WHERE filename = ?", (filename,))
+        self.con.commit()
+
+    def get(self, filename):
+        """Returns: the UserInfo of a registered file, None if it is not registered"""
+        row = self.cur.execute("""SELECT filename, entries, first, last, mtime_ns, schema_version
+                               FROM users_files WHERE filename = ?""", (filename,)).fetchone()
+        return None if row is None else self._row_to_user(row)
+
+    def refresh(self, discover = False):
+        """
+        Bring the registry up to date, reading only the files that changed since the last refresh.
+        Args:
+            discover: (default to False) also register the *.db files of directory that hold a logs table.
+                Scratch databases such as test.db hold one too, so only use it on a folder of user files.
+        Returns: the list of file names whose summary changed
+        """
+        filenames = [r[0] for r in self.cur.execute("SELECT filename FROM users_files")]
+        if discover:
+            known = set(filenames)
+            registry = pathlib.Path(self.filename).resolve()
+            for path in sorted(self.directory.glob("*.db")):
+                if path.name not in known and path.resolve() != registry and self._has_logs(path):
+                    self.cur.execute("INSERT OR IGNORE INTO users_files(filename) VALUES(?)", (path.name,))
+                    filenames.append(path.name)
+        changed = [f for f in filenames if self.refresh_file(f, commit=False)]
+        self.con.commit()
+        return changed
+
+    def refresh_file(self, filename, commit = True):
+        """
+        Update the summary of one registered file if its modification time or size changed.
+        Returns: whether the summary was updated
+        """
+        stat = self._stat(filename)
+        recorded = self.cur.execute("SELECT mtime_ns, size FROM users_files WHERE filename = ?"
+                                    , (filename,)).fetchone()
+        if recorded is None or (stat is None and recorded == (None, None)) or recorded == stat:
+            return False
+        if stat is None:
+            summary = (None, None, None, None)
+            stat = (None, None)
+        else:
+            summary = self._read_summary(self.directory / filename)
+        self.cur.execute("""UPDATE users_files SET entries = ?, first = ?, last = ?, schema_version = ?
+                         , mtime_ns = ?, size = ? WHERE filename = ?""", (*summary, *stat, filename))
+        if commit:
+            self.con.commit()
+        return True
+
+    def close(self):
+        """
+        Close the connection to the registry.
+        """
+        self.con.close()
+
+    def _upgrade_schema(self):
+        """
+        helper method that creates the users_files table, or adds the summary columns to the original one.
+        """
+        version = self.cur.execute("PRAGMA user_version").fetchone()[0]
+        if version == self.SCHEMA_VERSION:
+            return
+        self.cur.execute("CREATE TABLE IF NOT EXISTS users_files(filename TEXT PRIMARY KEY)")
+        existing = {r[1] for r in self.cur.execute("PRAGMA table_info(users_files)")}
+        for name, kind in self.COLUMNS.items():
+            if name not in existing:
+                self.cur.execute(f"ALTER TABLE users_files ADD COLUMN {name} {kind}")
+        self.cur.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.con.commit()
+
+    def _stat(self, filename):
+        """
+        helper method giving (modification time in ns, size) of a user file, None if it does not exist.
+        Writes made in write-ahead logging mode only reach the -wal file until a checkpoint,
+        so it counts as well.
+        """
+        path = self.directory / filename
+        try:
+            info = path.stat()
+        except OSError:
+            return None
+        mtime, size = info.st_mtime_ns, info.st_size
+        try:
+            wal = path.with_name(path.name + "-wal").stat()
+            mtime, size = max(mtime, wal.st_mtime_ns), size + wal.st_size
+        except OSError:
+            pass
+        return mtime, size
+
+    def _has_logs(self, path):
+        """helper method checking whether a file is a sqlite database with a logs table"""
+        try:
+            con = sql.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                return con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs'"
+                                   ).fetchone() is not None
+            finally:
+                con.close()
+        except sql.Error:
+            return False
+
+    def _read_summary(self, path):
+        """
+        helper method reading (entries, first key, last key, schema version) of a user file, read-only.
+        Entries are counted from the logs table, the rollups leave out keys that are not datetimes.
+        Files with TEXT timestamps are only counted since their timestamps can not be ordered in sql.
+        """
+        try:
+            con = sql.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        except sql.Error:
+            return None, None, None, None
+        try:
+            version = con.execute("PRAGMA user_version").fetchone()[0]
+            if version >= 2:
+                # first and last only among the keys that are datetimes, the others are still counted
+                return (*con.execute("""SELECT COUNT(*)
+                                     , (SELECT MIN(timestamp) FROM logs WHERE timestamp >= ?)
+                                     , (SELECT MAX(timestamp) FROM logs WHERE timestamp <= ?)
+                                     FROM logs""", (validation.MIN_KEY, validation.MAX_KEY)).fetchone()
+                        , version)
+            return con.execute("SELECT COUNT(*) FROM logs").fetchone()[0], None, None, version
+        except sql.Error:
+            # not a database, or no logs table yet
+            return None, None, None, None
+        finally:
+            con.close()
+
+    def _row_to_user(self, row):
+        """helper method that creates a UserInfo from a row of users_files"""
+        filename, entries, first, last, mtime_ns, version = row
+        return UserInfo(filename, entries
+                        , None if first is None else SqlManager.to_timestamp(first)
+                        , None if last is None else SqlManager.to_timestamp(last)
+                        , None if mtime_ns is None else mtime_ns / 1e9
+                        , version)
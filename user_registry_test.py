@@ -0,0 +1,65 @@
+"""
+Tests of the UserRegistry behind the user selector, on user files created in a temporary folder.
+Run with: python -m pytest user_registry_test.py
+"""
+import datetime as dt
+
+import pytest
+
+from log_entry import LogEntry
+from sql_manager import SqlManager
+from user_registry import UserRegistry
+
+
+def make_user(path, entries):
+    manager = SqlManager(str(path))
+    manager.add_entries(entries)
+    manager.close()
+
+
+@pytest.fixture
+def registry(tmp_path):
+    make_user(tmp_path / "ann.db", [LogEntry(dt.datetime(2025, 3, 3, 6, 0), 8, 10)
+                                    , LogEntry(dt.datetime(2025, 3, 4, 6, 0), 8, 10)])
+    # a scratch database in the same folder, never registered
+    make_user(tmp_path / "test.db", [LogEntry(dt.datetime(2025, 1, 1), 1, 1)])
+    registry = UserRegistry(str(tmp_path / "UserFiles.db"))
+    yield registry
+    registry.close()
+
+
+def test_refresh_lists_only_registered_files(registry):
+    registry.register("ann.db")
+    registry.refresh()
+    assert [u.filename for u in registry.users()] == ["ann.db"]
+    registry.refresh(discover=True)
+    assert [u.filename for u in registry.users()] == ["ann.db", "test.db"]
+
+
+def test_summary_of_registered_file(registry):
+    user = registry.register("ann.db")
+    assert user.exists
+    assert (user.entries, user.schema_version) == (2, SqlManager.SCHEMA_VERSION)
+    assert user.summary() == "2 entries, 03/03/2025 - 03/04/2025"
+
+
+def test_missing_file_is_flagged(registry, tmp_path):
+    user = registry.register("bob.db")
+    assert not user.exists
+    assert user.summary() == "no database file"
+    # once the file is created and written to, the next refresh reads it
+    make_user(tmp_path / "bob.db", [])
+    registry.refresh()
+    assert registry.get("bob.db").exists
+    assert registry.get("bob.db").summary() == "0 entries"
+
+
+def test_entries_counted_from_logs(registry, tmp_path):
+    manager = SqlManager(str(tmp_path / "ann.db"))
+    # a key that is not a datetime is left out of the rollups, written around the checks of the manager
+    manager.cur.execute("INSERT INTO logs VALUES(?, 1, 1)", (2**62,))
+    manager.con.commit()
+    manager.close()
+    user = registry.register("ann.db")
+    assert user.entries == 3
+    assert user.last == dt.datetime(2025, 3, 4, 6, 0)
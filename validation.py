@@ -0,0 +1,174 @@
+"""
+Validation of the values of a log entry: "MM/DD/YYYY" dates, "HH:MM" times, hours and stored timestamp keys.
+Every check returns an error code, OK (0) when the value is valid, so a whole column can be validated at once
+into an array of codes, one per row, as imports and database scans do. Values are checked for their format
+and for their range: 02/30/2025 or 24:00 are rejected here rather than later when they are converted.
+The patterns are compiled once and dates are memoized, since logs repeat the same days.
+"""
+import array
+import datetime as dt
+import functools
+import math
+import re
+
+import timestamp_codec
+
+# an entry can not hold more driving hours than a day has
+MAX_HOURS = 24.0
+# rest logged as one entry can span days, a 34 hour restart for one, up to a week
+MAX_REST_HOURS = 168.0
+
+OK = 0
+BAD_DATE_FORMAT = 1
+BAD_DATE = 2
+BAD_TIME_FORMAT = 3
+BAD_TIME = 4
+BAD_DRIVETIME = 5
+BAD_RESTTIME = 6
+BAD_KEY = 7
+MESSAGES = {
+    OK: "valid",
+    BAD_DATE_FORMAT: "date is not MM/DD/YYYY",
+    BAD_DATE: "date does not exist",
+    BAD_TIME_FORMAT: "time is not HH:MM",
+    BAD_TIME: "time does not exist",
+    BAD_DRIVETIME: f"driving time is not a number of hours between 0 and {MAX_HOURS:g}",
+    BAD_RESTTIME: f"resting time is not a number of hours between 0 and {MAX_REST_HOURS:g}",
+    BAD_KEY: "timestamp key is not an integer number of minutes",
+}
+# typecode of the arrays of error codes
+CODE_TYPE = "B"
+
+DATE_PATTERN = re.compile(r"(\d{2})/(\d{2})/(\d{4})", re.ASCII)
+TIME_PATTERN = re.compile(r"(\d{2}):(\d{2})", re.ASCII)
+_VALID_TIMES = frozenset(f"{m // 60:02d}:{m % 60:02d}" for m in range(1440))
+# keys of datetime.min and datetime.max, whole minutes since EPOCH
+MIN_KEY = timestamp_codec.datetime_to_key(dt.datetime.min)
+MAX_KEY = timestamp_codec.datetime_to_key(dt.datetime.max)
+
+
+def message(code):
+    """Returns: the description of an error code"""
+    return MESSAGES.get(code, f"unknown error {code}")
+
+
+def check_date(date):
+    """
+    Check a "MM/DD/YYYY" date.
+    Returns: OK, BAD_DATE_FORMAT or BAD_DATE when the date does not exist (19/39/2025, 02/29/2023)
+    """
+    if not isinstance(date, str):
+        return BAD_DATE_FORMAT
+    return _check_date(date)
+
+
+def check_time(time):
+    """
+    Check a "HH:MM" time.
+    Returns: OK, BAD_TIME_FORMAT or BAD_TIME when the time does not exist (29:69, 24:00)
+    """
+    if not isinstance(time, str):
+        return BAD_TIME_FORMAT
+    if time in _VALID_TIMES:
+        return OK
+    return BAD_TIME if TIME_PATTERN.fullmatch(time) else BAD_TIME_FORMAT
+
+
+def check_hours(value, max_hours = MAX_HOURS):
+    """
+    Check a number of hours, given as a number or a string.
+    Args:
+        max_hours: (default to MAX_HOURS) largest number accepted, pass MAX_REST_HOURS for resting times
+    Returns: whether it is a finite number between 0 and max_hours
+    """
+    if isinstance(value, bool):
+        return False
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        return False
+    return math.isfinite(hours) and 0 <= hours <= max_hours
+
+
+def check_key(key):
+    """
+    Check a timestamp key as stored in the logs table.
+    Returns: OK or BAD_KEY when it is not an integer of a datetime (a TEXT or REAL value left in the column)
+    """
+    if type(key) is not int or not MIN_KEY <= key <= MAX_KEY:
+        return BAD_KEY
+    return OK
+
+
+def validate_dates(dates):
+    """Returns: the array of the error codes of a column of dates, see check_date()"""
+    return array.array(CODE_TYPE, map(check_date, dates))
+
+
+def validate_times(times):
+    """Returns: the array of the error codes of a column of times, see check_time()"""
+    return array.array(CODE_TYPE, map(check_time, times))
+
+
+def validate_hours(values, error, max_hours = MAX_HOURS):
+    """
+    Args:
+        values: column of hours
+        error: code given to the invalid values, BAD_DRIVETIME or BAD_RESTTIME
+    Returns: the array of the error codes of the column, see check_hours()
+    """
+    return array.array(CODE_TYPE, [OK if check_hours(v, max_hours) else error for v in values])
+
+
+def validate_keys(keys):
+    """Returns: the array of the error codes of a column of stored timestamp keys, see check_key()"""
+    return array.array(CODE_TYPE, map(check_key, keys))
+
+
+def validate_columns(dates, times, drivetimes, resttimes, max_hours = MAX_HOURS, max_rest_hours = MAX_REST_HOURS):
+    """
+    Validate rows given as four columns of the same length.
+    Driving times are checked against max_hours, resting times against max_rest_hours.
+    Returns: the array of the error code of every row, the first failing check of the row
+        in the order date, time, driving time, resting time
+    """
+    codes = validate_dates(dates)
+    for column in (validate_times(times)
+                   , validate_hours(drivetimes, BAD_DRIVETIME, max_hours)
+                   , validate_hours(resttimes, BAD_RESTTIME, max_rest_hours)):
+        _merge(codes, column)
+    return codes
+
+
+def validate_rows(keys, drivetimes, resttimes, max_hours = MAX_HOURS, max_rest_hours = MAX_REST_HOURS):
+    """
+    Validate rows of the logs table given as three columns of the same length.
+    Driving times are checked against max_hours, resting times against max_rest_hours.
+    Returns: the array of the error code of every row, the first failing check of the row
+    """
+    codes = validate_keys(keys)
+    _merge(codes, validate_hours(drivetimes, BAD_DRIVETIME, max_hours))
+    _merge(codes, validate_hours(resttimes, BAD_RESTTIME, max_rest_hours))
+    return codes
+
+
+@functools.lru_cache(maxsize=8192)
+def _check_date(date):
+    """helper function checking a date string, memoized"""
+    match = DATE_PATTERN.fullmatch(date)
+    if match is None:
+        return BAD_DATE_FORMAT
+    month, day, year = map(int, match.groups())
+    try:
+        dt.date(year, month, day)
+    except ValueError:
+        return BAD_DATE
+    return OK
+
+
+def _merge(codes, column):
+    """helper function keeping in codes the first error of every row"""
+    if any(column):
+        for i, code in enumerate(column):
+            if code and not codes[i]:
+                codes[i] = code
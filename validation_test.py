@@ -0,0 +1,53 @@
+"""
+Tests of the checks of validation.py and of the error codes of validate_columns() and validate_rows().
+Run with: python -m pytest validation_test.py
+"""
+import math
+
+import pytest
+
+import validation as v
+
+
+def test_validate_columns_codes():
+    dates = ["03/01/2025", "3/1/2025", "02/29/2023", "03/01/2025", "03/01/2025", "03/01/2025", "03/01/2025"
+             , "13/45/2025", "03/01/2025"]
+    times = ["06:00", "06:00", "06:00", "6:00", "24:00", "06:00", "06:00", "99:99", "06:00"]
+    drives = [8, 8, 8, 8, 8, "25", 8, -1, "8.5"]
+    rests = [10, 10, 10, 10, 10, 10, "-0.5", -1, "34"]
+    codes = v.validate_columns(dates, times, drives, rests)
+    assert list(codes) == [v.OK, v.BAD_DATE_FORMAT, v.BAD_DATE, v.BAD_TIME_FORMAT, v.BAD_TIME
+                           , v.BAD_DRIVETIME, v.BAD_RESTTIME, v.BAD_DATE, v.OK]
+    assert codes.typecode == v.CODE_TYPE
+
+
+def test_validate_columns_limits():
+    codes = v.validate_columns(["03/01/2025"] * 3, ["06:00"] * 3, [8, 12, 8], [34, 10, 200]
+                               , max_hours=11, max_rest_hours=48)
+    assert list(codes) == [v.OK, v.BAD_DRIVETIME, v.BAD_RESTTIME]
+    assert list(v.validate_columns([], [], [], [])) == []
+
+
+@pytest.mark.parametrize("value, ok", [
+    (0, True), ("24", True), (24.01, False), (-0.0, True), ("1e1", True), ("", False), (None, False)
+    , (True, False), (math.nan, False), (math.inf, False), ("eight", False)])
+def test_check_hours(value, ok):
+    assert v.check_hours(value) is ok
+
+
+def test_rest_limit_allows_restart():
+    assert not v.check_hours(34)
+    assert v.check_hours(34, v.MAX_REST_HOURS)
+    assert not v.check_hours(v.MAX_REST_HOURS + 1, v.MAX_REST_HOURS)
+
+
+def test_validate_rows_codes():
+    codes = v.validate_rows([0, "03/01/2025 06:00", 2.5, v.MAX_KEY + 1, 60, 120], [8, 8, 8, 8, 30, 8]
+                            , [10, 10, 10, 10, 10, 34])
+    assert list(codes) == [v.OK, v.BAD_KEY, v.BAD_KEY, v.BAD_KEY, v.BAD_DRIVETIME, v.OK]
+
+
+def test_messages():
+    assert v.message(v.BAD_RESTTIME) == "resting time is not a number of hours between 0 and 168"
+    assert v.message(v.BAD_DRIVETIME) == "driving time is not a number of hours between 0 and 24"
+    assert v.message(99) == "unknown error 99"
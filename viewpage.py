@@ -4,6 +4,10 @@ from custom_date_entry import CustomDateEntry
 from log_entry import LogEntry
 from sql_manager import SqlManager
 from custom_window import SelectionWindow
+from entry_window import EntryWindow
+from entry_cache import EntryCache
+from virtual_list import VirtualList
+from background import run_in_background
 
 class ViewPage(customtkinter.CTkFrame):
     ENTRY_COLOR = ["#eaeaea", "#3a3a3a"]
@@ -14,23 +18,30 @@ class ViewPage(customtkinter.CTkFrame):
     DELETE_BTN_TEXT_COLOR = "#b20000"
     TRANSPARENT = "transparent"
 
-    def __init__(self, master, sql_filename):
+    def __init__(self, master, sql_manager : SqlManager):
         super().__init__(master)
         self.columnconfigure(index=1, weight=1)
         self.rowconfigure(index=3, weight=1)
 
-        try:
-            self.sqlManager = SqlManager(sql_filename)
-        except:
-            print("Sql file open failed")
-            return
-
-        self.log_entries = self.sqlManager.get_timestamps()
+        # shared manager owned by the FileManager, do not close it here
+        self.sqlManager = sql_manager
+
+        # entries already read from the database, so clicking a row needs no query
+        self.entry_cache = EntryCache(self.sqlManager)
+        # timestamps shown in the list, latest first, read from the database as they scroll into view.
+        # None until the first block has been loaded in the background
+        self.log_entries = None
+        self.load_task = None
+        # count of the entries after a write, read in the background
+        self.count_task = None
+        # keep the list up to date with entries saved from other tabs
+        self.sqlManager.add_listener(self.on_entries_changed)
         self.last_change = []
         self.selected_index = -1
 
         self.init_detail_display()
         self.init_list_display()
+        self.load_entries()
 
     def init_detail_display(self):
         self.detail_frame = customtkinter.CTkFrame(self)
@@ -95,44 +106,97 @@ class ViewPage(customtkinter.CTkFrame):
         self.clear_button = customtkinter.CTkButton(self, text="Clear", command=self.clear_button_click)
         self.clear_button.grid(row=2, column=0, padx=(10, 5), pady=(0, 5), sticky="w")
 
-        self.list_frame = customtkinter.CTkScrollableFrame(self)
+        # only the visible rows exist as widgets, they are reused while scrolling
+        self.list_frame = VirtualList(self, command=self.entry_button_clicked, formatter=LogEntry.to_str)
         self.list_frame.grid(row=3, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="nswe")
-        self.list_frame.columnconfigure(0, weight=1)
-
-        for idx, entry in enumerate(self.log_entries):
-            btn = self.create_entry_button(LogEntry.to_str(entry[0]))
-            btn.grid(row=idx, column=0, sticky="ew")
-            entry.append(btn)
-
-    def create_entry_button(self, entry_datetime: str):
-        btn = customtkinter.CTkButton(
-            self.list_frame,
-            text=entry_datetime,
-            fg_color=self.ENTRY_COLOR,
-            hover_color=self.ENTRY_HOVER_COLOR,
-            text_color="black",
-            corner_radius=0
-        )
-        btn.configure(command=lambda b=btn: self.entry_button_clicked(b))
-        return btn
 
-    def entry_button_clicked(self, btn):
+    def load_entries(self, start = None, end = None):
+        """Read the first block of the entries between start and end (None for no bound)
+        on a worker thread with a reader, and show them once it is done."""
+        self.cancel_tasks()
+        self.list_frame.show_placeholder("Loading entries...")
+        manager = self.sqlManager
+
+        def work():
+            reader = manager.open_reader()
+            try:
+                return EntryWindow.read_first_block(reader, start, end)
+            finally:
+                reader.close()
+
+        self.load_task = run_in_background(self, work, lambda block: self.show_entries(start, end, block)
+                                           , on_error=self.on_load_error)
+
+    def on_load_error(self, error):
+        self.list_frame.show_placeholder("Could not load the entries")
+        print(f"Loading entries failed: {error}")
+
+    def show_entries(self, start = None, end = None, first_block = None):
+        """Replace the content of the list with the entries between start and end (None for no bound)."""
+        self.load_task = None
+        self.log_entries = EntryWindow(self.sqlManager, start, end, cache=self.entry_cache
+                                       , first_block=first_block)
+        self.selected_index = -1
+        self.list_frame.set_source(self.log_entries)
+
+    def on_entries_changed(self, timestamps):
+        """Count the entries of the shown range again on a worker thread if a write changed it."""
+        window = self.log_entries
+        if window is None or not window.covers(timestamps):
+            return
+        if self.count_task is not None:
+            self.count_task.cancel()
+        manager = self.sqlManager
+
+        def work():
+            reader = manager.open_reader()
+            try:
+                return reader.count_entries(window.start, window.end)
+            finally:
+                reader.close()
+
+        self.count_task = run_in_background(self, work, lambda length: self.on_count_done(window, length))
+
+    def on_count_done(self, window, length):
+        self.count_task = None
+        if window is not self.log_entries:
+            return
+        # indexes may have shifted, so the selection is dropped with the loaded blocks
+        window.refresh(length)
+        self.selected_index = -1
+        self.list_frame.select(-1)
+        self.list_frame.scroll_to(self.list_frame.first)
+
+    def cancel_tasks(self):
+        for task in (self.load_task, self.count_task):
+            if task is not None:
+                task.cancel()
+        self.load_task = None
+        self.count_task = None
+
+    def destroy(self):
+        self.cancel_tasks()
+        self.sqlManager.remove_listener(self.on_entries_changed)
+        self.entry_cache.close()
+        super().destroy()
+
+    def entry_button_clicked(self, idx):
         self.deselect_current_entry()
-        self.select_entry(self.find_index(btn.cget("text")))
+        self.select_entry(idx)
 
     def deselect_current_entry(self):
         if self.selected_index == -1:
             return
-        self.log_entries[self.selected_index][1].configure(fg_color=self.ENTRY_COLOR)
+        self.list_frame.select(-1)
 
     def select_entry(self, idx):
         self.selected_index = idx
         self.display_entry()
-        self.log_entries[idx][1].configure(fg_color=self.ENTRY_COLOR2)
+        self.list_frame.select(idx)
 
     def display_entry(self):
-        self.date_input.set_date(self.log_entries[self.selected_index][0])
-        entry = self.sqlManager.get_entry(self.log_entries[self.selected_index][0])
+        self.date_input.set_date(self.log_entries[self.selected_index])
+        entry = self.entry_cache.get(self.log_entries[self.selected_index])
         self.time_input.delete(0, "end")
         self.drive_time_input.delete(0, "end")
         self.rest_time_input.delete(0, "end")
@@ -147,9 +211,14 @@ class ViewPage(customtkinter.CTkFrame):
         print("DELETE button clicked")
 
     def search_button_click(self):
-        print("SEARCH button clicked")
+        # an empty date input leaves that side of the range open
+        begin = self.begin_date_input.get_date()
+        end = self.end_date_input.get_date()
+        self.load_entries(begin, end)
 
     def clear_button_click(self):
-        print("CLEAR button clicked")
+        self.begin_date_input.clear()
+        self.end_date_input.clear()
+        self.load_entries()
 
 
@@ -0,0 +1,136 @@
+import customtkinter as ctk
+
+class VirtualList(ctk.CTkFrame):
+    """
+    A scrollable list of buttons that only creates as many row buttons as fit in its height
+    and reuses them while scrolling, so building it costs the same for 50 or 50,000 items.
+    The items come from a source supporting len() and indexing (for example an EntryWindow),
+    only the visible items are read from it.
+
+    Attributes:
+        source: the items shown, anything with __len__ and __getitem__
+        command: function called with the index of an item when its row is clicked
+        formatter: function that turns an item into the text of its row
+        first(int): index of the item shown in the top row
+        selected_index(int): index of the highlighted item, -1 when none is
+        rows(list): the pool of row buttons, top to bottom
+    """
+    ROW_HEIGHT = 28
+    ROW_COLOR = ["#eaeaea", "#3a3a3a"]
+    SELECTED_COLOR = ["#aeaeae", "#111111"]
+    HOVER_COLOR = ["#91c1f5", "#273366"]
+    # rows moved by one notch of the mouse wheel
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, command = None, formatter = str, **kwargs):
+        super().__init__(master, **kwargs)
+        self.source = []
+        self.command = command
+        self.formatter = formatter
+        self.first = 0
+        self.selected_index = -1
+        self.rows = []
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        # the row frame keeps the size given by the layout instead of shrinking to its rows
+        self.row_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.row_frame.grid(row=0, column=0, sticky="nsew")
+        self.row_frame.grid_propagate(False)
+        self.row_frame.grid_columnconfigure(0, weight=1)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        # message shown instead of the rows, for example while the source is loading
+        self.placeholder = ctk.CTkLabel(self, text="")
+
+        self.row_frame.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self.row_frame)
+
+    def show_placeholder(self, text):
+        """Hide the rows and show text in their place until the next set_source()."""
+        self.placeholder.configure(text=text)
+        self.placeholder.grid(row=0, column=0, sticky="nsew")
+        self.placeholder.lift()
+
+    def set_source(self, source):
+        """Show the items of source, scrolled to the top with nothing selected."""
+        self.placeholder.grid_remove()
+        self.source = source
+        self.first = 0
+        self.selected_index = -1
+        self.redraw()
+
+    def select(self, index):
+        """Highlight the item at index, -1 to clear the selection."""
+        self.selected_index = index
+        self.redraw()
+
+    def scroll_to(self, first):
+        """Scroll so the item at index first is in the top row, as far as the items allow."""
+        last_first = max(0, len(self.source) - len(self.rows))
+        self.first = min(max(0, first), last_first)
+        self.redraw()
+
+    def redraw(self):
+        """Refresh the text and color of every row from the source."""
+        length = len(self.source)
+        for slot, btn in enumerate(self.rows):
+            index = self.first + slot
+            if index < length:
+                color = self.SELECTED_COLOR if index == self.selected_index else self.ROW_COLOR
+                btn.configure(text=self.formatter(self.source[index]), fg_color=color)
+                btn.grid()
+            else:
+                btn.grid_remove()
+        if length == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / length, min(1, (self.first + len(self.rows)) / length))
+
+    def on_resize(self, event):
+        """Grow or shrink the pool of rows to fill the new height."""
+        count = max(1, event.height // self.ROW_HEIGHT)
+        while len(self.rows) < count:
+            self.rows.append(self.create_row(len(self.rows)))
+        while len(self.rows) > count:
+            self.rows.pop().destroy()
+        self.scroll_to(self.first)
+
+    def create_row(self, slot):
+        btn = ctk.CTkButton(
+            self.row_frame,
+            text="",
+            height=self.ROW_HEIGHT,
+            fg_color=self.ROW_COLOR,
+            hover_color=self.HOVER_COLOR,
+            text_color="black",
+            corner_radius=0
+        )
+        btn.configure(command=lambda s=slot: self.on_row_click(s))
+        btn.grid(row=slot, column=0, sticky="ew")
+        self.bind_wheel(btn)
+        return btn
+
+    def on_row_click(self, slot):
+        index = self.first + slot
+        if index < len(self.source) and self.command is not None:
+            self.command(index)
+
+    def on_scrollbar(self, action, value, unit = None):
+        """Handle the scrollbar callback: ("moveto", fraction) or ("scroll", count, "units"/"pages")."""
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.source)))
+        elif action == "scroll":
+            step = int(value) * (len(self.rows) if unit == "pages" else 1)
+            self.scroll_to(self.first + step)
+
+    def on_wheel(self, event):
+        # linux reports the wheel as buttons 4 and 5, other platforms use delta
+        if event.num == 4 or (event.num != 5 and event.delta > 0):
+            self.scroll_to(self.first - self.WHEEL_ROWS)
+        else:
+            self.scroll_to(self.first + self.WHEEL_ROWS)
+
+    def bind_wheel(self, widget):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self.on_wheel)